@@ -3,10 +3,22 @@
 
 import pandas as pd
 
-def load_data():
-    co2_data = pd.read_csv('annual-co2-emissions-per-country.csv')
-    temperature_data = pd.read_csv('GLB.Ts+dSST.csv', skiprows=1)
-    temperature_annual = temperature_data[['Year', 'J-D']].rename(columns={'J-D': 'Annual Temperature Anomaly'}).dropna()
+months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+def read_annual_temperature(temperature_path='GLB.Ts+dSST.csv'):
+    temperature_data = pd.read_csv(temperature_path, skiprows=1)
+    return temperature_data[['Year', 'J-D']].rename(columns={'J-D': 'Annual Temperature Anomaly'}).dropna()
+
+
+def read_monthly_temperature(temperature_path='GLB.Ts+dSST.csv'):
+    # one column per month, '***' where a month has no value yet
+    return pd.read_csv(temperature_path, skiprows=1, na_values='***')[['Year'] + months]
+
+
+def load_data(co2_path='annual-co2-emissions-per-country.csv', temperature_path='GLB.Ts+dSST.csv', co2_data=None):
+    if co2_data is None:
+        co2_data = pd.read_csv(co2_path)
+    temperature_annual = read_annual_temperature(temperature_path)
 
     global_co2 = co2_data.groupby('Year')['Annual CO₂ emissions'].sum().reset_index()
 
@@ -15,8 +27,26 @@ def load_data():
     return merged_data
 
 
-co2temp = load_data()
+def load_monthly_data(co2_path='annual-co2-emissions-per-country.csv', temperature_path='GLB.Ts+dSST.csv', co2_data=None):
+    if co2_data is None:
+        co2_data = pd.read_csv(co2_path)
+    temperature_data = read_monthly_temperature(temperature_path)
+    temperature_monthly = temperature_data.melt(id_vars=['Year'], value_vars=months,
+                                                var_name='Month', value_name='Monthly Temperature Anomaly').dropna()
+    temperature_monthly['Month'] = temperature_monthly['Month'].map({month: i + 1 for i, month in enumerate(months)})
+
+    global_co2 = co2_data.groupby('Year')['Annual CO₂ emissions'].sum().reset_index()
+
+    merged_data = pd.merge(global_co2, temperature_monthly, on='Year').sort_values(by=['Year', 'Month'])
+
+    return merged_data
+
+
+if __name__ == '__main__':
+    co2temp = load_data()
+    co2temp_monthly = load_monthly_data()
 
-co2temp.head()
+    co2temp.head()
 
-co2temp.to_csv('co2temp.csv', index=False)
+    co2temp.to_csv('co2temp.csv', index=False)
+    co2temp_monthly.to_csv('co2temp-monthly.csv', index=False)
@@ -3,10 +3,12 @@
 
 import pandas as pd
 
-def preprocess_and_sort_data(co2_path, temp_path):
+def preprocess_and_sort_data(co2_path, temp_path, co2_df=None, temp_df=None):
 
-  co2_df = pd.read_excel(co2_path)
-  temp_df = pd.read_excel(temp_path)
+  if co2_df is None:
+    co2_df = pd.read_excel(co2_path)
+  if temp_df is None:
+    temp_df = pd.read_excel(temp_path)
   co2_long = co2_df.melt(id_vars=['Scenario'], value_vars=co2_df.columns[4:],
                            var_name='Year', value_name='CO2 Emissions')
 
@@ -25,8 +27,9 @@ def preprocess_and_sort_data(co2_path, temp_path):
 
   return sorted_df
 
-projected_impacts = preprocess_and_sort_data('world co2 projections.xlsx', 'world temp projection.xlsx')
+if __name__ == '__main__':
+  projected_impacts = preprocess_and_sort_data('world co2 projections.xlsx', 'world temp projection.xlsx')
 
-projected_impacts.head()
+  projected_impacts.head()
 
-projected_impacts.to_csv('projected_impacts.csv', index=False)
+  projected_impacts.to_csv('projected_impacts.csv', index=False)
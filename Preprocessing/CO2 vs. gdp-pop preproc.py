@@ -1,18 +1,24 @@
 
 ######CO2 vs GDP/Pop Pre-processing Script######
 
+import numpy as np
 import pandas as pd
 
-def load_and_preprocess_data():
+import entities
+
+def load_and_preprocess_data(co2_path='annual-co2-emissions-per-country.csv', indicators_path='Popular Indicators Data.csv', co2_data=None,
+                             entities_path=entities.ENTITIES, entity_table=None):
     
-    co2_data = pd.read_csv('annual-co2-emissions-per-country.csv')
-    indicators_data = pd.read_csv('Popular Indicators Data.csv')
+    if co2_data is None:
+        co2_data = pd.read_csv(co2_path)
+    if entity_table is None:
+        entity_table = entities.read_entities(entities_path)
+    indicators_data = pd.read_csv(indicators_path)
 
-    indicators_data['Country Name'].replace({
-        'Iran, Islamic Rep.': 'Iran',
-        'Russian Federation': 'Russia',
-        'Korea, Rep.': 'South Korea'
-    }, inplace=True)
+    # World Bank spellings -> the inventory's names (the aliases of the entity table)
+    indicator_ids = entities.entity_ids(indicators_data['Country Name'], entity_table)
+    indicators_data['Country Name'] = np.where(indicator_ids >= 0, entities.canonical_names(indicator_ids, entity_table),
+                                               indicators_data['Country Name'])
 
     
     indicators_2022 = indicators_data[['Country Name', 'Series Name', '2022 [YR2022]']]
@@ -20,19 +26,23 @@ def load_and_preprocess_data():
     gdp_population_2022 = indicators_2022[gdp_population_filter]
     gdp_population_2022['2022 [YR2022]'] = pd.to_numeric(gdp_population_2022['2022 [YR2022]'].replace('..', pd.NA), errors='coerce')
     pivot_data_2022 = gdp_population_2022.pivot(index='Country Name', columns='Series Name', values='2022 [YR2022]')
+    pivot_ids = entities.entity_ids(pivot_data_2022.index, entity_table)
+    pivot_data_2022 = pivot_data_2022[pivot_ids >= 0].set_axis(pivot_ids[pivot_ids >= 0])
 
     
     latest_year = co2_data['Year'].max()
-    country_co2_data = co2_data[(co2_data['Code'].notna()) & (co2_data['Entity'] != 'World')]
+    co2_ids = entities.entity_ids(co2_data['Entity'], entity_table)
+    country_co2_data = co2_data.assign(entity_id=co2_ids)[np.isin(co2_ids, entities.ids_of_kind(entity_table, 'country'))]
     top_emitters = country_co2_data[country_co2_data['Year'] == latest_year].nlargest(10, 'Annual CO₂ emissions')
 
     
-    final_data = top_emitters.merge(pivot_data_2022, left_on='Entity', right_index=True, how='left')
+    final_data = top_emitters.merge(pivot_data_2022, left_on='entity_id', right_index=True, how='left').drop(columns='entity_id')
     return final_data
 
 
-co2gdp = load_and_preprocess_data()
+if __name__ == '__main__':
+    co2gdp = load_and_preprocess_data()
 
-co2gdp.head()
+    co2gdp.head()
 
-co2gdp.to_csv('co2gdp.csv', index=False)
+    co2gdp.to_csv('co2gdp.csv', index=False)
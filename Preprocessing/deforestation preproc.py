@@ -1,13 +1,23 @@
 import pandas as pd
 
-def preprocess_and_merge_datasets(co2_data_path, deforestation_data_path):
+import entities
 
-    co2_data = pd.read_csv(co2_data_path)
+def preprocess_and_merge_datasets(co2_data_path, deforestation_data_path, co2_data=None, deforestation_data=None,
+                                  entities_path=entities.ENTITIES, entity_table=None):
 
-    deforestation_data = pd.read_excel(deforestation_data_path, sheet_name='Country tree cover loss')
+    if co2_data is None:
+        co2_data = pd.read_csv(co2_data_path)
 
-    relevant_countries = congo_basin_countries + amazon_countries + southeast_asia_countries
-    co2_data_filtered = co2_data[(co2_data['Year'] >= 2001) & (co2_data['Year'] <= 2023) & co2_data['Entity'].isin(relevant_countries)]
+    if deforestation_data is None:
+        deforestation_data = pd.read_excel(deforestation_data_path, sheet_name='Country tree cover loss')
+
+    if entity_table is None:
+        entity_table = entities.read_entities(entities_path)
+
+    # the countries of the forest regions, by entity id
+    co2_ids = entities.entity_ids(co2_data['Entity'], entity_table)
+    in_region = entities.region_ids(co2_ids, entity_table) != entities.NO_REGION
+    co2_data_filtered = co2_data.assign(entity_id=co2_ids)[(co2_data['Year'] >= 2001) & (co2_data['Year'] <= 2023) & in_region]
 
     deforestation_long = deforestation_data.melt(id_vars=['country', 'threshold', 'area_ha', 'extent_2000_ha', 'extent_2010_ha', 'gain_2000-2020_ha'],
                                                   value_vars=[f'tc_loss_ha_{year}' for year in range(2001, 2024)],
@@ -16,12 +26,13 @@ def preprocess_and_merge_datasets(co2_data_path, deforestation_data_path):
 
     deforestation_agg = deforestation_long.groupby(['country', 'year']).agg({'tree_cover_loss': 'sum'}).reset_index()
 
-    deforestation_agg['region'] = deforestation_agg['country'].map(country_to_region)
+    deforestation_agg['entity_id'] = entities.entity_ids(deforestation_agg['country'], entity_table)
+    deforestation_agg['region'] = entities.region_names(deforestation_agg['entity_id'], entity_table)
 
     final_dataset = pd.merge(deforestation_agg,
                              co2_data_filtered,
-                             left_on=['country', 'year'],
-                             right_on=['Entity', 'Year'],
+                             left_on=['entity_id', 'year'],
+                             right_on=['entity_id', 'Year'],
                              how='inner')
 
     final_dataset = final_dataset[['year', 'country', 'region', 'tree_cover_loss', 'Annual CO₂ emissions']]
@@ -29,16 +40,9 @@ def preprocess_and_merge_datasets(co2_data_path, deforestation_data_path):
 
     return final_dataset
 
-congo_basin_countries = ['Cameroon', 'Central African Republic', 'Democratic Republic of the Congo', 'Republic of the Congo', 'Equatorial Guinea', 'Gabon']
-amazon_countries = ['Brazil', 'Peru', 'Colombia', 'Venezuela', 'Ecuador', 'Bolivia', 'Guyana', 'Suriname', 'French Guiana']
-southeast_asia_countries = ['Indonesia', 'Malaysia', 'Thailand', 'Philippines']
-
-country_to_region = {country: 'Congo Basin' for country in congo_basin_countries}
-country_to_region.update({country: 'Amazon' for country in amazon_countries})
-country_to_region.update({country: 'Southeast Asia' for country in southeast_asia_countries})
-
-criticalco2 = preprocess_and_merge_datasets('annual-co2-emissions-per-country.csv', 'global.xlsx')
+if __name__ == '__main__':
+    criticalco2 = preprocess_and_merge_datasets('annual-co2-emissions-per-country.csv', 'global.xlsx')
 
-criticalco2.head()
+    criticalco2.head()
 
-criticalco2.to_csv('deforestation-co2-dataset.csv', index=False)
+    criticalco2.to_csv('deforestation-co2-dataset.csv', index=False)
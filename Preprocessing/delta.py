@@ -0,0 +1,247 @@
+
+####Delta Refresh####
+
+# Applies a new release of the raw emissions file (a new reporting year, or revised
+# values) without rebuilding the outputs from scratch. The emissions file the outputs were
+# last built from is kept as a snapshot next to the pipeline manifest; the new file is
+# diffed against it to find the (Entity, Year) rows that were added, removed or revised,
+# and the stages below recompute only the aggregates those rows feed (the yearly global
+# sums of co2temp, the country-year series of paris_agreement, the event rows and
+# country-year tables of weather) and patch them into the stored outputs. Outputs whose
+# content does not change are not rewritten, so their dataset versions (content hashes)
+# stay the same and the app keeps its cached frames and figures for them.
+#
+# A stage is patched only when its other inputs, its script and the schema are unchanged
+# and its outputs are the ones built from the snapshot; everything else (other stages,
+# a changed temperature or disaster file, a missing snapshot) goes through the normal
+# pipeline run.
+#
+# usage: python Preprocessing/delta.py [--raw-dir DIR] [--out-dir DIR] [--jobs N] [stage ...]
+
+import argparse
+import io
+import os
+import shutil
+import time
+
+import pandas as pd
+
+import excel_cache
+import pipeline
+from pipeline import EMISSIONS, ENTITIES, STAGES
+
+SNAPSHOT_NAME = '.emissions-snapshot.csv'
+KEYS = ['Entity', 'Year']
+INTEGER_KEYS = {'Year', 'Month', 'year'}
+
+
+def changed_keys(old, new):
+    # (Entity, Year) of the rows added, removed or revised between two emissions frames
+    merged = old.merge(new, on=KEYS, how='outer', suffixes=('_old', '_new'), indicator=True)
+    changed = merged['_merge'] != 'both'
+    for column in [c for c in new.columns if c not in KEYS]:
+        before, after = merged[f'{column}_old'], merged[f'{column}_new']
+        changed |= ~((before == after) | (before.isna() & after.isna()))
+    return merged.loc[changed, KEYS].drop_duplicates().reset_index(drop=True)
+
+
+def key_mask(frame, keys, columns=KEYS):
+    # rows of `frame` whose `columns` match one of the (Entity, Year) keys
+    if not len(keys):
+        return pd.Series(False, index=frame.index)
+    index = pd.MultiIndex.from_frame(frame[columns].astype({columns[1]: 'int64'}), names=KEYS)
+    return pd.Series(index.isin(pd.MultiIndex.from_frame(keys)), index=frame.index)
+
+
+def read_output(out_dir, output):
+    # outputs are patched as text, so the rows that are kept are written back byte for byte
+    return pd.read_csv(os.path.join(out_dir, output), dtype=str, keep_default_na=False)
+
+
+def as_text(frame):
+    # recomputed rows exactly as a full build would have written them
+    return pd.read_csv(io.StringIO(frame.to_csv(index=False)), dtype=str, keep_default_na=False)
+
+
+def _sort_key(column):
+    # the integer key columns sort numerically (month 10 after month 9)
+    return column.astype('int64') if column.name in INTEGER_KEYS else column
+
+
+def replace_rows(old, fresh, stale, order):
+    # old rows minus the stale ones, plus the recomputed ones, in the build's sort order
+    patched = pd.concat([old[~stale], as_text(fresh)[old.columns]], ignore_index=True)
+    return patched.sort_values(by=order, key=_sort_key, kind='stable').reset_index(drop=True)
+
+
+def _patch_co2temp(module, raw, emissions, changes, out_dir):
+    # every global sum of a year with a changed row, merged with that year's temperatures
+    years = changes['Year'].unique()
+    rows = emissions[emissions['Year'].isin(years)]
+    fresh = {
+        'co2temp.csv': (module.load_data(temperature_path=raw['GLB.Ts+dSST.csv'], co2_data=rows), ['Year']),
+        'co2temp-monthly.csv': (module.load_monthly_data(temperature_path=raw['GLB.Ts+dSST.csv'], co2_data=rows),
+                                ['Year', 'Month']),
+    }
+    patched = {}
+    for output, (frame, order) in fresh.items():
+        old = read_output(out_dir, output)
+        patched[output] = (old, replace_rows(old, frame, old['Year'].astype('int64').isin(years), order))
+    return patched
+
+
+def _patch_paris(module, raw, emissions, changes, out_dir):
+    fresh = module.preprocess_paris_agreement_data(raw[EMISSIONS], df=emissions[key_mask(emissions, changes)],
+                                                   entities_path=raw[ENTITIES])
+    old = read_output(out_dir, 'paris_agreement.csv')
+    return {'paris_agreement.csv': (old, replace_rows(old, fresh, key_mask(old, changes), KEYS))}
+
+
+def _patch_weather(module, raw, emissions, changes, out_dir):
+    # the event rows are an inner join of the disasters with the emissions on (Code, Year),
+    # so the rows of the changed keys are the join with just the changed emissions rows
+    disasters = excel_cache.read_excel(raw['Natural Disasters 2000 - 2023.xlsx'],
+                                       usecols=['Disaster Subgroup', 'Disaster Type', 'Code', 'Start Year'])
+    fresh = module.load_and_process_data(raw['Natural Disasters 2000 - 2023.xlsx'], raw[EMISSIONS],
+                                         co2_emissions_data=emissions[key_mask(emissions, changes)],
+                                         natural_disasters_data=disasters, entities_path=raw[ENTITIES])
+    columns = ['country', 'year']
+
+    old = read_output(out_dir, 'weather-co2.csv')
+    stale = key_mask(old, changes, columns)
+    before = old[stale].sort_values(by=columns, key=_sort_key, kind='stable')
+    fresh_rows = as_text(fresh)
+    after = fresh_rows.sort_values(by=columns, key=_sort_key, kind='stable')
+    if len(before) == len(after) and (before[['year', 'country', 'natural disaster']].to_numpy()
+                                      == after[['year', 'country', 'natural disaster']].to_numpy()).all():
+        # only emissions values were revised: updated in place, keeping the file's row order
+        weatherco2 = old.copy()
+        weatherco2.loc[before.index, 'co2 emissions'] = after['co2 emissions'].to_numpy()
+    else:
+        # events gained or lost a match: their rows move to the end of the file, which no
+        # reader depends on (the tables below are sorted)
+        weatherco2 = pd.concat([old[~stale], fresh_rows[old.columns]], ignore_index=True)
+
+    fresh_counts, fresh_emissions = module.summarize_events(fresh)
+    event_counts = read_output(out_dir, 'weather-event-counts.csv')
+    country_emissions = read_output(out_dir, 'weather-emissions.csv')
+    return {
+        'weather-co2.csv': (old, weatherco2),
+        'weather-event-counts.csv': (event_counts, replace_rows(event_counts, fresh_counts,
+                                                                key_mask(event_counts, changes, columns),
+                                                                columns + ['natural disaster'])),
+        'weather-emissions.csv': (country_emissions, replace_rows(country_emissions, fresh_emissions,
+                                                                  key_mask(country_emissions, changes, columns), columns)),
+    }
+
+
+# stage -> patch(module, raw paths, new emissions, changed keys, out_dir) -> {output: (old, patched)}
+PATCHES = {
+    'co2temp': _patch_co2temp,
+    'paris_agreement': _patch_paris,
+    'weather': _patch_weather,
+}
+
+
+def snapshot_path(out_dir):
+    return os.path.join(out_dir, SNAPSHOT_NAME)
+
+
+def save_snapshot(raw_dir, out_dir):
+    path = snapshot_path(out_dir)
+    shutil.copyfile(os.path.join(raw_dir, EMISSIONS), path + '.tmp')
+    os.replace(path + '.tmp', path)
+
+
+def patchable(name, raw_dir, out_dir, manifest, snapshot_hash, hashes):
+    # the stage's outputs were built from the snapshot and nothing else it depends on changed
+    if snapshot_hash is None or manifest.get(name) is None:
+        return False
+    fingerprint = pipeline.stage_fingerprint(STAGES[name], raw_dir, out_dir, hashes)
+    built_from = dict(fingerprint, inputs={**fingerprint['inputs'], EMISSIONS: snapshot_hash})
+    return not pipeline.is_stale(manifest[name], built_from, out_dir)
+
+
+def patch_stage(name, raw_dir, out_dir, emissions, changes):
+    # writes the outputs the changes actually alter; returns their names
+    stage = STAGES[name]
+    patched = PATCHES[name](pipeline.load_script(stage['script']), pipeline.raw_paths(name, raw_dir, out_dir),
+                            emissions, changes, out_dir)
+    written = []
+    for output, (old, frame) in patched.items():
+        if not frame.equals(old):
+            pipeline.write_output(frame, os.path.join(out_dir, output))
+            written.append(output)
+    return written
+
+
+def refresh(stage_names=None, raw_dir=pipeline.RAW_DIR, out_dir=pipeline.OUT_DIR, jobs=None):
+    stage_names = stage_names or list(STAGES)
+    start = time.perf_counter()
+    manifest = pipeline.load_manifest(out_dir)
+    hashes = {}
+    snapshot_hash = pipeline.file_hash(snapshot_path(out_dir)) if os.path.exists(snapshot_path(out_dir)) else None
+    emissions_path = os.path.join(raw_dir, EMISSIONS)
+
+    # stages whose outputs the patched stages read (the entity table) are brought up to date
+    # first, so the patched stages see them as unchanged inputs
+    results = {}
+    upstream = [name for name in stage_names if name not in PATCHES
+                and any(output in STAGES[other]['inputs'] for output in STAGES[name]['outputs']
+                        for other in stage_names if other in PATCHES)]
+    if upstream:
+        results.update(pipeline.run(upstream, raw_dir=raw_dir, out_dir=out_dir, jobs=jobs))
+
+    to_patch = []
+    for name in stage_names:
+        if name not in PATCHES or not all(os.path.exists(path) for path in pipeline.raw_paths(name, raw_dir, out_dir).values()):
+            continue
+        fingerprint = pipeline.stage_fingerprint(STAGES[name], raw_dir, out_dir, hashes)
+        if (pipeline.is_stale(manifest.get(name), fingerprint, out_dir)
+                and patchable(name, raw_dir, out_dir, manifest, snapshot_hash, hashes)):
+            to_patch.append(name)
+
+    if to_patch:
+        emissions = pipeline.read_emissions(emissions_path)
+        changes = changed_keys(pipeline.read_emissions(snapshot_path(out_dir)), emissions)
+        print(f'{EMISSIONS}: {len(changes)} (Entity, Year) rows added, removed or revised')
+        for name in to_patch:
+            stage_start = time.perf_counter()
+            written = patch_stage(name, raw_dir, out_dir, emissions, changes)
+            record = pipeline.stage_fingerprint(STAGES[name], raw_dir, out_dir, hashes)
+            record['outputs'] = {output: pipeline.file_hash(os.path.join(out_dir, output))
+                                 for output in manifest[name]['outputs']}
+            manifest[name] = record
+            pipeline.save_manifest(out_dir, manifest)
+            print(f'{name}: patched {", ".join(written) or "nothing (no output changed)"} '
+                  f'in {time.perf_counter() - stage_start:.2f}s')
+            results[name] = 'patched'
+
+    # every other stage is rebuilt (or found up to date) by the normal pipeline
+    rest = [name for name in stage_names if name not in results]
+    if rest:
+        results.update(pipeline.run(rest, raw_dir=raw_dir, out_dir=out_dir, jobs=jobs))
+
+    if os.path.exists(emissions_path):
+        save_snapshot(raw_dir, out_dir)
+    print(f'delta refresh done in {time.perf_counter() - start:.2f}s')
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Patch the processed datasets in data/ for new or revised emissions rows.')
+    parser.add_argument('stages', nargs='*', help=f'stages to refresh (default: all of {", ".join(STAGES)})')
+    parser.add_argument('--raw-dir', default=pipeline.RAW_DIR)
+    parser.add_argument('--out-dir', default=pipeline.OUT_DIR)
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes for the stages that are rebuilt')
+    args = parser.parse_args()
+    unknown = [s for s in args.stages if s not in STAGES]
+    if unknown:
+        parser.error(f'unknown stages: {", ".join(unknown)}')
+    if args.jobs is not None and args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+    refresh(args.stages, raw_dir=args.raw_dir, out_dir=args.out_dir, jobs=args.jobs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+
+####Entity Dimension####
+
+# Every entity the datasets refer to, once, with a small integer id: its ISO code, its
+# canonical name (as the emissions inventory spells it), the other spellings other sources
+# use, its kind (a country, an aggregate such as 'World' or an income group, or one of the
+# forest regions) and the forest region it belongs to. The preprocessing scripts map the
+# names and codes of their inputs to ids once and then filter and join on the ids.
+#
+# Ids follow the sorted canonical names of the emissions entities (then the region members
+# the inventory does not list, then the regions), so grouping by id gives the rows in the
+# same order as grouping by name.
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from entity_index import ALIAS_SEPARATOR, name_lookup  # noqa: E402
+
+ENTITIES = 'entities.csv'
+COLUMNS = ['entity_id', 'code', 'name', 'aliases', 'kind', 'region_id']
+NO_REGION = -1
+
+# inventory rows that are not countries; only the names listed here are aggregates
+AGGREGATES = ['World', 'Africa', 'Asia', 'Europe', 'North America', 'South America', 'Oceania',
+    'European Union (27)', 'European Union (28)', 'High-income countries', 'Low-income countries',
+    'Lower-middle-income countries', 'Upper-middle-income countries', 'International aviation', 'International shipping',
+    'Asia (GCP)', 'Europe (GCP)', 'North America (GCP)', 'South America (GCP)', 'Oceania (GCP)', 'Middle East (GCP)',
+    'Central America (GCP)', 'Non-OECD (GCP)', 'OECD (GCP)', 'Africa (GCP)', 'Asia (excl. China and India)',
+    'Europe (excl. EU-27)', 'Europe (excl. EU-28)', 'North America (excl. USA)',
+    # historical entries without an ISO code
+    'Kuwaiti Oil Fires (GCP)', 'Leeward Islands (GCP)', 'Panama Canal Zone (GCP)', 'Ryukyu Islands (GCP)',
+    'St. Kitts-Nevis-Anguilla (GCP)']
+
+# region members by their inventory names; the forest data's spellings are aliases below
+REGIONS = {
+    'Congo Basin': ['Cameroon', 'Central African Republic', 'Democratic Republic of Congo', 'Congo',
+                    'Equatorial Guinea', 'Gabon'],
+    'Amazon': ['Brazil', 'Peru', 'Colombia', 'Venezuela', 'Ecuador', 'Bolivia', 'Guyana', 'Suriname', 'French Guiana'],
+    'Southeast Asia': ['Indonesia', 'Malaysia', 'Thailand', 'Philippines'],
+}
+
+# canonical name -> spellings used by other sources (World Bank indicators, the forest data)
+ALIASES = {
+    'Congo': ['Republic of the Congo'],
+    'Democratic Republic of Congo': ['Democratic Republic of the Congo'],
+    'Iran': ['Iran, Islamic Rep.'],
+    'Russia': ['Russian Federation'],
+    'South Korea': ['Korea, Rep.'],
+}
+
+
+def region_members():
+    return [country for members in REGIONS.values() for country in members]
+
+
+def build_entities(emissions):
+    # emissions: the inventory (only 'Entity' and 'Code' are read)
+    codes = emissions[['Entity', 'Code']].drop_duplicates(subset='Entity').set_index('Entity')['Code']
+    inventory = sorted(codes.index)
+    extra_members = sorted(set(region_members()) - set(inventory))
+    names = inventory + extra_members + list(REGIONS)
+
+    table = pd.DataFrame({'entity_id': np.arange(len(names), dtype=np.int64), 'name': names})
+    table['code'] = table['name'].map(codes)
+    table['aliases'] = table['name'].map(lambda name: ALIAS_SEPARATOR.join(ALIASES.get(name, [])))
+
+    aggregate = pd.Index(inventory).isin(AGGREGATES)
+    table['kind'] = np.r_[np.where(aggregate, 'aggregate', 'country'),
+                          ['country'] * len(extra_members), ['region'] * len(REGIONS)]
+
+    region_ids = dict(zip(REGIONS, range(len(inventory) + len(extra_members), len(names))))
+    membership = {country: region_ids[region] for region, members in REGIONS.items() for country in members}
+    table['region_id'] = table['name'].map(membership).fillna(NO_REGION).astype(np.int64)
+    return table[COLUMNS]
+
+
+def read_entities(path=ENTITIES):
+    return pd.read_csv(path, dtype={'code': object, 'aliases': object}, keep_default_na=False, na_values={'code': ['']})
+
+
+def entity_ids(names, table):
+    # ids of the given names or aliases, -1 where a name is not in the table
+    lookup = name_lookup(table)
+    positions = lookup.index.get_indexer(pd.Index(names))
+    return np.where(positions >= 0, lookup.to_numpy()[positions], -1)
+
+
+def code_ids(codes, table):
+    # ids of the given ISO codes, -1 where a code is not in the table
+    coded = table[table['code'].notna()]
+    positions = pd.Index(coded['code']).get_indexer(pd.Index(codes))
+    return np.where(positions >= 0, coded['entity_id'].to_numpy()[positions], -1)
+
+
+def ids_of_kind(table, kind):
+    return table.loc[table['kind'] == kind, 'entity_id'].to_numpy()
+
+
+def canonical_names(ids, table):
+    return table['name'].to_numpy()[ids]
+
+
+def region_ids(ids, table):
+    # id of the region each id belongs to, NO_REGION where it belongs to none (or is -1)
+    ids = np.asarray(ids)
+    return np.where(ids >= 0, table['region_id'].to_numpy()[ids], NO_REGION)
+
+
+def region_names(ids, table):
+    # name of the region each id belongs to, None where it belongs to none
+    region_id = region_ids(ids, table)
+    return np.where(region_id != NO_REGION, table['name'].to_numpy()[region_id], None)
+
+
+if __name__ == '__main__':
+    entities = build_entities(pd.read_csv('annual-co2-emissions-per-country.csv', usecols=['Entity', 'Code']))
+
+    entities.head()
+
+    entities.to_csv(ENTITIES, index=False)
@@ -0,0 +1,133 @@
+
+####Excel Sheet Cache####
+
+# pd.read_excel is by far the slowest parse in the pipeline. The first read of a sheet
+# converts it to an uncompressed Arrow IPC file named after the workbook, the sheet and
+# the workbook's content hash; later reads of the unchanged workbook map that file and
+# only materialize the requested columns, without opening the workbook at all.
+
+import hashlib
+import json
+import os
+import re
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = feather = None
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(ROOT_DIR, 'data', '.excel-cache')
+COLUMNS_KEY = b'excel_cache.columns'
+
+_hashes = {}
+
+
+def content_hash(path):
+    # memoized on (mtime, size) so a workbook is hashed once per process
+    stat = os.stat(path)
+    signature = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if signature not in _hashes:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as handle:
+            for block in iter(lambda: handle.read(1 << 20), b''):
+                digest.update(block)
+        _hashes[signature] = digest.hexdigest()
+    return _hashes[signature]
+
+
+def _slug(text):
+    return re.sub(r'[^A-Za-z0-9]+', '-', str(text)).strip('-').lower()
+
+
+def cache_prefix(path, sheet_name, cache_dir):
+    location = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:8]
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f'{_slug(stem)}-{_slug(sheet_name)}-{location}-')
+
+
+def _encode_columns(columns):
+    # Arrow only has string column names; the header cell types are restored on read
+    encoded = []
+    for column in columns:
+        if isinstance(column, bool) or not isinstance(column, (str, int, float)):
+            return None
+        encoded.append([type(column).__name__, column])
+    if len({str(column) for column in columns}) != len(encoded):
+        return None
+    return encoded
+
+
+def _decode_column(kind, value):
+    return {'int': int, 'float': float, 'str': str}[kind](value)
+
+
+def _write(frame, prefix, target):
+    encoded = _encode_columns(frame.columns)
+    if encoded is None:
+        return False
+    try:
+        table = pa.Table.from_pandas(frame.set_axis([str(c) for c in frame.columns], axis=1), preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # mixed-type object columns have no Arrow type; such a sheet is just not cached
+        return False
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), COLUMNS_KEY: json.dumps(encoded).encode()})
+
+    # superseded versions of the same sheet are dropped
+    for name in os.listdir(os.path.dirname(target)):
+        stale = os.path.join(os.path.dirname(target), name)
+        if stale.startswith(prefix) and stale != target and not stale.endswith('.tmp'):
+            os.remove(stale)
+
+    feather.write_feather(table, target + '.tmp', compression='uncompressed')
+    os.replace(target + '.tmp', target)
+    return True
+
+
+def _read(target, usecols):
+    table = feather.read_table(target, memory_map=True)
+    names = {str(value): _decode_column(kind, value)
+             for kind, value in json.loads(table.schema.metadata[COLUMNS_KEY])}
+    if usecols is not None:
+        table = table.select([str(c) for c in usecols])
+    frame = table.to_pandas()
+    return frame.set_axis([names[c] for c in frame.columns], axis=1)
+
+
+def _convert(path, sheet_name, cache_dir):
+    # (cache file, None), or (None, the parsed sheet) when the sheet cannot be cached
+    prefix = cache_prefix(path, sheet_name, cache_dir)
+    target = prefix + content_hash(path)[:16] + '.feather'
+    if not os.path.exists(target):
+        os.makedirs(cache_dir, exist_ok=True)
+        frame = pd.read_excel(path, sheet_name=sheet_name)
+        if not _write(frame, prefix, target):
+            return None, frame
+    return target, None
+
+
+def read_excel(path, sheet_name=0, usecols=None, cache_dir=None):
+    cache_dir = cache_dir or CACHE_DIR
+    if feather is None:
+        frame = pd.read_excel(path, sheet_name=sheet_name)
+        return frame if usecols is None else frame[list(usecols)]
+
+    target, frame = _convert(path, sheet_name, cache_dir)
+    if target is None:
+        return frame if usecols is None else frame[list(usecols)]
+    return _read(target, usecols)
+
+
+def read_table(path, sheet_name=0, usecols=None, cache_dir=None):
+    # the cached sheet as a memory-mapped Arrow table (column names as strings), for readers
+    # that scan Arrow directly; None when there is no cached copy
+    if feather is None:
+        return None
+    target, _ = _convert(path, sheet_name, cache_dir or CACHE_DIR)
+    if target is None:
+        return None
+    table = feather.read_table(target, memory_map=True)
+    return table if usecols is None else table.select([str(c) for c in usecols])
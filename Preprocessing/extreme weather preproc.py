@@ -1,8 +1,15 @@
 import pandas as pd
 
-def load_and_process_data(natural_disasters_path, co2_emissions_path):
-  natural_disasters_data = pd.read_excel(natural_disasters_path)
-  co2_emissions_data = pd.read_csv(co2_emissions_path)
+import entities
+
+def load_and_process_data(natural_disasters_path, co2_emissions_path, co2_emissions_data=None, natural_disasters_data=None,
+                          entities_path=entities.ENTITIES, entity_table=None):
+  if natural_disasters_data is None:
+    natural_disasters_data = pd.read_excel(natural_disasters_path)
+  if co2_emissions_data is None:
+    co2_emissions_data = pd.read_csv(co2_emissions_path)
+  if entity_table is None:
+    entity_table = entities.read_entities(entities_path)
 
     
   natural_disasters_filtered = natural_disasters_data[natural_disasters_data['Disaster Subgroup'] != 'Biological']
@@ -14,12 +21,17 @@ def load_and_process_data(natural_disasters_path, co2_emissions_path):
   co2_emissions_filtered = co2_emissions_data[co2_emissions_data['Year'].between(2000, 2023)]
 
     
-  common_codes = set(natural_disasters_filtered['Code']).intersection(set(co2_emissions_filtered['Code']))
-  natural_disasters_final = natural_disasters_filtered[natural_disasters_filtered['Code'].isin(common_codes)]
-  co2_emissions_final = co2_emissions_filtered[co2_emissions_filtered['Code'].isin(common_codes)]
+  # disasters are keyed by ISO code and the inventory by name: both are joined on entity ids
+  disaster_ids = entities.code_ids(natural_disasters_filtered['Code'], entity_table)
+  natural_disasters_final = natural_disasters_filtered[disaster_ids >= 0].assign(entity_id=disaster_ids[disaster_ids >= 0])
+  co2_emissions_final = co2_emissions_filtered.assign(entity_id=entities.entity_ids(co2_emissions_filtered['Entity'], entity_table))
 
     
-  merged_data = pd.merge(natural_disasters_final, co2_emissions_final, left_on=['Code', 'Start Year'], right_on=['Code', 'Year'])
+  merged_data = pd.merge(natural_disasters_final, co2_emissions_final, left_on=['entity_id', 'Start Year'], right_on=['entity_id', 'Year'])
+  # the rows of each (country, year) together, in the order the keys first appear among the
+  # disasters, as the merge on the ISO code strings wrote them (integer keys keep the row order)
+  key_order = merged_data.groupby(['entity_id', 'Start Year'], sort=False).ngroup().to_numpy()
+  merged_data = merged_data.iloc[key_order.argsort(kind='stable')]
 
     
   final_df = merged_data[['Start Year', 'Entity', 'Disaster Type', 'Annual CO₂ emissions']]
@@ -28,8 +40,22 @@ def load_and_process_data(natural_disasters_path, co2_emissions_path):
   return final_df
 
 
-weatherco2 = load_and_process_data('Natural Disasters 2000 - 2023.xlsx', 'annual-co2-emissions-per-country.csv')
+def summarize_events(weatherco2):
+  # sparse form of the (country, year, disaster type) event-count cube
+  event_counts = weatherco2.groupby(['country', 'year', 'natural disaster']).size().reset_index(name='events')
+
+  # each country-year emission once, instead of once per event
+  country_emissions = weatherco2.groupby(['country', 'year'])['co2 emissions'].first().reset_index()
+
+  return event_counts, country_emissions
+
+
+if __name__ == '__main__':
+  weatherco2 = load_and_process_data('Natural Disasters 2000 - 2023.xlsx', 'annual-co2-emissions-per-country.csv')
+  event_counts, country_emissions = summarize_events(weatherco2)
 
-weatherco2.head()
+  weatherco2.head()
 
-weatherco2.to_csv('weatherco2.csv', index=False)
+  weatherco2.to_csv('weatherco2.csv', index=False)
+  event_counts.to_csv('weather-event-counts.csv', index=False)
+  country_emissions.to_csv('weather-emissions.csv', index=False)
@@ -0,0 +1,189 @@
+
+####Streaming Emissions Ingestion####
+
+# Reads the raw emissions CSV in fixed-size chunks and hands every chunk to a set of
+# consumers in a single pass. Each consumer applies its stage's year / entity filters
+# and column projection to the chunk before keeping anything, and aggregates as it
+# goes, so memory stays bounded by the outputs rather than by the size of the input.
+
+import numpy as np
+import pandas as pd
+
+VALUE = 'Annual CO₂ emissions'
+COLUMNS = ['Entity', 'Code', 'Year', VALUE]
+DTYPES = {'Entity': object, 'Code': object, 'Year': 'int64', VALUE: 'float64'}
+DEFAULT_CHUNKSIZE = 100_000
+
+
+class EmissionsFilter:
+
+    def __init__(self, first_year=None, last_year=None, years=None, entities=None, exclude_entities=None,
+                 require_code=False, columns=COLUMNS):
+        self.first_year = first_year
+        self.last_year = last_year
+        self.years = None if years is None else sorted(set(years))
+        self.entities = None if entities is None else list(entities)
+        self.exclude_entities = None if exclude_entities is None else list(exclude_entities)
+        self.require_code = require_code
+        self.columns = list(columns)
+
+    @property
+    def source_columns(self):
+        # output columns plus whatever the filters look at
+        needed = set(self.columns) | {'Year'}
+        if self.entities is not None or self.exclude_entities is not None:
+            needed.add('Entity')
+        if self.require_code:
+            needed.add('Code')
+        return needed
+
+    def year_mask(self, chunk):
+        mask = pd.Series(True, index=chunk.index)
+        if self.first_year is not None:
+            mask &= chunk['Year'] >= self.first_year
+        if self.last_year is not None:
+            mask &= chunk['Year'] <= self.last_year
+        if self.years is not None:
+            mask &= chunk['Year'].isin(self.years)
+        return mask
+
+    def apply(self, chunk):
+        mask = self.year_mask(chunk)
+        if self.entities is not None:
+            mask &= chunk['Entity'].isin(self.entities)
+        if self.exclude_entities is not None:
+            mask &= ~chunk['Entity'].isin(self.exclude_entities)
+        if self.require_code:
+            mask &= chunk['Code'].notna()
+        return chunk.loc[mask, self.columns]
+
+
+class CollectRows:
+
+    # keeps the filtered rows, in file order
+
+    def __init__(self, row_filter):
+        self.filter = row_filter
+        self.columns = row_filter.columns
+        self.source_columns = row_filter.source_columns
+        self._parts = []
+
+    def feed(self, chunk):
+        part = self.filter.apply(chunk)
+        if len(part):
+            self._parts.append(part)
+
+    def result(self):
+        if not self._parts:
+            return pd.DataFrame({column: pd.Series(dtype=DTYPES[column]) for column in self.columns})
+        return pd.concat(self._parts, ignore_index=True)
+
+
+class DistinctRows(CollectRows):
+
+    # the first filtered row of every distinct key, in file order
+
+    def __init__(self, row_filter, keys):
+        super().__init__(row_filter)
+        self.keys = list(keys)
+
+    def feed(self, chunk):
+        part = self.filter.apply(chunk).drop_duplicates(subset=self.keys)
+        if len(part):
+            self._parts.append(part)
+
+    def result(self):
+        return super().result().drop_duplicates(subset=self.keys).reset_index(drop=True)
+
+
+class GroupedSum(CollectRows):
+
+    # running per-key totals of the emissions column; holds one row per output key. The
+    # totals use the same compensated (Kahan) summation as a pandas groupby sum, fed the
+    # rows in file order, so the result matches summing the whole file at once.
+
+    def __init__(self, row_filter, keys, check_missing=False):
+        super().__init__(row_filter)
+        self.keys = list(keys)
+        self.check_missing = check_missing
+        self._slots = {}
+        self._sums = np.zeros(0)
+        self._compensation = np.zeros(0)
+
+    def feed(self, chunk):
+        if self.check_missing and chunk.loc[self.filter.year_mask(chunk), VALUE].isnull().any():
+            raise ValueError("Missing values found in Annual CO₂ emissions data.")
+        part = self.filter.apply(chunk)
+        if not len(part):
+            return
+
+        grouped = part.groupby(self.keys, sort=False)
+        first_seen = part[self.keys].drop_duplicates().itertuples(index=False, name=None)
+        group_slots = np.array([self._slots.setdefault(key, len(self._slots)) for key in first_seen])
+        if len(self._slots) > len(self._sums):
+            grow = len(self._slots) - len(self._sums)
+            self._sums = np.r_[self._sums, np.zeros(grow)]
+            self._compensation = np.r_[self._compensation, np.zeros(grow)]
+
+        # the n-th row of every key is added in the same step, so each step touches a
+        # slot at most once and can be vectorized across keys
+        slots = group_slots[grouped.ngroup().to_numpy()]
+        rank = grouped.cumcount().to_numpy()
+        values = part[VALUE].to_numpy(dtype=np.float64)
+        order = np.argsort(rank, kind='stable')
+        steps = np.split(order, np.flatnonzero(np.diff(rank[order])) + 1)
+        for rows in steps:
+            rows = rows[~np.isnan(values[rows])]
+            slot = slots[rows]
+            y = values[rows] - self._compensation[slot]
+            t = self._sums[slot] + y
+            self._compensation[slot] = (t - self._sums[slot]) - y
+            self._sums[slot] = t
+
+    def result(self):
+        totals = pd.DataFrame(list(self._slots), columns=self.keys)
+        if not len(totals):
+            return super().result()[self.keys + [VALUE]]
+        totals[VALUE] = self._sums
+        return totals.sort_values(by=self.keys, kind='stable').reset_index(drop=True)
+
+
+class LatestYearRows(CollectRows):
+
+    # filtered rows of the latest year in the whole file; earlier years are dropped as
+    # soon as a later one shows up
+
+    def __init__(self, row_filter):
+        super().__init__(row_filter)
+        self.year = None
+
+    def feed(self, chunk):
+        if not len(chunk):
+            return
+        year = int(chunk['Year'].max())
+        if self.year is None or year > self.year:
+            self.year = year
+            self._parts = []
+        elif year < self.year:
+            return
+        part = self.filter.apply(chunk[chunk['Year'] == self.year])
+        if len(part):
+            self._parts.append(part)
+
+
+def iter_emissions(path, columns=COLUMNS, chunksize=DEFAULT_CHUNKSIZE):
+    columns = [column for column in COLUMNS if column in columns]
+    reader = pd.read_csv(path, usecols=columns, dtype={column: DTYPES[column] for column in columns},
+                         chunksize=chunksize)
+    with reader:
+        yield from reader
+
+
+def stream_emissions(path, consumers, chunksize=DEFAULT_CHUNKSIZE):
+    # one read of the file, projected to the columns any consumer asked for
+    consumers = list(consumers)
+    columns = set().union(*(consumer.source_columns for consumer in consumers))
+    for chunk in iter_emissions(path, columns, chunksize):
+        for consumer in consumers:
+            consumer.feed(chunk)
+    return [consumer.result() for consumer in consumers]
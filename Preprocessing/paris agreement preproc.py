@@ -1,7 +1,13 @@
+import numpy as np
 import pandas as pd
 
-def preprocess_paris_agreement_data(data_path):
-  df = pd.read_csv(data_path)
+import entities
+
+def preprocess_paris_agreement_data(data_path, df=None, entities_path=entities.ENTITIES, entity_table=None):
+  if df is None:
+    df = pd.read_csv(data_path)
+  if entity_table is None:
+    entity_table = entities.read_entities(entities_path)
 
   df_filtered = df[df['Year'] >= 2017]
 
@@ -9,23 +15,20 @@ def preprocess_paris_agreement_data(data_path):
   if df_filtered['Annual CO₂ emissions'].isnull().any():
      raise ValueError("Missing values found in Annual CO₂ emissions data.")
 
-    
-  non_country_entities = ['World', 'Africa', 'Asia', 'Europe', 'North America', 'South America', 'Oceania',
-        'European Union (27)', 'European Union (28)', 'High-income countries', 'Low-income countries',
-        'Lower-middle-income countries', 'Upper-middle-income countries', 'International aviation', 'International shipping',
-        'Asia (GCP)', 'Europe (GCP)', 'North America (GCP)', 'South America (GCP)', 'Oceania (GCP)', 'Middle East (GCP)',
-        'Central America (GCP)', 'Non-OECD (GCP)', 'OECD (GCP)', 'Africa (GCP)', 'Asia (excl. China and India)',
-        'Europe (excl. EU-27)', 'Europe (excl. EU-28)', 'North America (excl. USA)']
-
-  df_filtered = df_filtered[~df_filtered['Entity'].isin(non_country_entities)]
+  # countries only, grouped on their integer ids (which sort like their names)
+  entity_id = entities.entity_ids(df_filtered['Entity'], entity_table)
+  countries = np.isin(entity_id, entities.ids_of_kind(entity_table, 'country'))
+  df_filtered = df_filtered[countries].assign(entity_id=entity_id[countries])
 
-  annual_co2_summary = df_filtered.groupby(['Entity', 'Year'])['Annual CO₂ emissions'].sum().reset_index()
+  annual_co2_summary = df_filtered.groupby(['entity_id', 'Year'])['Annual CO₂ emissions'].sum().reset_index()
+  annual_co2_summary.insert(0, 'Entity', entities.canonical_names(annual_co2_summary.pop('entity_id'), entity_table))
 
   return annual_co2_summary
 
 
-paris_agreement = preprocess_paris_agreement_data('annual-co2-emissions-per-country.csv')
+if __name__ == '__main__':
+  paris_agreement = preprocess_paris_agreement_data('annual-co2-emissions-per-country.csv')
 
-paris_agreement.head()
+  paris_agreement.head()
 
-paris_agreement.to_csv('paris_agreement.csv', index=False)
+  paris_agreement.to_csv('paris_agreement.csv', index=False)
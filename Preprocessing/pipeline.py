@@ -0,0 +1,511 @@
+
+####Preprocessing Pipeline Runner####
+
+# Runs every preprocessing script from one place. The raw emissions CSV is parsed a
+# single time and handed to each derivation, and every output records the hashes of
+# its inputs and its script so that only stale outputs are rebuilt. Next to every CSV
+# an uncompressed Arrow IPC (.feather) copy is written for the app to memory-map.
+# With --stream the emissions file is read in chunks instead, and each stage only keeps
+# the filtered / aggregated rows it needs (see ingest.py). Excel sheets are read through
+# a converted-once columnar cache (see excel_cache.py). Every output is checked against
+# its declared column types (schema.py) and the columnar copy is written typed.
+#
+# Stages declare their inputs and outputs; the stale ones run as a dependency graph on
+# a process pool (--jobs), so a full rebuild takes about as long as its slowest chain
+# rather than the sum of stages. The shared emissions parse is a node of its own that
+# runs in this process; the workers map the parsed frames from uncompressed Arrow files
+# written once, rather than each receiving a pickled copy.
+# The entity table (entities.py) is the first stage; the stages that filter or join on
+# countries read it as an input, so they are rebuilt when it changes.
+# A new release of the emissions file can instead be patched into the outputs row by row
+# with delta.py. With --sql the stages that have one are built by the optional DuckDB
+# backend (sql_backend.py) straight from the raw files instead of the pandas scripts.
+#
+# usage: python Preprocessing/pipeline.py [--raw-dir DIR] [--out-dir DIR] [--force] [--jobs N]
+#                                         [--stream [--chunksize N]] [--sql all|STAGE,...] [stage ...]
+
+import argparse
+import concurrent.futures
+import graphlib
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+import entities
+import excel_cache
+import ingest
+import sql_backend
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import schema  # noqa: E402
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+PREPROCESSING_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(PREPROCESSING_DIR)
+RAW_DIR = os.path.join(ROOT_DIR, 'data', 'Raw Data')
+OUT_DIR = os.path.join(ROOT_DIR, 'data')
+MANIFEST_NAME = '.pipeline-manifest.json'
+
+EMISSIONS = 'annual-co2-emissions-per-country.csv'
+ENTITIES = entities.ENTITIES
+EMISSIONS_DTYPES = ingest.DTYPES
+
+
+def read_emissions(path):
+    return pd.read_csv(path, dtype=EMISSIONS_DTYPES)
+
+
+def columnar_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.feather'
+
+
+def write_output(frame, path):
+    frame.to_csv(path, index=False)
+    written = [path]
+    # typed exactly as the app's CSV fallback would parse and type it; raises when the
+    # output does not fit its schema
+    typed = schema.apply(os.path.basename(path), pd.read_csv(path))
+    if feather is not None:
+        # uncompressed so readers can map the columns straight from the page cache
+        feather.write_feather(typed, columnar_path(path), compression='uncompressed')
+        written.append(columnar_path(path))
+    return written
+
+
+def _build_entities(module, raw, emissions):
+    return {ENTITIES: module.build_entities(emissions)}
+
+
+def _build_co2temp(module, raw, emissions):
+    return {
+        'co2temp.csv': module.load_data(temperature_path=raw['GLB.Ts+dSST.csv'], co2_data=emissions),
+        'co2temp-monthly.csv': module.load_monthly_data(temperature_path=raw['GLB.Ts+dSST.csv'], co2_data=emissions),
+    }
+
+
+def _build_projections(module, raw, emissions):
+    co2_path, temp_path = raw['world co2 projections.xlsx'], raw['world temp projection.xlsx']
+    return {'projected_impacts.csv': module.preprocess_and_sort_data(co2_path, temp_path,
+                                                                     co2_df=excel_cache.read_excel(co2_path),
+                                                                     temp_df=excel_cache.read_excel(temp_path))}
+
+
+def _build_co2gdp(module, raw, emissions):
+    return {'co2gdp.csv': module.load_and_preprocess_data(indicators_path=raw['Popular Indicators Data.csv'],
+                                                          co2_data=emissions, entities_path=raw[ENTITIES])}
+
+
+def _build_paris(module, raw, emissions):
+    return {'paris_agreement.csv': module.preprocess_paris_agreement_data(raw[EMISSIONS], df=emissions,
+                                                                          entities_path=raw[ENTITIES])}
+
+
+def _build_renewables(module, raw, emissions):
+    global_share, countries, country_emissions = module.load_data(renewables_path=raw['Global renewables energy share.csv'],
+                                                                  emissions=emissions, entities_path=raw[ENTITIES])
+    return {
+        'renewables-global.csv': global_share,
+        'renewables-countries.csv': countries,
+        'renewables-emissions.csv': country_emissions,
+    }
+
+
+def _build_deforestation(module, raw, emissions):
+    columns = ['country', 'threshold', 'area_ha', 'extent_2000_ha', 'extent_2010_ha', 'gain_2000-2020_ha']
+    columns += [f'tc_loss_ha_{year}' for year in range(2001, 2024)]
+    deforestation = excel_cache.read_excel(raw['global.xlsx'], sheet_name='Country tree cover loss', usecols=columns)
+    return {'deforestation-co2-dataset.csv': module.preprocess_and_merge_datasets(raw[EMISSIONS], raw['global.xlsx'],
+                                                                                  co2_data=emissions,
+                                                                                  deforestation_data=deforestation,
+                                                                                  entities_path=raw[ENTITIES])}
+
+
+def _build_weather(module, raw, emissions):
+    disasters = excel_cache.read_excel(raw['Natural Disasters 2000 - 2023.xlsx'],
+                                       usecols=['Disaster Subgroup', 'Disaster Type', 'Code', 'Start Year'])
+    weatherco2 = module.load_and_process_data(raw['Natural Disasters 2000 - 2023.xlsx'], raw[EMISSIONS],
+                                              co2_emissions_data=emissions, natural_disasters_data=disasters,
+                                              entities_path=raw[ENTITIES])
+    event_counts, country_emissions = module.summarize_events(weatherco2)
+    return {
+        'weather-co2.csv': weatherco2,
+        'weather-event-counts.csv': event_counts,
+        'weather-emissions.csv': country_emissions,
+    }
+
+
+# streaming consumers: the part of the emissions file each stage actually reads; the entity
+# filters use the curated lists the entity table is built from, the scripts then filter
+# on the table's ids
+
+def _stream_entities(module, raw):
+    return ingest.DistinctRows(ingest.EmissionsFilter(columns=['Entity', 'Code']), keys=['Entity'])
+
+
+def _stream_co2temp(module, raw):
+    return ingest.GroupedSum(ingest.EmissionsFilter(columns=['Year', ingest.VALUE]), keys=['Year'])
+
+
+def _stream_co2gdp(module, raw):
+    return ingest.LatestYearRows(ingest.EmissionsFilter(exclude_entities=['World'], require_code=True))
+
+
+def _stream_paris(module, raw):
+    row_filter = ingest.EmissionsFilter(first_year=2017, exclude_entities=entities.AGGREGATES,
+                                        columns=['Entity', 'Year', ingest.VALUE])
+    return ingest.GroupedSum(row_filter, keys=['Entity', 'Year'], check_missing=True)
+
+
+def _stream_renewables(module, raw):
+    years = pd.read_csv(raw['Global renewables energy share.csv'])['Year'].astype(int)
+    return ingest.CollectRows(ingest.EmissionsFilter(years=years, exclude_entities=entities.AGGREGATES))
+
+
+def _stream_deforestation(module, raw):
+    return ingest.CollectRows(ingest.EmissionsFilter(first_year=2001, last_year=2023, entities=entities.region_members()))
+
+
+def _stream_weather(module, raw):
+    return ingest.CollectRows(ingest.EmissionsFilter(first_year=2000, last_year=2023))
+
+
+STAGES = {
+    'entities': {
+        'script': 'entities.py',
+        'inputs': [EMISSIONS],
+        'outputs': [ENTITIES],
+        'build': _build_entities,
+        'stream': _stream_entities,
+    },
+    'co2temp': {
+        'script': 'CO2 emissions vs. temp preproc.py',
+        'inputs': [EMISSIONS, 'GLB.Ts+dSST.csv'],
+        'outputs': ['co2temp.csv', 'co2temp-monthly.csv'],
+        'build': _build_co2temp,
+        'stream': _stream_co2temp,
+        'sql': sql_backend.build_co2temp,
+    },
+    'projections': {
+        'script': 'CO2 vs. Temp Future Projections preproc.py',
+        'inputs': ['world co2 projections.xlsx', 'world temp projection.xlsx'],
+        'outputs': ['projected_impacts.csv'],
+        'build': _build_projections,
+    },
+    'co2gdp': {
+        'script': 'CO2 vs. gdp-pop preproc.py',
+        'inputs': [EMISSIONS, ENTITIES, 'Popular Indicators Data.csv'],
+        'outputs': ['co2gdp.csv'],
+        'build': _build_co2gdp,
+        'stream': _stream_co2gdp,
+    },
+    'paris_agreement': {
+        'script': 'paris agreement preproc.py',
+        'inputs': [EMISSIONS, ENTITIES],
+        'outputs': ['paris_agreement.csv'],
+        'build': _build_paris,
+        'stream': _stream_paris,
+        'sql': sql_backend.build_paris,
+    },
+    'renewables': {
+        'script': 'renewableE Invest preproc.py',
+        'inputs': [EMISSIONS, ENTITIES, 'Global renewables energy share.csv'],
+        'outputs': ['renewables-global.csv', 'renewables-countries.csv', 'renewables-emissions.csv'],
+        'build': _build_renewables,
+        'stream': _stream_renewables,
+    },
+    'deforestation': {
+        'script': 'deforestation preproc.py',
+        'inputs': [EMISSIONS, ENTITIES, 'global.xlsx'],
+        'outputs': ['deforestation-co2-dataset.csv'],
+        'build': _build_deforestation,
+        'stream': _stream_deforestation,
+        'sql': sql_backend.build_deforestation,
+    },
+    'weather': {
+        'script': 'extreme weather preproc.py',
+        'inputs': [EMISSIONS, ENTITIES, 'Natural Disasters 2000 - 2023.xlsx'],
+        'outputs': ['weather-co2.csv', 'weather-event-counts.csv', 'weather-emissions.csv'],
+        'build': _build_weather,
+        'stream': _stream_weather,
+        'sql': sql_backend.build_weather,
+    },
+}
+
+# files some stage writes; a stage listing one of them as an input reads it from the
+# output directory and runs after the stage that produces it
+PRODUCED = {output: name for name, stage in STAGES.items() for output in stage['outputs']}
+
+# stages the SQL backend can build; their outputs match the pandas build's to the last
+# bit of some values (see sql_backend.py), so the manifest records which backend built a
+# stage, and switching backends or editing sql_backend.py rebuilds it
+SQL_STAGES = [name for name, stage in STAGES.items() if 'sql' in stage]
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_script(script):
+    # the scripts have spaces in their names, so they are loaded by path
+    name = os.path.splitext(script)[0].replace(' ', '_').replace('.', '').replace('-', '_')
+    spec = importlib.util.spec_from_file_location(name, os.path.join(PREPROCESSING_DIR, script))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    with open(path + '.tmp', 'w') as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def input_path(name, raw_dir, out_dir):
+    return os.path.join(out_dir if name in PRODUCED else raw_dir, name)
+
+
+def raw_paths(name, raw_dir, out_dir=OUT_DIR):
+    return {i: input_path(i, raw_dir, out_dir) for i in STAGES[name]['inputs']}
+
+
+def stage_fingerprint(stage, raw_dir, out_dir, hashes, sql=False):
+    for name in stage['inputs']:
+        if name not in hashes:
+            hashes[name] = file_hash(input_path(name, raw_dir, out_dir))
+    return {
+        'inputs': {name: hashes[name] for name in stage['inputs']},
+        'code': file_hash(os.path.join(PREPROCESSING_DIR, stage['script'])),
+        'schema': file_hash(schema.__file__),
+        # None for the pandas scripts, as in manifests written before the SQL backend existed
+        'backend': {'name': 'sql', 'code': file_hash(sql_backend.__file__)} if sql else None,
+    }
+
+
+def is_stale(record, fingerprint, out_dir):
+    if record is None or any(record.get(key) != fingerprint[key] for key in ('inputs', 'code', 'schema', 'backend')):
+        return True
+    for output, digest in record['outputs'].items():
+        path = os.path.join(out_dir, output)
+        if not os.path.exists(path) or file_hash(path) != digest:
+            return True
+    return False
+
+
+def stage_graph(stage_names):
+    # stage -> the stages whose outputs it reads
+    return {name: {PRODUCED[i] for i in STAGES[name]['inputs'] if PRODUCED.get(i) in stage_names}
+            for name in stage_names}
+
+
+def load_emissions(stage_names, raw_dir, stream=False, chunksize=ingest.DEFAULT_CHUNKSIZE):
+    # the emissions frame each stage is built from: the whole file parsed once, or with
+    # stream=True only the rows / aggregates each stage keeps from one chunked pass
+    readers = [name for name in stage_names if EMISSIONS in STAGES[name]['inputs']]
+    if not readers:
+        return {}
+    path = os.path.join(raw_dir, EMISSIONS)
+    if not stream:
+        return dict.fromkeys(readers, read_emissions(path))
+    consumers = [STAGES[name]['stream'](load_script(STAGES[name]['script']), raw_paths(name, raw_dir)) for name in readers]
+    return dict(zip(readers, ingest.stream_emissions(path, consumers, chunksize)))
+
+
+def share_emissions(emissions, shared_dir):
+    # {stage: frame} -> {stage: path of the frame as an Arrow file}, each distinct frame
+    # written once; without pyarrow the frames are handed over as they are
+    if feather is None:
+        return emissions
+    paths = {}
+    for frame in emissions.values():
+        if id(frame) not in paths:
+            paths[id(frame)] = os.path.join(shared_dir, f'emissions-{len(paths)}.feather')
+            feather.write_feather(frame, paths[id(frame)], compression='uncompressed')
+    return {name: paths[id(frame)] for name, frame in emissions.items()}
+
+
+def build_stage(name, raw_dir, out_dir, emissions, sql=False):
+    stage = STAGES[name]
+    if isinstance(emissions, str):
+        emissions = feather.read_feather(emissions, memory_map=True)
+    module, raw = load_script(stage['script']), raw_paths(name, raw_dir, out_dir)
+    outputs = stage['sql'](module, raw) if sql else stage['build'](module, raw, emissions)
+    hashes = {}
+    for output, frame in outputs.items():
+        for path in write_output(frame, os.path.join(out_dir, output)):
+            hashes[os.path.basename(path)] = file_hash(path)
+    return hashes
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class SerialExecutor:
+
+    # runs every task in the calling process as it is submitted (--jobs 1)
+
+    def submit(self, func, *args):
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(func(*args))
+        except BaseException as error:
+            future.set_exception(error)
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+def plan(stage_names, raw_dir, out_dir, force, manifest, hashes, results, sql=()):
+    # walks the stages in dependency order and keeps the ones that need rebuilding; a
+    # stage downstream of a rebuilt one is rebuilt too
+    pending = set()
+    graph = stage_graph(stage_names)
+    for name in graphlib.TopologicalSorter(graph).static_order():
+        stage = STAGES[name]
+        upstream = graph[name]
+        missing = [i for i in stage['inputs'] if not os.path.exists(input_path(i, raw_dir, out_dir))
+                   and PRODUCED.get(i) not in pending]
+        if missing or any(results.get(dep) == 'skipped' for dep in upstream):
+            print(f'{name}: skipped, missing inputs: {", ".join(missing) or ", ".join(upstream)}')
+            results[name] = 'skipped'
+        elif force or upstream & pending:
+            pending.add(name)
+        elif is_stale(manifest.get(name), stage_fingerprint(stage, raw_dir, out_dir, hashes, name in sql), out_dir):
+            pending.add(name)
+        else:
+            print(f'{name}: up to date')
+            results[name] = 'up to date'
+    return pending
+
+
+def critical_path(graph, timings):
+    finish = {}
+    for node in graphlib.TopologicalSorter(graph).static_order():
+        finish[node] = timings.get(node, 0.0) + max((finish[dep] for dep in graph[node]), default=0.0)
+    return max(finish.values(), default=0.0)
+
+
+def run(stage_names=None, raw_dir=RAW_DIR, out_dir=OUT_DIR, force=False, stream=False,
+        chunksize=ingest.DEFAULT_CHUNKSIZE, jobs=None, sql=()):
+    # sql: the stages to build with the SQL backend, which read the raw files themselves
+    stage_names = stage_names or list(STAGES)
+    jobs = jobs or os.cpu_count() or 1
+    manifest = load_manifest(out_dir)
+    hashes = {}
+    results = {}
+    pending = plan(stage_names, raw_dir, out_dir, force, manifest, hashes, results, sql)
+
+    # the emissions parse is a task of its own that every stage reading the file waits on
+    graph = stage_graph(pending)
+    readers = [name for name in graph if EMISSIONS in STAGES[name]['inputs'] and name not in sql]
+    if readers:
+        graph[EMISSIONS] = set()
+        for name in readers:
+            graph[name].add(EMISSIONS)
+
+    sorter = graphlib.TopologicalSorter(graph)
+    sorter.prepare()
+    emissions = {}
+    fingerprints = {}
+    timings = {}
+    start = time.perf_counter()
+    pool = jobs > 1 and len(graph) > 1
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=jobs) if pool else SerialExecutor()
+    with tempfile.TemporaryDirectory(prefix='pipeline-emissions-') as shared_dir, executor:
+        running = {}
+        while sorter.is_active():
+            ready = sorter.get_ready()
+            for node in ready:
+                if node == EMISSIONS:
+                    continue
+                # hashed only now, so inputs produced by upstream stages are the new files
+                fingerprints[node] = stage_fingerprint(STAGES[node], raw_dir, out_dir,
+                                                       {} if graph[node] - {EMISSIONS} else hashes, node in sql)
+                running[executor.submit(timed, build_stage, node, raw_dir, out_dir, emissions.get(node), node in sql)] = node
+
+            if EMISSIONS in ready:
+                # parsed here while the stages submitted above run
+                emissions, timings[EMISSIONS] = timed(load_emissions, readers, raw_dir, stream, chunksize)
+                if pool:
+                    emissions = share_emissions(emissions, shared_dir)
+                print(f'{EMISSIONS}: {"streamed" if stream else "read"} in {timings[EMISSIONS]:.2f}s')
+                sorter.done(EMISSIONS)
+                continue
+
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                node = running.pop(future)
+                result, timings[node] = future.result()
+                fingerprints[node]['outputs'] = result
+                manifest[node] = fingerprints[node]
+                save_manifest(out_dir, manifest)
+                print(f'{node}: rebuilt{" with SQL" if node in sql else ""} in {timings[node]:.2f}s')
+                results[node] = 'rebuilt'
+                sorter.done(node)
+
+    if timings:
+        print(f'{len(timings)} tasks in {time.perf_counter() - start:.2f}s wall '
+              f'({sum(timings.values()):.2f}s summed, critical path {critical_path(graph, timings):.2f}s, '
+              f'{jobs if pool else 1} jobs)')
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild the processed datasets in data/.')
+    parser.add_argument('stages', nargs='*', help=f'stages to run (default: all of {", ".join(STAGES)})')
+    parser.add_argument('--raw-dir', default=RAW_DIR)
+    parser.add_argument('--out-dir', default=OUT_DIR)
+    parser.add_argument('--force', action='store_true', help='rebuild even if the outputs are up to date')
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--stream', action='store_true', help='read the emissions CSV in bounded-memory chunks')
+    parser.add_argument('--chunksize', type=int, default=ingest.DEFAULT_CHUNKSIZE, help='rows per chunk with --stream')
+    parser.add_argument('--sql', action='append', default=[], metavar='STAGE[,STAGE...]',
+                        help=f'build these stages with the DuckDB backend; "all" for all of {", ".join(SQL_STAGES)}')
+    args = parser.parse_args()
+    unknown = [s for s in args.stages if s not in STAGES]
+    if unknown:
+        parser.error(f'unknown stages: {", ".join(unknown)}')
+    sql = [s for value in args.sql for s in value.split(',') if s]
+    sql = SQL_STAGES if 'all' in sql else sql
+    no_sql = [s for s in sql if s not in SQL_STAGES]
+    if no_sql:
+        parser.error(f'no SQL build for: {", ".join(no_sql)}')
+    if sql and sql_backend.duckdb is None:
+        parser.error('--sql needs the duckdb package (pip install duckdb)')
+    if args.jobs is not None and args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+    run(args.stages, raw_dir=args.raw_dir, out_dir=args.out_dir, force=args.force, stream=args.stream,
+        chunksize=args.chunksize, jobs=args.jobs, sql=sql)
+
+
+if __name__ == '__main__':
+    main()
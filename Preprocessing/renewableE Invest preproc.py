@@ -1,24 +1,43 @@
+import numpy as np
 import pandas as pd
 
-def load_data():
-    global_renewables = pd.read_csv('Global renewables energy share.csv')
+import entities
+
+def load_data(renewables_path='Global renewables energy share.csv', emissions_path='annual-co2-emissions-per-country.csv', emissions=None,
+              entities_path=entities.ENTITIES, entity_table=None):
+    global_renewables = pd.read_csv(renewables_path)
     global_renewables['Year'] = global_renewables['Year'].astype(int)
-    emissions = pd.read_csv('annual-co2-emissions-per-country.csv')
-    emissions['Year'] = emissions['Year'].astype(int)
-    non_countries = [
-        'World', 'Africa', 'Asia', 'Europe', 'North America', 'South America', 'Oceania',
-        'European Union (27)', 'European Union (28)', 'High-income countries', 'Low-income countries',
-        'Lower-middle-income countries', 'Upper-middle-income countries', 'International aviation', 'International shipping',
-        'Asia (GCP)', 'Europe (GCP)', 'North America (GCP)', 'South America (GCP)', 'Oceania (GCP)', 'Middle East (GCP)',
-        'Central America (GCP)', 'Non-OECD (GCP)', 'OECD (GCP)', 'Africa (GCP)', 'Asia (excl. China and India)',
-        'Europe (excl. EU-27)', 'Europe (excl. EU-28)', 'North America (excl. USA)'
-    ]
-    emissions = emissions[~emissions['Entity'].isin(non_countries)]
-    merged_data = pd.merge(global_renewables, emissions, on='Year', how='inner')
-    return merged_data
-
-renewables = load_data()
-
-renewables.head()
-
-renewables.to_csv('renewables.csv', index=False)
+    if emissions is None:
+        emissions = pd.read_csv(emissions_path)
+    if entity_table is None:
+        entity_table = entities.read_entities(entities_path)
+    emissions = emissions.astype({'Year': int})
+    entity_id = entities.entity_ids(emissions['Entity'], entity_table)
+    keep = np.isin(entity_id, entities.ids_of_kind(entity_table, 'country')) & emissions['Year'].isin(global_renewables['Year']).to_numpy()
+    emissions = emissions[keep].assign(entity_id=entity_id[keep])
+
+    # country dimension: one row per country with a small integer key (entity ids sort
+    # like the names, so the countries stay in name order)
+    country_ids = np.unique(emissions['entity_id'])
+    countries = pd.DataFrame({'country_id': np.arange(len(country_ids)),
+                              'Entity': entities.canonical_names(country_ids, entity_table),
+                              'Code': entity_table['code'].to_numpy()[country_ids]})
+
+    # country-year fact table keyed by that integer id
+    country_emissions = emissions.assign(country_id=np.searchsorted(country_ids, emissions['entity_id']))
+    country_emissions = country_emissions[['country_id', 'Year', 'Annual CO₂ emissions']].sort_values(by=['country_id', 'Year'])
+
+    # per-year global share, with the worldwide emissions total precomputed once
+    global_emissions = country_emissions.groupby('Year')['Annual CO₂ emissions'].sum().reset_index()
+    global_share = pd.merge(global_renewables, global_emissions, on='Year', how='inner')
+
+    return global_share, countries, country_emissions
+
+if __name__ == '__main__':
+    global_share, countries, country_emissions = load_data()
+
+    global_share.head()
+
+    global_share.to_csv('renewables-global.csv', index=False)
+    countries.to_csv('renewables-countries.csv', index=False)
+    country_emissions.to_csv('renewables-emissions.csv', index=False)
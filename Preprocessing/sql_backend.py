@@ -0,0 +1,188 @@
+
+####SQL Backend####
+
+# An optional engine for the stages whose work is one scan of the emissions file plus
+# joins and aggregations (co2temp, paris_agreement, weather, deforestation). DuckDB runs
+# them as SQL straight over the raw CSV: the file is read in parallel on every core and
+# never loaded into a DataFrame, and joins and aggregates that do not fit the memory limit
+# spill to SPILL_DIR. The disaster and forest sheets are scanned in place from their cached
+# Arrow copies (excel_cache.py); the small side inputs (the temperature table, the entity
+# table) are parsed as the scripts parse them.
+#
+# The pandas scripts stay the reference and the default. Each query mirrors its script
+# step by step (the row filters, the joins on entity ids, melt as UNPIVOT, the order the
+# rows are written in), so the outputs equal the script's except in the last bit of some
+# values: DuckDB parses decimals exactly where pandas' default parser rounds some long ones
+# to a neighbouring double, and a floating-point sum depends on the order of its rows,
+# which a parallel scan does not keep (sums use compensated summation, fsum, to keep that
+# rare). On the repo's data the outputs are byte for byte the same.
+#
+# usage: python Preprocessing/pipeline.py --sql all   (or --sql STAGE,...; needs the duckdb
+#        package, DASHBOARD_SQL_MEMORY_LIMIT caps its memory, e.g. '4GB')
+
+import os
+
+import numpy as np
+import pandas as pd
+
+import entities
+import excel_cache
+from ingest import VALUE
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SPILL_DIR = os.path.join(ROOT_DIR, 'data', '.sql-spill')
+MEMORY_LIMIT = os.environ.get('DASHBOARD_SQL_MEMORY_LIMIT')
+
+EMISSIONS = 'annual-co2-emissions-per-country.csv'
+DISASTERS = 'Natural Disasters 2000 - 2023.xlsx'
+FORESTS = 'global.xlsx'
+TEMPERATURE = 'GLB.Ts+dSST.csv'
+
+
+def _literal(text):
+    return "'" + str(text).replace("'", "''") + "'"
+
+
+def _sheet(path, sheet_name=0, usecols=None):
+    # the cached Arrow copy of a sheet when there is one, so no column becomes Python objects
+    table = excel_cache.read_table(path, sheet_name=sheet_name, usecols=usecols)
+    return table if table is not None else excel_cache.read_excel(path, sheet_name=sheet_name, usecols=usecols)
+
+
+def _with_row_numbers(sheet, column):
+    if isinstance(sheet, pd.DataFrame):
+        return sheet.assign(**{column: np.arange(len(sheet))})
+    return sheet.append_column(column, excel_cache.pa.array(np.arange(len(sheet))))
+
+
+def connect(raw):
+    # one in-memory database per stage build, with the emissions file and the entity table
+    # as views: emissions(Entity, Code, Year, co2), entity_table and names(name, entity_id),
+    # every canonical name and alias with its id (entities.name_lookup)
+    os.makedirs(SPILL_DIR, exist_ok=True)
+    con = duckdb.connect()
+    con.execute(f'SET temp_directory = {_literal(SPILL_DIR)}')
+    con.execute('SET preserve_insertion_order = false')
+    if MEMORY_LIMIT:
+        con.execute(f'SET memory_limit = {_literal(MEMORY_LIMIT)}')
+
+    con.execute(f'''
+        CREATE TEMP VIEW emissions AS
+        SELECT Entity, Code, Year, "{VALUE}" AS co2
+        FROM read_csv({_literal(raw[EMISSIONS])}, header = true,
+                      types = {{'Entity': 'VARCHAR', 'Code': 'VARCHAR', 'Year': 'BIGINT', '{VALUE}': 'DOUBLE'}})''')
+    if entities.ENTITIES in raw:
+        entity_table = entities.read_entities(raw[entities.ENTITIES])
+        con.register('entity_table', entity_table)
+        con.register('names', entities.name_lookup(entity_table).rename_axis('name').reset_index(name='entity_id'))
+    return con
+
+
+def build_co2temp(module, raw):
+    con = connect(raw)
+    con.execute('CREATE TEMP TABLE global_co2 AS SELECT Year, fsum(co2) AS co2 FROM emissions GROUP BY Year')
+
+    con.register('temperature_annual', module.read_annual_temperature(raw[TEMPERATURE]))
+    annual = con.execute(f'''
+        SELECT g.Year, g.co2 AS "{VALUE}", t."Annual Temperature Anomaly"
+        FROM global_co2 g JOIN temperature_annual t ON g.Year = t.Year
+        ORDER BY g.Year''').df()
+
+    con.register('temperature_monthly', module.read_monthly_temperature(raw[TEMPERATURE]))
+    months = ', '.join(f'"{month}"' for month in module.months)
+    monthly = con.execute(f'''
+        SELECT g.Year, g.co2 AS "{VALUE}", m.Month, m.anomaly AS "Monthly Temperature Anomaly"
+        FROM global_co2 g JOIN (
+            SELECT Year, CAST(list_position([{', '.join(map(_literal, module.months))}], month) AS BIGINT) AS Month, anomaly
+            FROM (UNPIVOT temperature_monthly ON {months} INTO NAME month VALUE anomaly)
+        ) m ON g.Year = m.Year
+        ORDER BY g.Year, m.Month''').df()
+    return {'co2temp.csv': annual, 'co2temp-monthly.csv': monthly}
+
+
+def build_paris(module, raw):
+    con = connect(raw)
+    con.execute('''
+        CREATE TEMP TABLE recent AS
+        SELECT Entity, Year, fsum(co2) AS co2, count(*) - count(co2) AS missing
+        FROM emissions WHERE Year >= 2017 GROUP BY Entity, Year''')
+    if con.execute('SELECT coalesce(sum(missing), 0) FROM recent').fetchone()[0]:
+        raise ValueError("Missing values found in Annual CO₂ emissions data.")
+    paris = con.execute(f'''
+        SELECT e.name AS Entity, r.Year, fsum(r.co2) AS "{VALUE}"
+        FROM recent r JOIN names n ON r.Entity = n.name JOIN entity_table e ON n.entity_id = e.entity_id
+        WHERE e.kind = 'country'
+        GROUP BY e.entity_id, e.name, r.Year
+        ORDER BY e.entity_id, r.Year''').df()
+    return {'paris_agreement.csv': paris}
+
+
+def build_weather(module, raw):
+    con = connect(raw)
+    disasters = _sheet(raw[DISASTERS], usecols=['Disaster Subgroup', 'Disaster Type', 'Code', 'Start Year'])
+    # the event rows are written as the script's merge leaves them: each (country, year)
+    # together, in the order the keys first appear among the disasters, then in row order.
+    # The codes are resolved to ids first (a table, so it can spill) and the emissions are
+    # joined on both keys
+    con.register('disasters', _with_row_numbers(disasters, 'disaster_row'))
+    con.execute('''
+        CREATE TEMP TABLE disaster_ids AS
+        SELECT d.disaster_row, d."Start Year", d."Disaster Type", k.entity_id
+        FROM disasters d JOIN entity_table k ON d.Code = k.code
+        WHERE d."Disaster Subgroup" IS DISTINCT FROM 'Biological'
+          AND d."Disaster Type" IS DISTINCT FROM 'Glacial lake outburst flood'
+          AND d."Disaster Type" IS DISTINCT FROM 'Impact'
+          AND d."Start Year" BETWEEN 2000 AND 2023''')
+    con.execute('''
+        CREATE TEMP TABLE events AS
+        SELECT d.disaster_row, min(d.disaster_row) OVER (PARTITION BY d.entity_id, d."Start Year") AS key_row,
+               d."Start Year" AS year, c.Entity AS country, d."Disaster Type" AS "natural disaster",
+               c.co2 AS "co2 emissions"
+        FROM disaster_ids d
+        JOIN (SELECT e.Entity, e.Year, e.co2, n.entity_id
+              FROM emissions e JOIN names n ON e.Entity = n.name
+              WHERE e.Year BETWEEN 2000 AND 2023) c ON c.entity_id = d.entity_id AND c.Year = d."Start Year"''')
+    weatherco2 = con.execute('''
+        SELECT year, country, "natural disaster", "co2 emissions"
+        FROM events ORDER BY key_row, disaster_row''').df()
+    event_counts = con.execute('''
+        SELECT country, year, "natural disaster", count(*) AS events
+        FROM events GROUP BY country, year, "natural disaster"
+        ORDER BY country, year, "natural disaster"''').df()
+    country_emissions = con.execute('''
+        SELECT country, year, first("co2 emissions" ORDER BY disaster_row) FILTER (WHERE "co2 emissions" IS NOT NULL) AS "co2 emissions"
+        FROM events GROUP BY country, year
+        ORDER BY country, year''').df()
+    return {'weather-co2.csv': weatherco2, 'weather-event-counts.csv': event_counts,
+            'weather-emissions.csv': country_emissions}
+
+
+def build_deforestation(module, raw):
+    con = connect(raw)
+    loss_columns = [f'tc_loss_ha_{year}' for year in range(2001, 2024)]
+    con.register('forests', _sheet(raw[FORESTS], sheet_name='Country tree cover loss', usecols=['country'] + loss_columns))
+    # melted integer columns stay integers, as they do in pandas; a sum of no values is 0
+    types = dict(con.execute('SELECT column_name, column_type FROM (DESCRIBE forests)').fetchall())
+    integer = all(types[column] in ('TINYINT', 'SMALLINT', 'INTEGER', 'BIGINT') for column in loss_columns)
+    total = 'CAST(sum(loss) AS BIGINT)' if integer else 'coalesce(fsum(loss), 0.0)'
+    con.execute(f'''
+        CREATE TEMP TABLE loss AS
+        SELECT country, CAST(regexp_extract(column_name, '(\\d+)') AS BIGINT) AS year, {total} AS tree_cover_loss
+        FROM forests UNPIVOT INCLUDE NULLS (loss FOR column_name IN ({', '.join(f'"{c}"' for c in loss_columns)}))
+        GROUP BY country, year''')
+    deforestation = con.execute('''
+        SELECT l.year, l.country, r.name AS region, l.tree_cover_loss, c.co2 AS co2_emissions
+        FROM loss l
+        JOIN names n ON l.country = n.name
+        JOIN entity_table e ON n.entity_id = e.entity_id
+        JOIN entity_table r ON e.region_id = r.entity_id
+        JOIN (SELECT m.entity_id, em.Year, em.co2
+              FROM emissions em JOIN names m ON em.Entity = m.name
+              WHERE em.Year BETWEEN 2001 AND 2023) c ON c.entity_id = n.entity_id AND c.Year = l.year
+        ORDER BY l.country, l.year''').df()
+    return {'deforestation-co2-dataset.csv': deforestation}
@@ -0,0 +1,59 @@
+
+####Benchmark Comparison####
+
+# Lines up the steps of two results files from run_benchmarks.py and flags every step
+# that got slower (best time) or hungrier (peak memory) by more than the threshold, or
+# that started failing. Exits non-zero when anything regressed, so it can gate a deploy.
+#
+# usage: python benchmarks/compare.py BASELINE.json CANDIDATE.json [--threshold 1.25]
+
+import argparse
+import json
+import sys
+
+
+def load_steps(path):
+    with open(path) as handle:
+        report = json.load(handle)
+    return {(entry['scale'], step['group'], step['name'], step['phase']): step
+            for entry in report['scales'] for step in entry['steps']}
+
+
+def compare(baseline, candidate, threshold=1.25, min_seconds=0.005):
+    regressions = []
+    for key in sorted(set(baseline) & set(candidate)):
+        old, new = baseline[key], candidate[key]
+        label = '{}x {}/{}/{}'.format(*key)
+        if 'error' in new:
+            if 'error' not in old:
+                regressions.append(f'{label}: now fails ({new["error"]})')
+            continue
+        if 'error' in old:
+            continue
+        # very short steps are mostly timer noise
+        if new['best_seconds'] > threshold * old['best_seconds'] and new['best_seconds'] > min_seconds:
+            regressions.append(f'{label}: {old["best_seconds"]:.3f}s -> {new["best_seconds"]:.3f}s')
+        if new['peak_bytes'] > threshold * old['peak_bytes'] and new['peak_bytes'] > 1 << 20:
+            regressions.append(f'{label}: peak {old["peak_bytes"] / 2**20:.1f} -> {new["peak_bytes"] / 2**20:.1f} MiB')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare two benchmark results files.')
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=1.25, help='allowed slowdown / growth ratio')
+    args = parser.parse_args()
+
+    baseline, candidate = load_steps(args.baseline), load_steps(args.candidate)
+    for key in sorted(set(baseline) ^ set(candidate)):
+        print('{}x {}/{}/{}: only in one run'.format(*key))
+    regressions = compare(baseline, candidate, args.threshold)
+    for line in regressions:
+        print(line)
+    print(f'{len(regressions)} regressions across {len(set(baseline) & set(candidate))} steps')
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+
+####Benchmark Suite####
+
+# Generates synthetic inputs at each scale (see synthetic.py), then times every
+# preprocessing stage and the data-prep and figure-build steps of every dashboard
+# section on the result, recording the Python-level peak memory (tracemalloc) of each
+# step. A step that fails is recorded with its error and the run carries on, so the
+# results also show where things fall over. Results are written as JSON; compare two
+# runs with compare.py.
+#
+# usage: python benchmarks/run_benchmarks.py [--scales 1 10 100 1000] [--repeat N]
+#                                             [--output FILE] [--work-dir DIR]
+
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'Preprocessing'))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import plotly  # noqa: E402
+
+import data_loader  # noqa: E402
+import excel_cache  # noqa: E402
+import figures  # noqa: E402
+import pipeline  # noqa: E402
+import sql_backend  # noqa: E402
+import synthetic  # noqa: E402
+from data_loader import load_dataset, load_derived  # noqa: E402
+from entity_index import paris_agreement_series, renewables_trends  # noqa: E402
+from scenarios import ScenarioEngine  # noqa: E402
+from trend_engine import annual_co2_temperature, monthly_co2_temperature  # noqa: E402
+from weather_cube import disaster_cube  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT_DIR, 'benchmarks', 'results')
+DEFAULT_YEARS = (1970, 2020)  # the dashboard's initial slider window
+
+
+def measure(func, repeat=3, setup=None):
+    # wall time of a cold first call and the best of `repeat` calls, then one more call
+    # under tracemalloc for the peak; setup() runs untimed before every call
+    timings = []
+    for _ in range(repeat):
+        setup and setup()
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    setup and setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'first_seconds': timings[0], 'best_seconds': min(timings), 'peak_bytes': peak}
+
+
+def step(results, group, name, phase, func, **kwargs):
+    record = {'group': group, 'name': name, 'phase': phase}
+    try:
+        record.update(measure(func, **kwargs))
+    except Exception as error:
+        record['error'] = f'{type(error).__name__}: {error}'
+    results.append(record)
+    status = record.get('error') or f'{record["best_seconds"]:.3f}s, peak {record["peak_bytes"] / 2**20:.1f} MiB'
+    print(f'  {group}/{name}/{phase}: {status}')
+    return record
+
+
+########## preprocessing
+
+def benchmark_pipeline(results, raw_dir, out_dir, repeat):
+    # stages run in STAGES order, so the entity table is built before the stages that read it
+    names = [name for name in pipeline.STAGES
+             if all(i in pipeline.PRODUCED or os.path.exists(pipeline.input_path(i, raw_dir, out_dir))
+                    for i in pipeline.STAGES[name]['inputs'])]
+    step(results, 'pipeline', 'emissions', 'read', lambda: pipeline.load_emissions(names, raw_dir), repeat=repeat)
+    step(results, 'pipeline', 'emissions', 'stream', lambda: pipeline.load_emissions(names, raw_dir, stream=True),
+         repeat=repeat)
+
+    emissions = pipeline.load_emissions(names, raw_dir)
+    for name in names:
+        # the first call converts any Excel sheets; the best time is the cached path
+        step(results, 'pipeline', name, 'build',
+             lambda name=name: pipeline.build_stage(name, raw_dir, out_dir, emissions.get(name)), repeat=repeat)
+        if name in pipeline.SQL_STAGES and sql_backend.duckdb is not None:
+            # the SQL backend reads the raw files itself, so its time includes the parse; its
+            # memory is allocated natively and is not part of the tracemalloc peak
+            step(results, 'pipeline', name, 'sql',
+                 lambda name=name: pipeline.build_stage(name, raw_dir, out_dir, None, sql=True), repeat=repeat)
+
+
+########## dashboard
+
+def _co2_temperature_prep():
+    return (load_dataset('co2temp'), load_derived('co2temp', annual_co2_temperature),
+            load_dataset('co2temp_monthly'), load_derived('co2temp_monthly', monthly_co2_temperature))
+
+
+def _co2_temperature_figures(state):
+    annual_data, annual_trend, monthly_data, monthly_trend = state
+    lo, hi = annual_trend.rows(*DEFAULT_YEARS)
+    annual_filtered = annual_data.iloc[lo:hi]
+    built = [figures.co2_line(annual_filtered)]
+    for data, trend, column in [(annual_data, annual_trend, 'Annual Temperature Anomaly'),
+                                (monthly_data, monthly_trend, 'Monthly Temperature Anomaly')]:
+        lo, hi = trend.rows(*DEFAULT_YEARS)
+        filtered = data.iloc[lo:hi]
+        built += [figures.co2_temperature_scatter(filtered, column, trend.stats(*DEFAULT_YEARS)),
+                  figures.temperature_line(filtered, column)]
+    return built
+
+
+def _projections_figures(projected):
+    engine = ScenarioEngine(projected)
+    built = list(figures.scenario_overview_figures(engine))
+    blend = {name: 1 for name in engine.names}
+    return built + [figures.scenario_detail_figure(engine, engine.names[0]), figures.scenario_blend_figure(engine, blend)]
+
+
+def _renewables_prep():
+    return load_derived(('renewables_global', 'renewables_countries', 'renewables_emissions'), renewables_trends)
+
+
+def _deforestation_figures(deforestation):
+    return [fig for region in deforestation['region'].unique()
+            for fig in figures.deforestation_figures(deforestation, region)]
+
+
+def _weather_prep():
+    return load_derived(('weather_event_counts', 'weather_emissions'), disaster_cube)
+
+
+def _weather_figures(cube):
+    return [figures.disaster_figure(cube)] + [figures.disaster_figure(cube, cube.disaster_types[0])]
+
+
+def _paris_figures(series):
+    return [figures.create_emission_plot(series, entity)[0] for entity in series.entities[:2]]
+
+
+# section -> (data prep, figure build for the initial view plus one selection)
+SECTIONS = {
+    'co2_temperature': (_co2_temperature_prep, _co2_temperature_figures),
+    'projections': (lambda: load_dataset('projected_impacts'), _projections_figures),
+    'economy': (lambda: load_dataset('co2gdp'),
+                lambda data: list(figures.gdp_bar_figures(data)) + list(figures.gdp_scatter_figures(data))),
+    'treemap': (lambda: load_dataset('co2gdp'), lambda data: [figures.emissions_treemap(data)]),
+    'renewables': (_renewables_prep,
+                   lambda trends: [figures.plot_dual_axis_trends(trends)]
+                   + [figures.plot_dual_axis_trends(trends, trends.entities[0])]),
+    'deforestation': (lambda: load_dataset('deforestation'), _deforestation_figures),
+    'weather': (_weather_prep, _weather_figures),
+    'paris_agreement': (lambda: load_derived('paris_agreement', paris_agreement_series), _paris_figures),
+}
+
+
+def benchmark_dashboard(results, data_dir, repeat):
+    data_loader.DATA_DIR = data_dir
+    for name, (prep, build) in SECTIONS.items():
+        # prep runs against an empty dataset cache, as on a fresh server process
+        record = step(results, 'dashboard', name, 'prep', prep, repeat=repeat, setup=data_loader.clear_cache)
+        if 'error' in record:
+            continue
+        state = prep()
+        # figures are serialized too, since that is what reaches the browser
+        step(results, 'dashboard', name, 'figures', lambda: [fig.to_json() for fig in build(state)], repeat=repeat)
+    data_loader.clear_cache()
+
+
+def environment():
+    packages = {'numpy': np.__version__, 'pandas': pd.__version__, 'plotly': plotly.__version__}
+    try:
+        import pyarrow
+        packages['pyarrow'] = pyarrow.__version__
+    except ImportError:
+        pass
+    if sql_backend.duckdb is not None:
+        packages['duckdb'] = sql_backend.duckdb.__version__
+    return {'python': platform.python_version(), 'platform': platform.platform(),
+            'cpus': os.cpu_count(), 'packages': packages}
+
+
+def run(scales, repeat=3, work_dir=None):
+    report = {'created': datetime.datetime.now().isoformat(timespec='seconds'),
+              'environment': environment(), 'scales': []}
+    for scale in scales:
+        scale_dir = tempfile.mkdtemp(prefix=f'bench-{scale}x-', dir=work_dir)
+        raw_dir, out_dir = os.path.join(scale_dir, 'raw'), os.path.join(scale_dir, 'data')
+        os.makedirs(out_dir)
+        excel_cache.CACHE_DIR = os.path.join(scale_dir, 'excel-cache')
+        print(f'{scale}x: generating inputs in {scale_dir}')
+        start = time.perf_counter()
+        rows = synthetic.generate(scale, raw_dir)
+        entry = {'scale': scale, 'input_rows': rows, 'generate_seconds': time.perf_counter() - start, 'steps': []}
+        try:
+            benchmark_pipeline(entry['steps'], raw_dir, out_dir, repeat)
+            benchmark_dashboard(entry['steps'], out_dir, repeat)
+        finally:
+            entry['max_rss_bytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+            if work_dir is None:
+                shutil.rmtree(scale_dir, ignore_errors=True)
+        report['scales'].append(entry)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the preprocessing pipeline and dashboard sections.')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10], help='scale factors (e.g. 1 10 100 1000)')
+    parser.add_argument('--repeat', type=int, default=3, help='timed calls per step')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--work-dir', help='keep the generated datasets under this directory')
+    args = parser.parse_args()
+    if min(args.scales) < 1 or args.repeat < 1:
+        parser.error('--scales and --repeat must be at least 1')
+
+    report = run(args.scales, repeat=args.repeat, work_dir=args.work_dir)
+    output = args.output or os.path.join(RESULTS_DIR, datetime.datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as handle:
+        json.dump(report, handle, indent=2)
+    print(f'results written to {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+
+####Synthetic Scale-Up Datasets####
+
+# Writes a raw-input directory shaped like data/Raw Data at a given scale factor. The
+# emissions inventory, the World Bank indicators and the forest sheet get `scale` times
+# as many countries, the disaster sheet `scale` times as many events (capped at Excel's
+# row limit) and the projection workbooks `scale` times as many scenarios. The processed
+# data/*.csv files are then produced from it by the real pipeline, so both scale together.
+# Time axes keep their source resolution, since every script keys on calendar years.
+
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'Preprocessing'))
+
+import entities  # noqa: E402
+import excel_cache  # noqa: E402
+
+RAW_DIR = os.path.join(ROOT_DIR, 'data', 'Raw Data')
+DATA_DIR = os.path.join(ROOT_DIR, 'data')
+
+EMISSIONS = 'annual-co2-emissions-per-country.csv'
+DISASTERS = 'Natural Disasters 2000 - 2023.xlsx'
+INDICATORS = 'Popular Indicators Data.csv'
+FORESTS = 'global.xlsx'
+PROJECTIONS = ['world co2 projections.xlsx', 'world temp projection.xlsx']
+COPIED = ['GLB.Ts+dSST.csv', 'Global renewables energy share.csv']
+
+EXCEL_MAX_ROWS = 1_048_575
+THRESHOLDS = [0, 10, 15, 20, 25, 30, 50, 75]
+
+# the World Bank spellings the entity table lists as aliases (the forest region members'
+# aliases are the forest data's spellings)
+WORLD_BANK_NAMES = {name: aliases[0] for name, aliases in entities.ALIASES.items()
+                    if name not in entities.region_members()}
+
+
+def replica_name(name, replica):
+    return name if replica == 0 else f'{name} ({replica})'
+
+
+def replica_code(code, replica):
+    return code if replica == 0 or pd.isna(code) else f'{code}{replica}'
+
+
+def _countries(emissions):
+    return emissions[emissions['Code'].notna() & (emissions['Entity'] != 'World')]
+
+
+def write_emissions(scale, raw_dir, rng):
+    # the full real file once, then jittered copies of every country under new names;
+    # appended replica by replica so generating 1000x never holds it all in memory
+    base = pd.read_csv(os.path.join(RAW_DIR, EMISSIONS))
+    countries = _countries(base)
+    path = os.path.join(raw_dir, EMISSIONS)
+    base.to_csv(path, index=False)
+    for replica in range(1, scale):
+        part = countries.assign(Entity=countries['Entity'].map(lambda name: replica_name(name, replica)),
+                                Code=countries['Code'].map(lambda code: replica_code(code, replica)))
+        part['Annual CO₂ emissions'] = part['Annual CO₂ emissions'] * rng.uniform(0.5, 1.5, len(part))
+        part.to_csv(path, mode='a', header=False, index=False)
+    return len(base) + len(countries) * (scale - 1)
+
+
+def write_indicators(scale, raw_dir, rng):
+    # one row per (country, series) in the World Bank export layout, with '..' for gaps
+    emissions = pd.read_csv(os.path.join(RAW_DIR, EMISSIONS))
+    names = _countries(emissions)['Entity'].unique()
+    known = pd.read_csv(os.path.join(DATA_DIR, 'co2gdp.csv')).set_index('Entity')
+    series = list(known.columns[known.columns.get_loc('Annual CO₂ emissions') + 1:])
+    path = os.path.join(raw_dir, INDICATORS)
+    rows = 0
+    for replica in range(scale):
+        countries = np.repeat([replica_name(name, replica) for name in names], len(series))
+        series_names = np.tile(series, len(names))
+        values = np.empty(len(countries))
+        for i, name in enumerate(series):
+            column = slice(i, None, len(series))
+            if 'Population' in name:
+                values[column] = rng.lognormal(15, 2, len(names))
+            elif '%' in name:
+                values[column] = rng.uniform(0, 60, len(names))
+            else:
+                values[column] = rng.lognormal(24, 2, len(names))
+        frame = pd.DataFrame({'Country Name': countries, 'Country Code': '', 'Series Name': series_names,
+                              'Series Code': '', '2022 [YR2022]': values.astype(object)})
+        if replica == 0:
+            # the real top emitters keep their real figures
+            for (country, name), value in known[series].stack().items():
+                frame.loc[(frame['Country Name'] == country) & (frame['Series Name'] == name), '2022 [YR2022]'] = value
+            frame['Country Name'] = frame['Country Name'].replace(WORLD_BANK_NAMES)
+        frame.loc[rng.random(len(frame)) < 0.1, '2022 [YR2022]'] = '..'
+        frame.to_csv(path, mode='w' if replica == 0 else 'a', header=replica == 0, index=False)
+        rows += len(frame)
+    return rows
+
+
+def write_forests(scale, raw_dir, rng):
+    # the processed per-country yearly loss split evenly over the canopy thresholds
+    loss = pd.read_csv(os.path.join(DATA_DIR, 'deforestation-co2-dataset.csv'))
+    loss = loss.pivot_table(index='country', columns='year', values='tree_cover_loss', aggfunc='sum')
+    loss = loss.reindex(columns=range(2001, 2024), fill_value=0).fillna(0)
+    parts = []
+    for replica in range(scale):
+        jitter = 1 if replica == 0 else rng.uniform(0.5, 1.5, (len(loss), 1))
+        yearly = np.floor(loss.to_numpy() * jitter / len(THRESHOLDS))
+        for threshold in THRESHOLDS:
+            part = pd.DataFrame(yearly, columns=[f'tc_loss_ha_{year}' for year in loss.columns])
+            part.insert(0, 'country', [replica_name(name, replica) for name in loss.index])
+            part.insert(1, 'threshold', threshold)
+            part.insert(2, 'area_ha', rng.uniform(1e5, 1e8, len(part)).round())
+            part.insert(3, 'extent_2000_ha', (part['area_ha'] * rng.uniform(0.1, 0.9, len(part))).round())
+            part.insert(4, 'extent_2010_ha', (part['extent_2000_ha'] * rng.uniform(0.8, 1.0, len(part))).round())
+            part.insert(5, 'gain_2000-2020_ha', (part['extent_2000_ha'] * rng.uniform(0, 0.05, len(part))).round())
+            parts.append(part)
+    frame = pd.concat(parts, ignore_index=True)
+    frame.to_excel(os.path.join(raw_dir, FORESTS), sheet_name='Country tree cover loss', index=False)
+    return len(frame)
+
+
+def write_disasters(scale, raw_dir, rng):
+    # every real event once per replica country; Excel caps a sheet at ~1M rows
+    base = excel_cache.read_excel(os.path.join(RAW_DIR, DISASTERS))
+    replicas = min(scale, -(-EXCEL_MAX_ROWS // len(base)))
+    parts = [base.assign(Code=base['Code'].map(lambda code: replica_code(code, replica))) for replica in range(replicas)]
+    frame = pd.concat(parts, ignore_index=True).head(EXCEL_MAX_ROWS)
+    frame.to_excel(os.path.join(raw_dir, DISASTERS), index=False)
+    return len(frame)
+
+
+def write_projections(scale, raw_dir, rng):
+    rows = {}
+    for name in PROJECTIONS:
+        base = pd.read_excel(os.path.join(RAW_DIR, name))
+        years = [column for column in base.columns if isinstance(column, int)]
+        parts = []
+        for replica in range(scale):
+            part = base.assign(Scenario=base['Scenario'].map(lambda scenario: replica_name(scenario, replica)))
+            if replica:
+                part[years] = part[years] * rng.uniform(0.8, 1.2, (len(part), 1))
+            parts.append(part)
+        frame = pd.concat(parts, ignore_index=True)
+        frame.to_excel(os.path.join(raw_dir, name), sheet_name='data', index=False)
+        rows[name] = len(frame)
+    return rows
+
+
+def generate(scale, raw_dir, seed=0):
+    # returns the row count written for every raw input
+    rng = np.random.default_rng(seed)
+    os.makedirs(raw_dir, exist_ok=True)
+    rows = {
+        EMISSIONS: write_emissions(scale, raw_dir, rng),
+        INDICATORS: write_indicators(scale, raw_dir, rng),
+        FORESTS: write_forests(scale, raw_dir, rng),
+        DISASTERS: write_disasters(scale, raw_dir, rng),
+        **write_projections(scale, raw_dir, rng),
+    }
+    for name in COPIED:
+        shutil.copy(os.path.join(RAW_DIR, name), os.path.join(raw_dir, name))
+    return rows
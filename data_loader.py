@@ -0,0 +1,151 @@
+
+####Shared Dataset Loader####
+
+# Each processed dataset is parsed once per server process and the same frame is
+# handed to every rerun and session. Frames are shared, so callers must treat them
+# as read-only (use .assign()/.copy() instead of assigning columns in place).
+#
+# When the pipeline has written an Arrow IPC (.feather) copy of a dataset it is opened
+# memory-mapped instead of parsing the CSV; the CSV is only read when it is missing.
+# Either way the frame is typed by its declared schema (schema.py) and then placed in the
+# shared column store (shared_store.py): every server process on the host maps the same
+# read-only column files, so several workers behind a load balancer hold one copy.
+
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+
+import schema
+import shared_store
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+SHARED_DIR = os.environ.get('DASHBOARD_SHARED_DIR')  # default: data/.shared
+
+DATASETS = {
+    'co2temp': 'co2temp.csv',
+    'co2temp_monthly': 'co2temp-monthly.csv',
+    'projected_impacts': 'projected_impacts.csv',
+    'co2gdp': 'co2gdp.csv',
+    'renewables_global': 'renewables-global.csv',
+    'renewables_countries': 'renewables-countries.csv',
+    'renewables_emissions': 'renewables-emissions.csv',
+    'deforestation': 'deforestation-co2-dataset.csv',
+    'weather': 'weather-co2.csv',
+    'weather_event_counts': 'weather-event-counts.csv',
+    'weather_emissions': 'weather-emissions.csv',
+    'paris_agreement': 'paris_agreement.csv',
+    'entities': 'entities.csv',
+}
+
+_cache = {}
+_derived = {}
+_locks = {}
+_locks_guard = threading.Lock()
+_derived_lock = threading.RLock()  # builders may load other derived structures
+
+
+def _dataset_lock(name):
+    with _locks_guard:
+        return _locks.setdefault(name, threading.Lock())
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _store_version(name, content_hash):
+    # the stored columns are typed by the schema, so a changed declaration is a new version
+    spec = json.dumps(schema.SCHEMAS[DATASETS[name]], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f'{content_hash}:{spec}'.encode('utf-8')).hexdigest()
+
+
+def dataset_path(name):
+    return os.path.join(DATA_DIR, DATASETS[name])
+
+
+def columnar_path(name):
+    return os.path.splitext(dataset_path(name))[0] + '.feather'
+
+
+def _source_path(name):
+    path = columnar_path(name)
+    if feather is not None and os.path.exists(path):
+        return path
+    return dataset_path(name)
+
+
+def shared_dir():
+    return SHARED_DIR or os.path.join(DATA_DIR, '.shared')
+
+
+def _read(path):
+    if path.endswith('.feather'):
+        # split_blocks keeps each column as its own (mapped) buffer instead of consolidating
+        return feather.read_table(path, memory_map=True).to_pandas(split_blocks=True)
+    return pd.read_csv(path)
+
+
+def load_dataset(name):
+    with _dataset_lock(name):
+        path = _source_path(name)
+        stat = os.stat(path)
+        signature = (path, stat.st_mtime_ns, stat.st_size)
+        entry = _cache.get(name)
+        if entry is not None and entry['signature'] == signature:
+            return entry['frame']
+
+        # mtime/size changed: only re-parse when the content actually differs
+        content_hash = _file_hash(path)
+        if entry is not None and entry['hash'] == content_hash:
+            entry['signature'] = signature
+            return entry['frame']
+
+        frame = shared_store.load(name, _store_version(name, content_hash), lambda: schema.apply(DATASETS[name], _read(path)),
+                                  shared_dir(), stat.st_mtime_ns)
+        _cache[name] = {'signature': signature, 'hash': content_hash, 'frame': frame}
+        return frame
+
+
+def dataset_version(names):
+    # content hashes of the datasets as currently loaded; changes whenever any of them reloads
+    if isinstance(names, str):
+        names = (names,)
+    versions = []
+    for name in names:
+        load_dataset(name)
+        versions.append(_cache[name]['hash'])
+    return tuple(versions)
+
+
+def load_derived(names, builder):
+    # structures built from datasets (indexes, prefix sums, ...) live as long as the
+    # cached frames they were built from and are rebuilt when any of them reloads
+    if isinstance(names, str):
+        names = (names,)
+    frames = tuple(load_dataset(name) for name in names)
+    key = (names, f'{builder.__module__}.{builder.__qualname__}')
+    with _derived_lock:
+        entry = _derived.get(key)
+        if entry is None or any(old is not new for old, new in zip(entry['frames'], frames)):
+            entry = {'frames': frames, 'value': builder(*frames)}
+            _derived[key] = entry
+        return entry['value']
+
+
+def clear_cache():
+    with _locks_guard:
+        _cache.clear()
+    with _derived_lock:
+        _derived.clear()
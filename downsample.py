@@ -0,0 +1,83 @@
+
+####Large-Series Rendering####
+
+# Keeps long series responsive in the browser. Line series longer than TARGET_POINTS are
+# thinned with Largest-Triangle-Three-Buckets (LTTB) before they are serialized, which keeps
+# the peaks and troughs a plain stride would drop, and any trace that still ships more than
+# WEBGL_THRESHOLD points is drawn with WebGL instead of SVG. The defaults are about the
+# pixel width of a wide chart and Plotly Express's own 'auto' cutoff; set
+# DASHBOARD_TARGET_POINTS / DASHBOARD_WEBGL_THRESHOLD to change them. Series under the
+# limits pass through untouched.
+
+import os
+
+import numpy as np
+
+TARGET_POINTS = int(os.environ.get('DASHBOARD_TARGET_POINTS') or 1500)
+WEBGL_THRESHOLD = int(os.environ.get('DASHBOARD_WEBGL_THRESHOLD') or 1000)
+
+
+def use_webgl(n_points):
+    return n_points > WEBGL_THRESHOLD
+
+
+def render_mode(n_points):
+    # for Plotly Express' render_mode argument
+    return 'webgl' if use_webgl(n_points) else 'svg'
+
+
+def lttb_indices(x, y, n_out):
+    # positions of the n_out points LTTB keeps; x must be sorted. The first and last
+    # points are always kept, and each bucket in between keeps the point forming the
+    # largest triangle with the point kept before it and the next bucket's average.
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    sums_x = np.r_[0.0, np.cumsum(x)]
+    sums_y = np.r_[0.0, np.cumsum(y)]
+    # averages of every bucket's successor; the last bucket's successor is the last point
+    starts, ends = edges[1:], np.r_[edges[2:], n]
+    counts = ends - starts
+    next_x = (sums_x[ends] - sums_x[starts]) / counts
+    next_y = (sums_y[ends] - sums_y[starts]) / counts
+
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        ax, ay = x[previous], y[previous]
+        area = np.abs((ax - next_x[bucket]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[bucket] - ay))
+        previous = lo + int(np.argmax(area))
+        kept[bucket + 1] = previous
+    return kept
+
+
+def line_indices(x, y, n_out=None):
+    # rows of a line series to plot, or None when it is short enough to plot as is;
+    # points with a missing x or y are dropped from a thinned series
+    n_out = n_out or TARGET_POINTS
+    if len(x) <= n_out:
+        return None
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    finite = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    return finite[lttb_indices(x[finite], y[finite], n_out)]
+
+
+def line(x, y, n_out=None):
+    # (x, y) of a line series, thinned if it is long
+    rows = line_indices(x, y, n_out)
+    if rows is None:
+        return x, y
+    return np.asarray(x)[rows], np.asarray(y)[rows]
+
+
+def frame(data, x, y, n_out=None):
+    # the rows of a frame to plot as a line of column y against column x
+    rows = line_indices(data[x], data[y], n_out)
+    return data if rows is None else data.iloc[rows]
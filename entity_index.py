@@ -0,0 +1,137 @@
+
+####Entity-Indexed Time Series####
+
+# Rows are sorted once by (entity, year) so every entity owns a contiguous slice of
+# the year/value arrays. The rolling mean and the net change between two years are
+# computed for all entities in one vectorized pass, so a lookup is a dict access.
+# EntityTable is the entity dimension (data/entities.csv) the preprocessing scripts join
+# on: names and aliases resolve to integer ids, ids to canonical names. name_lookup is
+# the one place names and aliases are resolved; the preprocessing scripts use it too.
+
+import numpy as np
+import pandas as pd
+
+ALIAS_SEPARATOR = '|'
+
+
+class EntitySeries:
+
+    def __init__(self, data, value_column, entity_column='Entity', year_column='Year', window=3, change_years=(2017, 2022)):
+        ordered = data.sort_values(by=[entity_column, year_column], kind='stable')
+        entities = ordered[entity_column].to_numpy()
+        self.years = ordered[year_column].to_numpy()
+        self.values = ordered[value_column].to_numpy(dtype=np.float64)
+        self.change_years = change_years
+
+        n = len(entities)
+        boundaries = np.flatnonzero(entities[1:] != entities[:-1]) + 1 if n else np.array([], dtype=np.int64)
+        starts = np.r_[0, boundaries] if n else np.array([], dtype=np.int64)
+        stops = np.r_[boundaries, n] if n else np.array([], dtype=np.int64)
+        self.entities = [entities[start] for start in starts]
+        self._slices = {entity: (int(start), int(stop)) for entity, start, stop in zip(self.entities, starts, stops)}
+
+        # trailing mean over the last `window` rows of the same entity, skipping NaNs
+        # like Series.rolling(window, min_periods=1).mean()
+        group = np.repeat(np.arange(len(starts)), stops - starts)
+        positions = np.arange(n)
+        window_start = np.maximum(starts[group] if n else positions, positions - window + 1)
+        present = ~np.isnan(self.values)
+        value_sums = np.r_[0.0, np.cumsum(np.where(present, self.values, 0.0))]
+        value_counts = np.r_[0, np.cumsum(present)]
+        counts = value_counts[positions + 1] - value_counts[window_start]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.sma = np.where(counts > 0, (value_sums[positions + 1] - value_sums[window_start]) / counts, np.nan)
+
+        first_year, last_year = change_years
+        first = np.full(len(starts), np.nan)
+        last = np.full(len(starts), np.nan)
+        has_first = np.zeros(len(starts), dtype=bool)
+        has_last = np.zeros(len(starts), dtype=bool)
+        first_rows = self.years == first_year
+        last_rows = self.years == last_year
+        first[group[first_rows]] = self.values[first_rows]
+        last[group[last_rows]] = self.values[last_rows]
+        has_first[group[first_rows]] = True
+        has_last[group[last_rows]] = True
+        self._net_change = {entity: (last[i] - first[i] if has_first[i] and has_last[i] else None)
+                            for i, entity in enumerate(self.entities)}
+
+    def __contains__(self, entity):
+        return entity in self._slices
+
+    def series(self, entity, start_year=None):
+        start, stop = self._slices[entity]
+        if start_year is not None:
+            start += int(np.searchsorted(self.years[start:stop], start_year))
+        return self.years[start:stop], self.values[start:stop], self.sma[start:stop]
+
+    def net_change(self, entity):
+        return self._net_change[entity]
+
+
+def paris_agreement_series(data):
+    return EntitySeries(data, 'Annual CO₂ emissions')
+
+
+class RenewablesTrends:
+
+    share_column = 'Share of modern renewables in final energy consumption, World'
+
+    def __init__(self, global_share, countries, country_emissions):
+        self.global_years = global_share['Year'].to_numpy()
+        self.global_share = global_share[self.share_column].to_numpy()
+        self.global_emissions = global_share['Annual CO₂ emissions'].to_numpy()
+
+        # the global share is stored once per year and broadcast onto a country's years on lookup
+        self.first_year = int(self.global_years.min())
+        self._share_by_year = np.full(int(self.global_years.max()) - self.first_year + 1, np.nan)
+        self._share_by_year[self.global_years - self.first_year] = self.global_share
+
+        self.entities = countries['Entity'].tolist()
+        self._ids = dict(zip(countries['Entity'], countries['country_id']))
+        self._emissions = EntitySeries(country_emissions, 'Annual CO₂ emissions', entity_column='country_id')
+
+    def country(self, entity):
+        # years outside the global series have no share (NaN)
+        years, emissions, _ = self._emissions.series(self._ids[entity])
+        offsets = years - self.first_year
+        known = (offsets >= 0) & (offsets < len(self._share_by_year))
+        share = np.full(len(years), np.nan)
+        share[known] = self._share_by_year[offsets[known]]
+        return years, share, emissions
+
+    def world(self):
+        return self.global_years, self.global_share, self.global_emissions
+
+
+def renewables_trends(global_share, countries, country_emissions):
+    return RenewablesTrends(global_share, countries, country_emissions)
+
+
+def name_lookup(table):
+    # every canonical name and alias -> its id; a name that is also another entity's alias
+    # keeps its own id, and an alias shared by two entities goes to the first
+    aliases = table['aliases'].str.split(ALIAS_SEPARATOR, regex=False).explode()
+    aliases = aliases[aliases.notna() & (aliases != '')]
+    ids = table['entity_id'].to_numpy()
+    names = pd.concat([pd.Series(ids, index=table['name'].to_numpy()),
+                       pd.Series(ids[aliases.index], index=aliases.to_numpy())])
+    return names[~names.index.duplicated()]
+
+
+class EntityTable:
+
+    def __init__(self, entities):
+        self._ids = name_lookup(entities).to_dict()
+        self._names = dict(zip(entities['entity_id'], entities['name'].astype(str)))
+
+    def __contains__(self, name):
+        return name in self._ids
+
+    def canonical(self, name):
+        # the name a country is stored under in the processed datasets, for any of its spellings
+        return self._names[self._ids[name]]
+
+
+def entity_table(entities):
+    return EntityTable(entities)
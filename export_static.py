@@ -0,0 +1,246 @@
+
+####Static Figure Export####
+
+# Renders every figure the dashboard can show, for every selector value, into a bundle a
+# plain static file server can host without any Python: one JSON file (the Plotly specs
+# plus the numbers the page prints next to them) and one HTML page per variant, a single
+# shared copy of plotly.js, an index page and manifest.json. Variants are every option
+# of every selector (section_figures.SELECTORS), a grid of CO2 / temperature year ranges
+# at both resolutions and the figures that have no selector. They are built by the same
+# code the app uses and rendered on a process pool.
+#
+# A variant's fingerprint covers the content hashes of the datasets it reads and of the
+# figure code, so a rerun only re-renders variants whose inputs changed (--force renders
+# all of them) and removes the files of variants that no longer exist.
+#
+# usage: python export_static.py [--out-dir DIR] [--jobs N] [--year-step N] [--force]
+
+import argparse
+import concurrent.futures
+import datetime
+import hashlib
+import html
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+import figures
+import section_figures
+from data_loader import dataset_version, load_dataset, load_derived
+from weather_cube import disaster_cube
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+OUT_DIR = os.path.join(ROOT_DIR, 'static')
+MANIFEST_NAME = 'manifest.json'
+PLOTLY_JS = 'plotly.min.js'
+
+# a change to any of these re-renders every variant
+CODE_FILES = ['figures.py', 'section_figures.py', 'downsample.py', 'entity_index.py', 'trend_engine.py',
+              'weather_cube.py', 'scenarios.py', 'schema.py', 'export_static.py']
+
+RESOLUTIONS = ['Annual', 'Monthly']
+
+
+def _total_disaster_figure():
+    return figures.disaster_figure(load_derived(section_figures.WEATHER, disaster_cube))
+
+
+# figures without a selector -> (datasets, figure(s))
+STATIC = {
+    'projections_overview': ('projected_impacts', section_figures.scenario_overview),
+    'treemap': ('co2gdp', lambda: load_derived('co2gdp', figures.emissions_treemap)),
+    'weather_total': (section_figures.WEATHER, _total_disaster_figure),
+}
+
+
+def year_ranges(step):
+    # every (start, end) pair on a `step`-year grid spanning the data, both ends included
+    years = load_dataset('co2temp')['Year']
+    first, last = int(years.min()), int(years.max())
+    points = sorted(set(range(first, last + 1, step)) | {last})
+    return [(start, end) for i, start in enumerate(points) for end in points[i + 1:]]
+
+
+def variants(year_step):
+    # (section, option, datasets); options are plain values so they can be pickled
+    found = [(name, None, datasets) for name, (datasets, _) in STATIC.items()]
+    for start, end in year_ranges(year_step):
+        for resolution in RESOLUTIONS:
+            found.append(('co2_temperature', (start, end, resolution), section_figures.co2_temperature_datasets(resolution)))
+    for selector, (datasets, options, _) in section_figures.SELECTORS.items():
+        found += [(selector, _plain(option), datasets) for option in options()]
+    return found
+
+
+def _plain(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _slug(text):
+    return re.sub(r'[^A-Za-z0-9]+', '-', str(text)).strip('-').lower() or 'all'
+
+
+def variant_id(section, option):
+    # readable and unique: names that only differ in punctuation get different hashes
+    if option is None:
+        return f'{section}/all'
+    label = '-'.join(map(str, option)) if isinstance(option, tuple) else option
+    digest = hashlib.sha256(repr(option).encode()).hexdigest()[:6]
+    return f'{section}/{_slug(label)}-{digest}'
+
+
+def code_hash():
+    import plotly
+    digest = hashlib.sha256(plotly.__version__.encode())
+    for name in CODE_FILES:
+        with open(os.path.join(ROOT_DIR, name), 'rb') as handle:
+            digest.update(handle.read())
+    return digest.hexdigest()
+
+
+def fingerprint(code, section, option, datasets):
+    return hashlib.sha256(json.dumps([code, section, repr(option), dataset_version(datasets)]).encode()).hexdigest()
+
+
+def build(section, option):
+    # (figures, values printed next to them) of one variant
+    if section in STATIC:
+        result = STATIC[section][1]()
+        values = {}
+    elif section == 'co2_temperature':
+        start, end, resolution = option
+        window = section_figures.co2_temperature_window((start, end), resolution)
+        result = section_figures.co2_temperature((start, end), resolution, window)
+        values = {'correlation': window[3]['r']}
+    else:
+        result = section_figures.SELECTORS[section][2](option)
+        values = {}
+        if section == 'paris_agreement':
+            result, values['net_difference'] = result
+
+    built = list(result) if isinstance(result, tuple) else [result]
+    return built, {key: _json_value(value) for key, value in values.items()}
+
+
+def _json_value(value):
+    value = _plain(value)
+    return None if isinstance(value, float) and np.isnan(value) else value
+
+
+def _write_atomic(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w', encoding='utf-8') as handle:
+        handle.write(text)
+    os.replace(path + '.tmp', path)
+
+
+def _page(title, built, values, plotly_src):
+    parts = [f'<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n<title>{html.escape(title)}</title>\n'
+             f'<script src="{plotly_src}"></script>\n</head>\n<body>\n<h2>{html.escape(title)}</h2>\n']
+    for key, value in values.items():
+        parts.append(f'<p><b>{html.escape(key.replace("_", " ").capitalize())}:</b> {html.escape(str(value))}</p>\n')
+    for fig in built:
+        parts.append(fig.to_html(full_html=False, include_plotlyjs=False))
+    parts.append('\n</body>\n</html>\n')
+    return ''.join(parts)
+
+
+def render(task):
+    # runs in a worker process: builds one variant and writes its JSON and HTML files
+    section, option, out_dir = task
+    start = time.perf_counter()
+    built, values = build(section, option)
+    name = variant_id(section, option)
+    payload = {'section': section, 'option': option, 'values': values,
+               'figures': [json.loads(fig.to_json()) for fig in built]}
+    _write_atomic(os.path.join(out_dir, name + '.json'), json.dumps(payload, ensure_ascii=False))
+    title = section.replace('_', ' ') if option is None else f'{section.replace("_", " ")}: {option}'
+    _write_atomic(os.path.join(out_dir, name + '.html'), _page(title, built, values, f'../{PLOTLY_JS}'))
+    return name, time.perf_counter() - start
+
+
+def load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {'variants': {}}
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def write_index(out_dir, manifest):
+    sections = {}
+    for name, entry in sorted(manifest['variants'].items()):
+        sections.setdefault(entry['section'], []).append((name, entry))
+    parts = ['<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n<title>Dashboard figures</title>\n</head>\n<body>\n']
+    for section, entries in sections.items():
+        parts.append(f'<h2>{html.escape(section.replace("_", " "))}</h2>\n<ul>\n')
+        for name, entry in entries:
+            label = 'all' if entry['option'] is None else entry['option']
+            parts.append(f'<li><a href="{html.escape(name)}.html">{html.escape(str(label))}</a></li>\n')
+        parts.append('</ul>\n')
+    parts.append('</body>\n</html>\n')
+    _write_atomic(os.path.join(out_dir, 'index.html'), ''.join(parts))
+
+
+def export(out_dir=OUT_DIR, jobs=None, year_step=10, force=False):
+    jobs = jobs or os.cpu_count() or 1
+    start = time.perf_counter()
+    manifest = load_manifest(out_dir)
+    previous = manifest['variants']
+    code = code_hash()
+
+    current, pending = {}, []
+    for section, option, datasets in variants(year_step):
+        name = variant_id(section, option)
+        entry = {'section': section, 'option': option, 'fingerprint': fingerprint(code, section, option, datasets),
+                 'json': name + '.json', 'html': name + '.html'}
+        current[name] = entry
+        old = previous.get(name)
+        if (force or old is None or old['fingerprint'] != entry['fingerprint']
+                or not all(os.path.exists(os.path.join(out_dir, entry[kind])) for kind in ('json', 'html'))):
+            pending.append((section, option, out_dir))
+
+    # variants that no longer exist (e.g. a country dropped from the data)
+    for name in set(previous) - set(current):
+        for kind in ('json', 'html'):
+            path = os.path.join(out_dir, previous[name][kind])
+            if os.path.exists(path):
+                os.remove(path)
+
+    plotly_path = os.path.join(out_dir, PLOTLY_JS)
+    if force or not os.path.exists(plotly_path):
+        from plotly.offline import get_plotlyjs
+        _write_atomic(plotly_path, get_plotlyjs())
+
+    print(f'{len(current)} variants, {len(pending)} to render on {min(jobs, max(len(pending), 1))} processes')
+    if jobs > 1 and len(pending) > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            rendered = list(executor.map(render, pending, chunksize=max(1, len(pending) // (jobs * 8))))
+    else:
+        rendered = [render(task) for task in pending]
+
+    manifest = {'generated': datetime.datetime.now().isoformat(timespec='seconds'), 'code': code, 'variants': current}
+    _write_atomic(os.path.join(out_dir, MANIFEST_NAME), json.dumps(manifest, ensure_ascii=False, indent=1))
+    write_index(out_dir, manifest)
+    print(f'rendered {len(rendered)} variants ({sum(seconds for _, seconds in rendered):.1f}s summed) '
+          f'in {time.perf_counter() - start:.1f}s; bundle in {out_dir}')
+    return [name for name, _ in rendered]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export every dashboard figure variant as static JSON / HTML.')
+    parser.add_argument('--out-dir', default=OUT_DIR)
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--year-step', type=int, default=10, help='spacing of the CO2 / temperature year-range grid')
+    parser.add_argument('--force', action='store_true', help='re-render every variant')
+    args = parser.parse_args()
+    if (args.jobs is not None and args.jobs < 1) or args.year_step < 1:
+        parser.error('--jobs and --year-step must be at least 1')
+    export(args.out_dir, jobs=args.jobs, year_step=args.year_step, force=args.force)
+
+
+if __name__ == '__main__':
+    main()
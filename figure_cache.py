@@ -0,0 +1,105 @@
+
+####Figure Cache####
+
+# Size-bounded LRU cache of built figures keyed by (section, selector values, dataset
+# version), shared by every session in the server process. Figures are handed out as-is,
+# so callers must not modify a cached figure (st.plotly_chart only serializes it).
+# LRUCache itself caches any built value (queries.py keeps its results in one).
+# Lookups from live sessions are timestamped so background work (the start-up warm-up)
+# can wait for the server to go quiet; threads doing such work call mark_background().
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from data_loader import dataset_version
+
+_background = threading.local()
+
+
+def mark_background():
+    _background.active = True
+
+
+class LRUCache:
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.last_live = 0.0
+        self._live_builds = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, builder):
+        live = not getattr(_background, 'active', False)
+        with self._lock:
+            if live:
+                self.last_live = time.monotonic()
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            self._live_builds += live
+
+        # built outside the lock so a slow figure doesn't block lookups for other sections
+        try:
+            value = builder()
+        finally:
+            if live:
+                with self._lock:
+                    self._live_builds -= 1
+                    self.last_live = time.monotonic()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def idle_seconds(self):
+        # time since a live session last used the cache; 0 while one is building a figure
+        with self._lock:
+            return 0.0 if self._live_builds else time.monotonic() - self.last_live
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'maxsize': self.maxsize, 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+FigureCache = LRUCache
+
+figure_cache = FigureCache(maxsize=int(os.environ.get('DASHBOARD_FIGURE_CACHE_SIZE', 256)))
+
+
+def figure_key(section, datasets, params):
+    return (section, tuple(params), dataset_version(datasets))
+
+
+def cached_figure(section, datasets, params, builder):
+    return figure_cache.get_or_build(figure_key(section, datasets, params), builder)
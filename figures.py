@@ -0,0 +1,519 @@
+
+####Dashboard Figures####
+
+# Figure builders for every dashboard section. They only take data and selector values
+# and return Plotly figures, so they can be cached and reused outside of Streamlit.
+# Plotly is imported on first use, so importing this module stays cheap.
+
+import importlib
+
+import numpy as np
+import pandas as pd
+
+import downsample
+
+
+class _Deferred:
+
+    # stands in for a module until one of its attributes is first looked up
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(importlib.import_module(self._name), attr)
+
+
+px = _Deferred('plotly.express')
+go = _Deferred('plotly.graph_objects')
+
+
+def make_subplots(*args, **kwargs):
+    from plotly.subplots import make_subplots
+    return make_subplots(*args, **kwargs)
+
+
+def line_trace(x, y, rows=None, **kwargs):
+    # a go.Scatter line, thinned and drawn with WebGL when the series is long. `rows` are
+    # the rows downsample.line_indices kept for another series over the same x, so both
+    # lines keep the same points; a per-point `text` array is thinned with the line
+    if rows is None:
+        rows = downsample.line_indices(x, y)
+    if rows is not None:
+        x, y = np.asarray(x)[rows], np.asarray(y)[rows]
+        if np.ndim(kwargs.get('text')):
+            kwargs['text'] = np.asarray(kwargs['text'])[rows]
+    trace = go.Scattergl if downsample.use_webgl(len(x)) else go.Scatter
+    return trace(x=x, y=y, **kwargs)
+
+###############################CARBON DIOXIDE-TEMPERATURE##########################################################
+
+def co2_temperature_scatter(filtered_data, temperature_column, trend_stats):
+    fig = px.scatter(filtered_data, x='Annual CO₂ emissions', y=temperature_column,
+                     labels={'Annual CO₂ emissions': 'Global CO2 Emissions (tonnes)', temperature_column: 'Temperature Anomaly (°C)'},
+                     title='Correlation between Global CO2 Emissions and Temperature Anomaly',
+                     color_continuous_scale=px.colors.diverging.Tealrose, color='Year',
+                     render_mode=downsample.render_mode(len(filtered_data)))
+    if trend_stats['n'] >= 2:
+        trend_x = np.array([filtered_data['Annual CO₂ emissions'].min(), filtered_data['Annual CO₂ emissions'].max()])
+        fig.add_trace(go.Scatter(x=trend_x, y=trend_stats['intercept'] + trend_stats['slope'] * trend_x,
+                                 mode='lines', name='OLS trendline', showlegend=False,
+                                 hovertemplate=f"<b>OLS trendline</b><br>Temperature Anomaly = {trend_stats['slope']:g} * CO2 Emissions + {trend_stats['intercept']:g}"
+                                               f"<br>R<sup>2</sup>={trend_stats['r'] ** 2:f}<extra></extra>"))
+    fig.update_layout(plot_bgcolor='rgba(0,0,0,0)')
+    return fig
+
+
+def co2_line(annual_filtered_data):
+    annual_filtered_data = downsample.frame(annual_filtered_data, 'Year', 'Annual CO₂ emissions')
+    fig_co2 = px.line(annual_filtered_data, x='Year', y='Annual CO₂ emissions', title='Global CO2 Emissions Over Time', line_shape='linear',
+                      render_mode=downsample.render_mode(len(annual_filtered_data)))
+    fig_co2.update_traces(line_color='green')
+    return fig_co2
+
+
+def temperature_line(filtered_data, temperature_column):
+    if 'Month' in filtered_data:
+        x, y = downsample.line(filtered_data['Year'] + (filtered_data['Month'] - 0.5) / 12, filtered_data[temperature_column])
+        fig_temp = px.line(x=x, y=y,
+                           labels={'x': 'Year', 'y': temperature_column},
+                           title='Global Temperature Anomalies Over Time', line_shape='linear', render_mode=downsample.render_mode(len(x)))
+    else:
+        filtered_data = downsample.frame(filtered_data, 'Year', temperature_column)
+        fig_temp = px.line(filtered_data, x='Year', y=temperature_column, title='Global Temperature Anomalies Over Time', line_shape='linear',
+                           render_mode=downsample.render_mode(len(filtered_data)))
+    fig_temp.update_traces(line_color='red')
+    return fig_temp
+
+##########
+
+colors = {
+    "SSP1-26": "rgb(44, 160, 44)",  # Green
+    "SSP2-45": "rgb(31, 119, 180)",  # Blue
+    "SSP5-Baseline": "rgb(255, 127, 200)"  # Orange
+}
+
+
+def scenario_overview_figures(engine):
+    fig_emissions = go.Figure()
+    fig_temperature = go.Figure()
+
+    for scenario in engine.names:
+        years, emissions = engine.series(scenario, 'CO2 Emissions')
+        temperature_years, temperature = engine.series(scenario, 'Temperature Change')
+
+        fig_emissions.add_trace(go.Scatter(
+            x=years, y=emissions,
+            mode='lines+markers',
+            name=scenario,
+            line=dict(color=colors.get(scenario, 'gray'), width=2),  # Use 'gray' as default if not in dictionary
+            marker=dict(size=10, line=dict(width=2, color='DarkSlateGrey'))
+        ))
+
+        fig_temperature.add_trace(go.Scatter(
+            x=temperature_years, y=temperature,
+            mode='lines+markers',
+            name=scenario,
+            line=dict(color=colors.get(scenario, 'gray'), width=2),  # Use 'gray' as default if not in dictionary
+            marker=dict(size=10, line=dict(width=2, color='DarkSlateGrey'))
+        ))
+
+    common_layout_args = {
+        'xaxis': {'title': 'Year'},
+        'margin': {'l': 40, 'r': 40, 't': 40, 'b': 40},
+        'legend': {'title': 'Scenarios', 'x': 0.02, 'y': 1, 'xanchor': 'left'},
+        'hovermode': 'x'
+    }
+
+    fig_emissions.update_layout(
+        **common_layout_args,
+        yaxis={'title': 'CO2 Emissions (metric tons)'},
+        title='CO2 Emissions Over Time for Each Scenario'
+    )
+
+    fig_temperature.update_layout(
+        **common_layout_args,
+        yaxis={'title': 'Temperature Change (°C)'},
+        title='Temperature Change Over Time for Each Scenario'
+    )
+
+    return fig_emissions, fig_temperature
+
+
+def scenario_detail_figure(engine, selected_scenario):
+    years, emissions = engine.series(selected_scenario, 'CO2 Emissions')
+    temperature_years, temperature = engine.series(selected_scenario, 'Temperature Change')
+    fig_detailed = go.Figure()
+
+    fig_detailed.add_trace(go.Scatter(
+        x=years, y=emissions,
+        mode='lines+markers',
+        name='CO2 Emissions (metric tons)',
+        line=dict(color='RoyalBlue', width=4),
+        marker=dict(size=10, symbol='circle')
+    ))
+
+    fig_detailed.add_trace(go.Scatter(
+        x=temperature_years, y=temperature,
+        mode='lines+markers',
+        name='Temperature Change (°C)',
+        line=dict(color='Crimson', width=4, dash='dash'),
+        marker=dict(size=10, symbol='x'),
+        yaxis='y2'
+    ))
+
+    fig_detailed.update_layout(
+        title=f'CO2 Emissions vs. Temperature Change for the {selected_scenario} Scenario',
+        xaxis_title='Year',
+        yaxis=dict(
+            title='CO2 Emissions (metric tons)',
+            titlefont=dict(color='RoyalBlue'),
+            tickfont=dict(color='RoyalBlue'),
+            showgrid=True,
+            gridcolor='RoyalBlue'
+        ),
+        yaxis2=dict(
+            title='Temperature Change (°C)',
+            titlefont=dict(color='Crimson'),
+            tickfont=dict(color='Crimson'),
+            overlaying='y',
+            side='right',
+            gridcolor='Crimson'
+        ),
+        legend_title="Measurements"
+    )
+
+    return fig_detailed
+
+
+def scenario_blend_figure(engine, weights):
+    # annual pathway of a weighted mix of scenarios, over the scenarios it is mixed from
+    blended = engine.blend(weights)
+    shares = engine.weight_vector(weights)
+    label = ' + '.join(f'{share:.0%} {name}' for name, share in zip(engine.names, shares) if share > 0)
+    fig_blend = go.Figure()
+
+    for name, share in zip(engine.names, shares):
+        if share > 0:
+            years, emissions = engine.series(name, 'CO2 Emissions', annual=True)
+            fig_blend.add_trace(go.Scatter(
+                x=years, y=emissions,
+                mode='lines',
+                name=f'{name} CO2 Emissions',
+                line=dict(color=colors.get(name, 'gray'), width=1, dash='dot')
+            ))
+
+    fig_blend.add_trace(go.Scatter(
+        x=engine.annual_years, y=blended['CO2 Emissions'],
+        mode='lines',
+        name='Blended CO2 Emissions (metric tons)',
+        line=dict(color='RoyalBlue', width=4)
+    ))
+
+    fig_blend.add_trace(go.Scatter(
+        x=engine.annual_years, y=blended['Temperature Change'],
+        mode='lines',
+        name='Blended Temperature Change (°C)',
+        line=dict(color='Crimson', width=4, dash='dash'),
+        yaxis='y2'
+    ))
+
+    fig_blend.update_layout(
+        title=f'Blended Scenario: {label}',
+        xaxis_title='Year',
+        yaxis=dict(
+            title='CO2 Emissions (metric tons)',
+            titlefont=dict(color='RoyalBlue'),
+            tickfont=dict(color='RoyalBlue')
+        ),
+        yaxis2=dict(
+            title='Temperature Change (°C)',
+            titlefont=dict(color='Crimson'),
+            tickfont=dict(color='Crimson'),
+            overlaying='y',
+            side='right'
+        ),
+        legend_title="Measurements",
+        hovermode='x'
+    )
+
+    return fig_blend
+
+###############################ECONOMY##########################################################
+
+hex_colors = [
+    '#1f77b4',
+    '#ff7f0e',
+    '#2ca02c',
+    '#d62728',
+    '#9467bd',
+    '#8c564b',
+    '#e377c2',
+    '#7f7f7f',
+    '#bcbd22',
+    '#17becf'
+]
+
+
+def assign_colors(data_frame, column, color_list):
+    unique_countries = data_frame[column].unique()
+    color_map = {country: color_list[i % len(color_list)] for i, country in enumerate(unique_countries)}
+    return color_map
+
+
+def create_bar_chart(data, x_column, y_column, title, color_map):
+    fig = px.bar(data, x=x_column, y=y_column, title=title,
+                 color=x_column, color_discrete_map=color_map)
+    return fig
+
+
+# bar chart -> (value column, title, sorted by that column)
+gdp_bars = {
+    'CO2 Emissions': ('Annual CO₂ emissions', 'Annual CO₂ emissions by Country for 2022 in Tonnes', False),
+    'GDP by Country': ('GDP (current US$)', 'GDP by Country', True),
+    'Population by Country': ('Population, total', 'Population by Country', True),
+}
+
+
+def gdp_bar_figure(gdp_emissions_data, bar):
+    color_map = assign_colors(gdp_emissions_data, 'Entity', hex_colors)
+    column, title, sort = gdp_bars[bar]
+    data = gdp_emissions_data.sort_values(by=column, ascending=False) if sort else gdp_emissions_data
+    return create_bar_chart(data, 'Entity', column, title, color_map)
+
+
+def gdp_bar_figures(gdp_emissions_data):
+    return tuple(gdp_bar_figure(gdp_emissions_data, bar) for bar in gdp_bars)
+
+
+def gdp_scatter_figure(gdp_emissions_data, axis):
+    return _population_scatter(gdp_emissions_data) if axis == 'Population' else _gdp_scatter(gdp_emissions_data)
+
+
+def gdp_scatter_figures(gdp_emissions_data):
+    return _gdp_scatter(gdp_emissions_data), _population_scatter(gdp_emissions_data)
+
+
+def _gdp_scatter(gdp_emissions_data):
+    fig4 = px.scatter(
+        gdp_emissions_data, x='GDP (current US$)', y='Annual CO₂ emissions', text='Entity',
+        title='CO2 Emissions vs GDP (Log Scale)', log_x=True, log_y=True,
+        labels={'GDP (current US$)': 'GDP (current US$)', 'Annual CO₂ emissions': 'CO2 Emissions'},
+        size='Annual CO₂ emissions', size_max=40, color='Entity',  # Adjusted size_max and color
+        hover_data=['GDP (current US$)', 'Annual CO₂ emissions'])
+    fig4.update_traces(textposition='middle left')
+    fig4.update_layout(legend_title_text='Country', yaxis_range=[8.6, 10.4])
+    return fig4
+
+
+def _population_scatter(gdp_emissions_data):
+    fig5 = px.scatter(
+        gdp_emissions_data, x='Population, total', y='Annual CO₂ emissions', text='Entity',
+        title='CO2 Emissions vs Population (Log Scale)', log_x=True, log_y=True,
+        labels={'Population, total': 'Population', 'Annual CO₂ emissions': 'CO2 Emissions'},
+        size='Annual CO₂ emissions', size_max=30, color='Entity',  # Adjusted size_max and color
+        hover_data=['Population, total', 'Annual CO₂ emissions'])
+    fig5.update_traces(textposition='middle right')
+    fig5.update_layout(legend_title_text='Country', yaxis_range=[8.6, 10.4])
+    return fig5
+
+
+def emissions_treemap(gdp_emissions_data):
+    gdp_reload = gdp_emissions_data.assign(**{'Economic Classification': pd.cut(
+        gdp_emissions_data['GDP (current US$)'] / gdp_emissions_data['Population, total'],
+        bins=[0, 1000, 10000, 100000],
+        labels=["Low Income", "Middle Income", "High Income"],
+        right=False)})
+    filtered_data = gdp_reload[['Entity','Annual CO₂ emissions', 'Economic Classification', 'GDP (current US$)', 'Population, total']]
+    # plain labels: the treemap groups by its path columns, which as categoricals warns about observed=
+    filtered_data = filtered_data.astype({'Entity': object, 'Economic Classification': object})
+
+    fig = px.treemap(
+        filtered_data,
+        path=['Entity', 'Economic Classification'],
+        values='Annual CO₂ emissions',
+        color='Annual CO₂ emissions',
+        hover_data=['GDP (current US$)', 'Population, total', 'Annual CO₂ emissions', 'Economic Classification'],
+        color_continuous_scale='reds',
+        title="Treemap of the Top 10 Emitters")
+
+    fig.update_layout(
+        margin=dict(t=50, l=25, r=25, b=25),
+        font=dict(size=12, color="RebeccaPurple"))
+
+    return fig
+
+###RENEWABLES###########################
+
+def plot_dual_axis_trends(trends, country=None):
+    if country:
+        years, renewables_share, emissions = trends.country(country)
+    else:
+        years, renewables_share, emissions = trends.world()
+
+    fig = go.Figure()
+
+    fig.add_trace(
+        line_trace(
+            years, renewables_share,
+            name='Renewable Energy Share (%)',
+            mode='lines+markers',
+            line=dict(color='green', dash='dash'),
+            marker=dict(symbol='circle', size=8)
+        )
+    )
+
+    fig.add_trace(
+        line_trace(
+            years, emissions,
+            name='CO₂ Emissions (tons)',
+            mode='lines+markers',
+            yaxis='y2',
+            line=dict(color='magenta', dash='dot'),
+            marker=dict(symbol='square', size=8)
+        )
+    )
+
+    fig.update_layout(
+        xaxis_title="Year",
+        yaxis=dict(
+            title="Global Renewable Energy Share (%)",
+            gridcolor='blue',
+            title_font=dict(size=14),
+            tickfont=dict(size=12)
+        ),
+        yaxis2=dict(
+            title="CO₂ Emissions (tons)",
+            overlaying='y',
+            side='right',
+            gridcolor='red',
+            title_font=dict(size=14),
+            tickfont=dict(size=12)
+        ),
+        title="Worldwide Renewable Energy Share vs Country CO₂ Emissions Over Time",
+        title_font=dict(size=16, family='Helvetica'),
+        legend=dict(x=0.1, y=1.1, orientation='h'),
+        hovermode='closest'
+    )
+
+    return fig
+
+#############################################################################
+
+def deforestation_annual_means(region_rows):
+    # yearly mean tree cover loss and emissions over a region's countries
+    return region_rows.groupby('year').agg({'tree_cover_loss': 'mean', 'co2_emissions': 'mean'}).reset_index()
+
+
+def deforestation_figures(deforestdata, selected_region):
+    filtered_data = deforestdata[deforestdata['region'] == selected_region]
+
+    scatter_fig = px.scatter(filtered_data, x='tree_cover_loss', y='co2_emissions',
+                             size='tree_cover_loss', color='country',
+                             hover_data=['year', 'country'], title=f"CO2 Emissions vs. Tree Cover Loss in {selected_region}",
+                             render_mode=downsample.render_mode(len(filtered_data)))
+    scatter_fig.update_layout(legend_title_text='Country')
+    scatter_fig.update_xaxes(title_text='Tree Cover Loss (ha)')
+    scatter_fig.update_yaxes(title_text='CO2 Emissions (tonnes)')
+
+    annual_data = deforestation_annual_means(filtered_data)
+
+    line_fig = go.Figure()
+
+    line_fig.add_trace(go.Scatter(x=annual_data['year'], y=annual_data['tree_cover_loss'],
+                                  mode='lines+markers',
+                                  name='Tree Cover Loss',
+                                  line=dict(color='blue', width=2),
+                                  marker=dict(size=10, opacity=0.8)))
+
+    line_fig.add_trace(go.Scatter(x=annual_data['year'], y=annual_data['co2_emissions'],
+                                  mode='lines+markers',
+                                  name='CO2 Emissions',
+                                  line=dict(color='red', width=2),
+                                  marker=dict(size=10, opacity=0.8),
+                                  yaxis='y2'))
+
+    line_fig.update_layout(
+        title=f"Progression of Tree Cover Loss and CO2 Emissions Over Time in {selected_region}",
+        xaxis_title="Year",
+        yaxis=dict(
+            title="Tree Cover Loss (ha)",
+            type='log',
+            showgrid=True,
+            gridwidth=1,
+            gridcolor='lightgrey'
+        ),
+        yaxis2=dict(
+            title='CO2 Emissions (tonnes)',
+            overlaying='y',
+            side='right',
+            type='log'
+        ),
+        legend_title="Metric",
+        plot_bgcolor='white',
+        font=dict(family="Helvetica, Arial, sans-serif", size=14, color="black")
+    )
+
+    return scatter_fig, line_fig
+
+##############################################################################################
+
+def disaster_figure(weather_cube, disaster_type=None):
+    years, emissions, events = weather_cube.annual(disaster_type)
+
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    if disaster_type is None:
+        fig.add_trace(line_trace(years, emissions, name='Total CO2 Emissions',
+                                 line=dict(color='blue', width=2)), secondary_y=False)
+        fig.add_trace(line_trace(years, events, name='Total Disaster Frequency',
+                                 line=dict(color='red', width=2, dash='dash')), secondary_y=True)
+        title = 'Total Disaster Weather Frequency vs CO2 Emissions Over Time'
+    else:
+        fig.add_trace(line_trace(years, emissions, name='CO2 Emissions',
+                                 line=dict(color='blue', width=2)), secondary_y=False)
+        fig.add_trace(line_trace(years, events, name=f'{disaster_type} Frequency',
+                                 line=dict(color='red', width=2, dash='dash')), secondary_y=True)
+        title = f'Total CO2 Emissions and {disaster_type} Frequency Over Time'
+
+    fig.update_layout(
+        title=title,
+        xaxis_title='Year',
+        yaxis_title='CO2 Emissions',
+        yaxis2_title='Disaster Frequency',
+        plot_bgcolor='white',
+        xaxis=dict(showgrid=True, gridcolor='lightgrey'),
+        yaxis=dict(showgrid=True, gridcolor='lightgrey'),
+        legend=dict(x=0.01, y=0.99, bordercolor='Black', borderwidth=1)
+    )
+    fig.update_xaxes(tickangle=-45)
+    return fig
+
+###############################################################################
+
+def create_emission_plot(series_index, country):
+    years, emissions, sma_3 = series_index.series(country, start_year=2017)
+
+    fig = go.Figure()
+    # one thinning pass; the moving average is drawn on the same years
+    rows = downsample.line_indices(years, emissions)
+    fig.add_trace(line_trace(years, emissions, rows=rows, mode='lines+markers',
+                             name='Actual Emissions', line=dict(color='blue', width=3),
+                             marker=dict(color='blue', size=7, line=dict(width=3, color='DarkSlateGrey')),
+                             text=emissions,
+                             hoverinfo='text+x+y'))
+
+    fig.add_trace(line_trace(years, sma_3, rows=rows, mode='lines',
+                             name='3-Year SMA', line=dict(color='red', dash='dash', width=2.5),
+                             hoverinfo='skip'))
+
+    fig.update_layout(title=f'Annual CO₂ Emissions for {country} since enactment of Paris Agreement',
+                      xaxis_title='Year',
+                      yaxis_title='CO2 Emissions (tonnes)',
+                      font=dict(color='white', size=12),
+                      legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
+
+    net_difference = series_index.net_change(country)
+    if net_difference is None:
+        net_difference = "Data not available for full range"
+
+    return fig, net_difference
@@ -0,0 +1,129 @@
+
+####Section Instrumentation####
+
+# Opt-in timing of each dashboard section's load, transform and figure-build phases:
+# wall time, memory allocated (tracemalloc) and rows processed. Set DASHBOARD_PROFILE=1
+# to enable it (DASHBOARD_PROFILE=time skips the allocation tracking, which slows every
+# allocation). The latest record of every phase is kept per session for the debug
+# sidebar and every record is appended as a JSON line to DASHBOARD_PROFILE_LOG. When
+# disabled, profile.phase() returns one shared no-op context manager.
+
+import datetime
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+
+MODE = os.environ.get('DASHBOARD_PROFILE', '').strip().lower()
+ENABLED = MODE not in ('', '0', 'false', 'no', 'off')
+TRACK_MEMORY = ENABLED and MODE != 'time'
+LOG_PATH = os.environ.get('DASHBOARD_PROFILE_LOG') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'logs', 'profile.jsonl')
+
+_log_lock = threading.Lock()
+
+if TRACK_MEMORY and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+class _NullPhase:
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def add_rows(self, rows):
+        pass
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _NullProfiler:
+
+    def phase(self, section, name):
+        return _NULL_PHASE
+
+    def records(self):
+        return []
+
+
+NULL_PROFILER = _NullProfiler()
+
+
+class Phase:
+
+    def __init__(self, profiler, section, name):
+        self.profiler = profiler
+        self.section = section
+        self.name = name
+        self.rows = 0
+
+    def add_rows(self, rows):
+        self.rows += int(rows)
+
+    def __enter__(self):
+        if TRACK_MEMORY:
+            # tracemalloc is process-wide, so concurrent sessions show up in each other's numbers
+            self._memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        seconds = time.perf_counter() - self._start
+        record = {
+            'time': datetime.datetime.now().isoformat(timespec='milliseconds'),
+            'session': self.profiler.session,
+            'section': self.section,
+            'phase': self.name,
+            'seconds': round(seconds, 6),
+            'rows': self.rows,
+        }
+        if TRACK_MEMORY:
+            current, peak = tracemalloc.get_traced_memory()
+            record['allocated_bytes'] = max(peak - self._memory, 0)
+            record['retained_bytes'] = current - self._memory
+        if exc_type is not None:
+            record['error'] = exc_type.__name__
+        self.profiler.add(record)
+        return False
+
+
+class Profiler:
+
+    def __init__(self, session=None, log_path=LOG_PATH):
+        self.session = session or uuid.uuid4().hex[:12]
+        # resolved once, so a bare file name still has a directory to create
+        self.log_path = os.path.abspath(log_path) if log_path else log_path
+        self._latest = {}
+
+    def phase(self, section, name):
+        return Phase(self, section, name)
+
+    def add(self, record):
+        self._latest[(record['section'], record['phase'])] = record
+        if self.log_path:
+            line = json.dumps(record, ensure_ascii=False) + '\n'
+            with _log_lock:
+                os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+                with open(self.log_path, 'a', encoding='utf-8') as handle:
+                    handle.write(line)
+
+    def records(self):
+        return list(self._latest.values())
+
+
+def profiler(state):
+    # one profiler per browser session, kept in its session state
+    if not ENABLED:
+        return NULL_PROFILER
+    if 'profiler' not in state:
+        state['profiler'] = Profiler()
+    return state['profiler']
@@ -0,0 +1,132 @@
+
+####Dashboard Queries####
+
+# The numbers the dashboard shows, as plain functions that return JSON-ready dicts, for
+# other services to use without Streamlit (directly, or over HTTP via query_server.py).
+# They are computed from the same shared datasets and derived structures as the app.
+# run() / run_json() look a query up by name, convert its string parameters and cache the
+# result in an LRU keyed by the parameters and the content hashes of the datasets it reads.
+
+import inspect
+import json
+import os
+
+import numpy as np
+
+from data_loader import dataset_version, load_dataset, load_derived
+from entity_index import entity_table, paris_agreement_series
+from figure_cache import LRUCache
+from figures import deforestation_annual_means
+from trend_engine import annual_co2_temperature, monthly_co2_temperature
+from weather_cube import disaster_cube
+
+WEATHER = ('weather_event_counts', 'weather_emissions')
+
+query_cache = LRUCache(maxsize=int(os.environ.get('DASHBOARD_QUERY_CACHE_SIZE', 1024)))
+
+
+def _number(value):
+    value = value.item() if isinstance(value, np.generic) else value
+    return None if isinstance(value, float) and np.isnan(value) else value
+
+
+def co2_temperature_correlation(start, end, resolution='Annual'):
+    if resolution not in ('Annual', 'Monthly'):
+        raise ValueError("resolution must be 'Annual' or 'Monthly'")
+    if resolution == 'Monthly':
+        trend = load_derived('co2temp_monthly', monthly_co2_temperature)
+    else:
+        trend = load_derived('co2temp', annual_co2_temperature)
+    stats = trend.stats(start, end)
+    return {'start': start, 'end': end, 'resolution': resolution,
+            **{key: _number(value) for key, value in stats.items()}}
+
+
+def paris_net_change(country=None):
+    series = load_derived('paris_agreement', paris_agreement_series)
+    if country is not None:
+        # other spellings of a country (e.g. 'Russian Federation') resolve to its canonical name
+        entities = load_derived('entities', entity_table)
+        country = entities.canonical(country) if country in entities else country
+        if country not in series:
+            raise ValueError(f'unknown country {country!r}')
+    first_year, last_year = series.change_years
+    countries = series.entities if country is None else [country]
+    return {'first_year': first_year, 'last_year': last_year,
+            'net_change': {str(name): _number(series.net_change(name)) for name in countries}}
+
+
+def deforestation_means(region=None):
+    deforestdata = load_dataset('deforestation')
+    regions = [str(name) for name in deforestdata['region'].unique()]
+    if region is not None and region not in regions:
+        raise ValueError(f'unknown region {region!r}')
+    result = {}
+    for name in regions if region is None else [region]:
+        annual = deforestation_annual_means(deforestdata[deforestdata['region'] == name])
+        result[name] = [{key: _number(value) for key, value in row.items()} for row in annual.to_dict('records')]
+    return result
+
+
+def disaster_counts(disaster_type=None):
+    cube = load_derived(WEATHER, disaster_cube)
+    if disaster_type is not None and disaster_type not in cube.disaster_types:
+        raise ValueError(f'unknown disaster type {disaster_type!r}')
+    years, emissions, events = cube.annual(disaster_type)
+    return {'disaster_type': disaster_type, 'years': years.tolist(), 'events': events.tolist(),
+            'co2_emissions': emissions.tolist()}
+
+
+# name -> (function, datasets it reads, parameter -> type)
+QUERIES = {
+    'co2_temperature_correlation': (co2_temperature_correlation, ('co2temp', 'co2temp_monthly'),
+                                    {'start': int, 'end': int, 'resolution': str}),
+    'paris_net_change': (paris_net_change, ('paris_agreement', 'entities'), {'country': str}),
+    'deforestation_means': (deforestation_means, 'deforestation', {'region': str}),
+    'disaster_counts': (disaster_counts, WEATHER, {'disaster_type': str}),
+}
+
+
+def _arguments(name, params):
+    if name not in QUERIES:
+        raise KeyError(name)
+    _, _, types = QUERIES[name]
+    unknown = set(params) - set(types)
+    if unknown:
+        raise ValueError(f'unknown parameters {sorted(unknown)} for {name}')
+    try:
+        return {key: types[key](value) for key, value in params.items()}
+    except ValueError:
+        raise ValueError(f'invalid parameters {params} for {name}') from None
+
+
+def _call(name, arguments):
+    function, _, _ = QUERIES[name]
+    try:
+        inspect.signature(function).bind(**arguments)
+    except TypeError as error:
+        # a missing required parameter; a TypeError raised inside the query is a bug, not a bad request
+        raise ValueError(str(error)) from None
+    return function(**arguments)
+
+
+def _key(kind, name, arguments):
+    return (kind, name, tuple(sorted(arguments.items())), dataset_version(QUERIES[name][1]))
+
+
+def run(name, params=None):
+    # params may be strings (as from a URL) or already typed values
+    arguments = _arguments(name, params or {})
+    return query_cache.get_or_build(_key('result', name, arguments), lambda: _call(name, arguments))
+
+
+def run_json(name, params=None):
+    # the encoded response body, cached next to the result
+    arguments = _arguments(name, params or {})
+    return query_cache.get_or_build(_key('json', name, arguments),
+                                    lambda: json.dumps(run(name, arguments), ensure_ascii=False).encode())
+
+
+def describe():
+    return {name: {'parameters': {key: kind.__name__ for key, kind in types.items()}, 'datasets': datasets}
+            for name, (_, datasets, types) in QUERIES.items()}
@@ -0,0 +1,131 @@
+
+####Query HTTP Server####
+
+# Serves the dashboard queries (queries.py) as JSON on a local port, for services that
+# want the numbers without scraping Streamlit. One asyncio event loop handles every
+# connection (HTTP/1.1 keep-alive included); queries run on a small thread pool so the
+# loop never blocks. Responses are cached by queries.run_json, and identical queries
+# that arrive while one is already being computed wait for that computation instead of
+# starting their own.
+#
+#   GET /                         the available queries and their parameters
+#   GET /<query>?param=value...   a query result, e.g. /paris_net_change?country=France
+#   GET /stats                    request, coalescing and cache counters
+#
+# usage: python query_server.py [--host HOST] [--port PORT] [--threads N]
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import urllib.parse
+
+import queries
+
+STATUS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+MAX_HEADERS = 100
+
+
+def _json(value):
+    return json.dumps(value, ensure_ascii=False).encode()
+
+
+class QueryServer:
+
+    def __init__(self, threads=4):
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=threads, thread_name_prefix='query')
+        self.counters = {'requests': 0, 'computed': 0, 'coalesced': 0, 'errors': 0}
+        self._in_flight = {}
+
+    async def query(self, name, params):
+        key = (name, tuple(sorted(params.items())))
+        future = self._in_flight.get(key)
+        if future is None:
+            self.counters['computed'] += 1
+            future = asyncio.get_running_loop().run_in_executor(self.executor, queries.run_json, name, params)
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.counters['coalesced'] += 1
+        # shielded, so a client that disconnects does not cancel the query for the others
+        return await asyncio.shield(future)
+
+    async def respond(self, method, target):
+        if method not in ('GET', 'HEAD'):
+            return 405, _json({'error': f'{method} not allowed'})
+        url = urllib.parse.urlsplit(target)
+        name = url.path.strip('/')
+        if name == '':
+            return 200, _json(queries.describe())
+        if name == 'stats':
+            return 200, _json({**self.counters, 'in_flight': len(self._in_flight), 'cache': queries.query_cache.stats()})
+        if name not in queries.QUERIES:
+            return 404, _json({'error': f'unknown query {name!r}'})
+        params = dict(urllib.parse.parse_qsl(url.query, keep_blank_values=True))
+        try:
+            return 200, await self.query(name, params)
+        except ValueError as error:
+            return 400, _json({'error': str(error)})
+        except Exception as error:
+            self.counters['errors'] += 1
+            return 500, _json({'error': f'{type(error).__name__}: {error}'})
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                for _ in range(MAX_HEADERS):
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    status, body, method, version = 400, _json({'error': 'malformed request'}), 'GET', 'HTTP/1.0'
+                else:
+                    method, target, version = parts
+                    self.counters['requests'] += 1
+                    status, body = await self.respond(method, target)
+
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                head = (f'HTTP/1.1 {status} {STATUS[status]}\r\n'
+                        f'Content-Type: application/json; charset=utf-8\r\n'
+                        f'Content-Length: {len(body)}\r\n'
+                        f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+                writer.write(head.encode('latin-1') + (b'' if method == 'HEAD' else body))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f'serving dashboard queries on http://{host}:{port}/')
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the dashboard queries as JSON over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--threads', type=int, default=4, help='threads computing queries')
+    args = parser.parse_args()
+    if args.threads < 1:
+        parser.error('--threads must be at least 1')
+    try:
+        asyncio.run(QueryServer(args.threads).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
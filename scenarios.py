@@ -0,0 +1,98 @@
+
+####Scenario Engine####
+
+# Every projection scenario as one row of a (scenario x year) array per variable, so
+# nothing loops over scenarios. The decadal points are interpolated to annual resolution
+# for all complete scenarios at once with one matrix product (each annual year is a
+# weighted pair of its neighbouring decades); a scenario missing some decadal points is
+# interpolated over the points it has and left NaN outside them. A blend of scenarios is
+# one more product of the weights with the annual arrays. Blending temperature pathways
+# linearly is an approximation, which is how the dashboard presents it.
+
+import numpy as np
+import pandas as pd
+
+VARIABLES = ('CO2 Emissions', 'Temperature Change')
+
+
+def interpolation_matrix(years, annual_years):
+    # (annual x decadal) weights for linear interpolation between the surrounding points
+    matrix = np.zeros((len(annual_years), len(years)))
+    if len(years) == 1:
+        matrix[:, 0] = 1.0
+        return matrix
+    left = np.clip(np.searchsorted(years, annual_years, side='right') - 1, 0, len(years) - 2)
+    t = (annual_years - years[left]) / (years[left + 1] - years[left])
+    rows = np.arange(len(annual_years))
+    matrix[rows, left] = 1.0 - t
+    matrix[rows, left + 1] = t
+    return matrix
+
+
+def interpolate(grid, years, annual_years):
+    # (scenario x decadal) -> (scenario x annual); a NaN point would spread through the
+    # product to the whole row, so rows with gaps are interpolated over their own points
+    annual = grid @ interpolation_matrix(years, annual_years).T
+    for row in np.flatnonzero(np.isnan(grid).any(axis=1)):
+        present = ~np.isnan(grid[row])
+        annual[row] = np.nan
+        if present.any():
+            known = years[present]
+            inside = (annual_years >= known[0]) & (annual_years <= known[-1])
+            annual[row, inside] = np.interp(annual_years[inside], known, grid[row, present])
+    return annual
+
+
+class ScenarioEngine:
+
+    def __init__(self, projected_data):
+        # scenarios in the order they first appear, as the per-scenario filter had them
+        codes, names = pd.factorize(np.asarray(projected_data['Scenario'], dtype=object))
+        self.names = [str(name) for name in names]
+        self._index = {name: i for i, name in enumerate(self.names)}
+        self.years, year_codes = np.unique(projected_data['Year'].to_numpy(dtype=np.int64), return_inverse=True)
+
+        self.values = {}
+        for variable in VARIABLES:
+            grid = np.full((len(self.names), len(self.years)), np.nan)
+            grid[codes, year_codes] = projected_data[variable].to_numpy(dtype=np.float64)
+            self.values[variable] = grid
+
+        self.annual_years = np.arange(self.years[0], self.years[-1] + 1) if len(self.years) else self.years
+        self.annual = {variable: interpolate(grid, self.years, self.annual_years)
+                       for variable, grid in self.values.items()}
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def series(self, name, variable, annual=False):
+        # (years, values) of one scenario; decadal points without a value are left out
+        row = (self.annual if annual else self.values)[variable][self._index[name]]
+        years = self.annual_years if annual else self.years
+        present = ~np.isnan(row)
+        return years[present], row[present]
+
+    def weight_vector(self, weights):
+        # {scenario: weight} -> weights over all scenarios, normalized to sum to 1
+        vector = np.zeros(len(self.names))
+        for name, weight in weights.items():
+            if name not in self._index:
+                raise ValueError(f'unknown scenario {name!r}')
+            if weight < 0:
+                raise ValueError('scenario weights must not be negative')
+            vector[self._index[name]] = weight
+        total = vector.sum()
+        if total <= 0:
+            raise ValueError('at least one scenario needs a positive weight')
+        return vector / total
+
+    def blend(self, weights):
+        # {variable: annual values} of one weighted blend; only the weighted scenarios take
+        # part, so the blend is NaN just where one of them has no value
+        vector = self.weight_vector(weights)
+        used = vector > 0
+        return {variable: vector[used] @ annual[used] for variable, annual in self.annual.items()}
+
+
+def scenario_engine(projected_data):
+    return ScenarioEngine(projected_data)
@@ -0,0 +1,82 @@
+
+####Processed Dataset Schema####
+
+# The column types of every processed dataset in data/. The pipeline checks each output
+# against it and writes the typed frame to the columnar copy; the app's loader applies
+# it again to whatever it reads, so both paths hand out the same compact frames. Label
+# columns are categoricals (equality and isin filters compare integer codes), years and
+# counts are the smallest integer type that holds them, and float32 is only used for
+# indicators no chart plots or sums: plotted values stay float64 so the figures ship
+# exactly the numbers in the CSVs.
+
+import numpy as np
+import pandas as pd
+
+LABEL = 'category'
+YEAR = 'int16'
+OTHER = '*'  # every column not listed by name
+
+CO2 = 'Annual CO₂ emissions'
+
+SCHEMAS = {
+    'co2temp.csv': {'Year': YEAR, CO2: 'float64', 'Annual Temperature Anomaly': 'float64'},
+    'co2temp-monthly.csv': {'Year': YEAR, CO2: 'float64', 'Month': 'int8', 'Monthly Temperature Anomaly': 'float64'},
+    'projected_impacts.csv': {'Scenario': LABEL, 'Year': YEAR, 'CO2 Emissions': 'float64', 'Temperature Change': 'float64'},
+    'co2gdp.csv': {'Entity': LABEL, 'Code': LABEL, 'Year': YEAR, CO2: 'float64', 'GDP (current US$)': 'float64',
+                   'Population, total': 'float64', OTHER: 'float32'},
+    'renewables-global.csv': {'Year': YEAR, 'Share of modern renewables in final energy consumption, World': 'float64',
+                              'Units': LABEL, CO2: 'float64'},
+    # one row per country: every label is unique, so category codes would only add a lookup
+    'renewables-countries.csv': {'country_id': 'int32', 'Entity': 'object', 'Code': 'object'},
+    'renewables-emissions.csv': {'country_id': 'int32', 'Year': YEAR, CO2: 'float64'},
+    'deforestation-co2-dataset.csv': {'year': YEAR, 'country': LABEL, 'region': LABEL,
+                                      'tree_cover_loss': 'float64', 'co2_emissions': 'float64'},
+    'weather-co2.csv': {'year': YEAR, 'country': LABEL, 'natural disaster': LABEL, 'co2 emissions': 'float64'},
+    'weather-event-counts.csv': {'country': LABEL, 'year': YEAR, 'natural disaster': LABEL, 'events': 'int16'},
+    'weather-emissions.csv': {'country': LABEL, 'year': YEAR, 'co2 emissions': 'float64'},
+    'paris_agreement.csv': {'Entity': LABEL, 'Year': YEAR, CO2: 'float64'},
+    # the entity dimension: ids are row positions, names and codes are unique per row
+    'entities.csv': {'entity_id': 'int32', 'code': 'object', 'name': 'object', 'aliases': 'object', 'kind': LABEL,
+                     'region_id': 'int32'},
+}
+
+
+def column_types(name, columns):
+    schema = SCHEMAS[name]
+    missing = [column for column in schema if column != OTHER and column not in columns]
+    extra = [column for column in columns if column not in schema]
+    if missing:
+        raise ValueError(f'{name}: missing columns {missing}')
+    if extra and OTHER not in schema:
+        raise ValueError(f'{name}: columns not in its schema {extra}')
+    return {column: schema.get(column, schema.get(OTHER)) for column in columns}
+
+
+def _cast(name, column, values, dtype):
+    if dtype == LABEL:
+        return values.astype(LABEL)
+    dtype = np.dtype(dtype)
+    if dtype.kind in 'iu':
+        if values.isna().any():
+            raise ValueError(f'{name}: {column} has missing values but is declared {dtype}')
+        # a cast would truncate fractions silently
+        if values.dtype.kind == 'f' and (values != np.floor(values)).any():
+            raise ValueError(f'{name}: {column} has non-integral values but is declared {dtype}')
+        limits = np.iinfo(dtype)
+        if len(values) and (values.min() < limits.min or values.max() > limits.max):
+            raise ValueError(f'{name}: {column} does not fit in {dtype}')
+    return values.astype(dtype)
+
+
+def apply(name, frame):
+    # the frame typed as its schema says; columns already of the right type are kept
+    # as they are (no copy), so a frame that was read typed passes straight through
+    typed = None
+    for column, dtype in column_types(name, frame.columns).items():
+        values = frame[column]
+        matches = isinstance(values.dtype, pd.CategoricalDtype) if dtype == LABEL else values.dtype == np.dtype(dtype)
+        if not matches:
+            if typed is None:
+                typed = frame.copy(deep=False)
+            typed[column] = _cast(name, column, values, dtype)
+    return frame if typed is None else typed
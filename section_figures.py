@@ -0,0 +1,119 @@
+
+####Selector Figures####
+
+# The figures behind every selector of the dashboard, each built through the shared
+# figure cache under the key the app looks it up by. SELECTORS pairs every selector's
+# options with its figure and the datasets it is built from, so the start-up warm-up
+# (warmup.py) and the static exporter (export_static.py) can enumerate them and build
+# exactly what the app shows.
+
+import figures
+from data_loader import load_dataset, load_derived
+from entity_index import paris_agreement_series, renewables_trends
+from figure_cache import cached_figure
+from scenarios import scenario_engine
+from trend_engine import annual_co2_temperature, monthly_co2_temperature
+from weather_cube import disaster_cube
+
+RENEWABLES = ('renewables_global', 'renewables_countries', 'renewables_emissions')
+WEATHER = ('weather_event_counts', 'weather_emissions')
+
+
+def co2_temperature_datasets(resolution):
+    return ('co2temp', 'co2temp_monthly') if resolution == 'Monthly' else 'co2temp'
+
+
+def co2_temperature_window(year_range, resolution):
+    # (annual rows, rows at the chosen resolution, temperature column, trend statistics);
+    # both frames are sorted by year, so a year window is a contiguous row slice
+    annual_trend = load_derived('co2temp', annual_co2_temperature)
+    annual_rows = annual_trend.rows(*year_range)
+    annual_filtered_data = load_dataset('co2temp').iloc[annual_rows[0]:annual_rows[1]]
+
+    if resolution == 'Monthly':
+        trend = load_derived('co2temp_monthly', monthly_co2_temperature)
+        rows = trend.rows(*year_range)
+        filtered_data = load_dataset('co2temp_monthly').iloc[rows[0]:rows[1]]
+        temperature_column = 'Monthly Temperature Anomaly'
+    else:
+        trend = annual_trend
+        filtered_data = annual_filtered_data
+        temperature_column = 'Annual Temperature Anomaly'
+    return annual_filtered_data, filtered_data, temperature_column, trend.stats(*year_range)
+
+
+def co2_temperature(year_range, resolution, window=None):
+    annual_filtered_data, filtered_data, temperature_column, trend_stats = window or co2_temperature_window(year_range, resolution)
+    return cached_figure('co2_temperature', co2_temperature_datasets(resolution), (year_range, resolution), lambda: (
+        figures.co2_temperature_scatter(filtered_data, temperature_column, trend_stats),
+        figures.co2_line(annual_filtered_data),
+        figures.temperature_line(filtered_data, temperature_column)))
+
+
+def scenario_overview():
+    engine = load_derived('projected_impacts', scenario_engine)
+    return cached_figure('projections_overview', 'projected_impacts', (), lambda: figures.scenario_overview_figures(engine))
+
+
+def scenario_detail(scenario):
+    engine = load_derived('projected_impacts', scenario_engine)
+    return cached_figure('projections', 'projected_impacts', (scenario,),
+                         lambda: figures.scenario_detail_figure(engine, scenario))
+
+
+def scenario_blend(weights):
+    # weights: {scenario: weight}; equal mixes at different scales share a figure
+    engine = load_derived('projected_impacts', scenario_engine)
+    shares = tuple(engine.weight_vector(weights).round(6))
+    return cached_figure('projection_blend', 'projected_impacts', (shares,),
+                         lambda: figures.scenario_blend_figure(engine, dict(zip(engine.names, shares))))
+
+
+def economy_bar(bar):
+    gdp_emissions_data = load_dataset('co2gdp')
+    return cached_figure('economy_bar', 'co2gdp', (bar,), lambda: figures.gdp_bar_figure(gdp_emissions_data, bar))
+
+
+def economy_scatter(axis):
+    gdp_emissions_data = load_dataset('co2gdp')
+    return cached_figure('economy_scatter', 'co2gdp', (axis,), lambda: figures.gdp_scatter_figure(gdp_emissions_data, axis))
+
+
+def renewables(country):
+    trends = load_derived(RENEWABLES, renewables_trends)
+    return cached_figure('renewables', RENEWABLES, (country,),
+                         lambda: figures.plot_dual_axis_trends(trends, country if country != 'Global' else None))
+
+
+def deforestation(region):
+    deforestdata = load_dataset('deforestation')
+    return cached_figure('deforestation', 'deforestation', (region,),
+                         lambda: figures.deforestation_figures(deforestdata, region))
+
+
+def disaster_type(disaster_type):
+    cube = load_derived(WEATHER, disaster_cube)
+    return cached_figure('weather', WEATHER, (disaster_type,), lambda: figures.disaster_figure(cube, disaster_type))
+
+
+def paris_agreement(country):
+    series = load_derived('paris_agreement', paris_agreement_series)
+    return cached_figure('paris_agreement', 'paris_agreement', (country,),
+                         lambda: figures.create_emission_plot(series, country))
+
+
+# selector -> (datasets, its options, the figure for one option)
+SELECTORS = {
+    'projections': ('projected_impacts', lambda: load_derived('projected_impacts', scenario_engine).names, scenario_detail),
+    'economy_bar': ('co2gdp', lambda: list(figures.gdp_bars), economy_bar),
+    'economy_scatter': ('co2gdp', lambda: ['GDP', 'Population'], economy_scatter),
+    'renewables': (RENEWABLES, lambda: ['Global'] + load_derived(RENEWABLES, renewables_trends).entities, renewables),
+    'deforestation': ('deforestation', lambda: list(load_dataset('deforestation')['region'].unique()), deforestation),
+    'weather': (WEATHER, lambda: list(load_derived(WEATHER, disaster_cube).disaster_types), disaster_type),
+    'paris_agreement': ('paris_agreement', lambda: list(load_derived('paris_agreement', paris_agreement_series).entities),
+                        paris_agreement),
+}
+
+
+def options(selector):
+    return SELECTORS[selector][1]()
@@ -0,0 +1,119 @@
+
+####Shared Column Store####
+
+# Places every processed dataset once in memory-mapped files that all the Streamlit
+# server processes on a host attach to. The first process to load a version of a
+# dataset writes it as one .npy file per column under data/.shared/<dataset>-<version>/,
+# the version hashing its content and declared schema (categoricals as their integer
+# codes plus their categories); every process then maps those files read-only and wraps
+# them in a DataFrame without copying, so the columns of every worker's frame are views
+# of the same page-cache pages. Resident memory therefore grows with the number of
+# distinct dataset versions, not with the number of workers or sessions. Plain string
+# columns have no fixed-width layout to map and are rebuilt in each process; the schema
+# keeps them to small tables.
+
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+
+META_NAME = 'columns.json'
+
+
+def version_dir(name, version, store_dir):
+    return os.path.join(store_dir, f'{name}-{version[:16]}')
+
+
+def _write(frame, target, stamp):
+    # written under a temporary name and renamed into place, so a concurrent reader
+    # either sees the whole directory or none of it
+    staging = f'{target}.tmp-{uuid.uuid4().hex[:8]}'
+    os.makedirs(staging)
+    try:
+        columns = []
+        for i, column in enumerate(frame.columns):
+            values = frame[column]
+            entry = {'name': column, 'file': f'{i}.npy'}
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                entry.update(kind='category', categories=values.cat.categories.tolist(), ordered=bool(values.cat.ordered))
+                array = values.cat.codes.to_numpy()
+            elif values.dtype == object:
+                entry.update(kind='object', values=values.tolist())
+                array = None
+            else:
+                entry['kind'] = 'array'
+                array = values.to_numpy()
+            if array is not None:
+                np.save(os.path.join(staging, entry['file']), np.ascontiguousarray(array), allow_pickle=False)
+            columns.append(entry)
+        with open(os.path.join(staging, META_NAME), 'w', encoding='utf-8') as handle:
+            json.dump({'rows': len(frame), 'stamp': stamp, 'columns': columns}, handle, ensure_ascii=False)
+        os.rename(staging, target)
+    except OSError:
+        # another process got there first (the target exists), or the store is not writable
+        shutil.rmtree(staging, ignore_errors=True)
+        if not os.path.exists(os.path.join(target, META_NAME)):
+            raise
+
+
+def _stamp(path):
+    try:
+        with open(os.path.join(path, META_NAME), encoding='utf-8') as handle:
+            return json.load(handle).get('stamp', 0)
+    except (OSError, ValueError):
+        return None
+
+
+def _remove_stale(name, target, stamp):
+    # versions stored from an older source than this one; a process still on an older
+    # source never removes a newer version, so processes on different versions do not
+    # keep deleting each other's. Processes still mapping a removed version keep their
+    # pages until they reload.
+    store_dir = os.path.dirname(target)
+    for entry in os.listdir(store_dir):
+        path = os.path.join(store_dir, entry)
+        if entry.startswith(f'{name}-') and path != target and '.tmp-' not in entry:
+            other = _stamp(path)
+            if other is not None and other < stamp:
+                shutil.rmtree(path, ignore_errors=True)
+
+
+def attach(target):
+    with open(os.path.join(target, META_NAME), encoding='utf-8') as handle:
+        meta = json.load(handle)
+    columns = {}
+    for entry in meta['columns']:
+        if entry['kind'] == 'object':
+            columns[entry['name']] = pd.Series(entry['values'], dtype=object)
+            continue
+        # a plain ndarray view of the mapping, so nothing downstream sees the memmap subclass
+        array = np.load(os.path.join(target, entry['file']), mmap_mode='r', allow_pickle=False).view(np.ndarray)
+        if entry['kind'] == 'category':
+            array = pd.Categorical.from_codes(array, categories=pd.Index(entry['categories']),
+                                              ordered=entry['ordered'], validate=False)
+        columns[entry['name']] = array
+    return pd.DataFrame(columns, index=pd.RangeIndex(meta['rows']), copy=False)
+
+
+def load(name, version, reader, store_dir, stamp=0):
+    # the dataset `name` at `version` (its content and schema hash), mapped from the
+    # store; reader() is only called when this version has not been stored yet. `stamp`
+    # orders versions (the source's modification time). Falls back to the frame reader()
+    # returns when the store cannot be written or read.
+    target = version_dir(name, version, store_dir)
+    try:
+        if not os.path.exists(os.path.join(target, META_NAME)):
+            frame = reader()
+            try:
+                os.makedirs(store_dir, exist_ok=True)
+                _write(frame, target, stamp)
+                _remove_stale(name, target, stamp)
+            except OSError:
+                return frame
+        return attach(target)
+    except OSError:
+        # e.g. removed by a process that just stored a newer version
+        return reader()
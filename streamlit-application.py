@@ -1,3 +1,5 @@
+import os
+
 import streamlit as st
 
 st.set_page_config(layout='wide', page_title='An Exploration of Emission Trends and Climate Trajectories')
@@ -9,533 +11,342 @@ st.write('The data and visualizations presented here show key relationships betw
 st.write('***Side Note: For every visualization below, hover your mouse over the data points to get specific values and more details!***')
 st.markdown('---')
 
-import pandas as pd
-import plotly.express as px
-import numpy as np
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-
-##DATA-LOADING##
-
-co2_temp_data = pd.read_csv('data/co2temp.csv')
-projected_data = pd.read_csv('data/projected_impacts.csv')
-gdp_emissions_data = pd.read_csv('data/co2gdp.csv')
-renewablesdata = pd.read_csv('data/renewables.csv')
-deforestdata = pd.read_csv('data/deforestation-co2-dataset.csv')
-weatherdata = pd.read_csv('data/weather-co2.csv')
-df = pd.read_csv('data/paris_agreement.csv')
+import figures
+import instrumentation
+import section_figures
+import warmup
+from data_loader import load_dataset, load_derived
+from figure_cache import figure_cache
+from entity_index import paris_agreement_series, renewables_trends
+from weather_cube import disaster_cube
+
+# Every section runs as a fragment: changing a widget reruns only the section that owns
+# it. Figures that do not depend on a widget are built once per loaded dataset; figures
+# that do are kept in a bounded LRU keyed by the widget values and dataset version.
+fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or (lambda func: func)
+
+# load / transform / figure timings per section; a no-op unless DASHBOARD_PROFILE is set
+profile = instrumentation.profiler(st.session_state)
+
+# Lazy mode (the default; DASHBOARD_LAZY=0 turns it off) only builds what is on screen:
+# tabs become a selector that builds the chosen chart alone, and the section groups
+# below the CO2 / temperature overview only run once the visitor opens them.
+LAZY = os.environ.get('DASHBOARD_LAZY', '1').strip().lower() not in ('0', 'false', 'no', 'off')
+
+# DASHBOARD_WARMUP=1 pre-builds every selector's figures in the background (see warmup.py)
+if warmup.ENABLED:
+    warmup.start()
+
+
+def views(label, options, key):
+    # (container, option) pairs: every tab when eager, just the selected option when lazy
+    if not LAZY:
+        return list(zip(st.tabs(options), options))
+    selected = st.radio(label, options, horizontal=True, label_visibility='collapsed', key=key)
+    return [(st.container(), selected)]
+
+
+@fragment
+def lazy_group(key, sections):
+    if st.toggle('Show this section', key=key):
+        for section in sections:
+            section()
+
+
+def section_group(title, key, sections):
+    st.markdown('---')
+    st.subheader(title)
+    if LAZY:
+        lazy_group(key, sections)
+    else:
+        for section in sections:
+            section()
+
 ###############################CARBON DIOXIDE-TEMPERATURE##########################################################
 
-st.subheader('**CO2 Emissions and Global Temperature Trends**')
+@fragment
+def co2_temperature_section():
+    with profile.phase('co2_temperature', 'load') as phase:
+        co2_temp_data = load_dataset('co2temp')
+        phase.add_rows(len(co2_temp_data))
 
-st.write('***Relationship Between Emissions and Temperature for the Previous Century***') 
+    st.subheader('**CO2 Emissions and Global Temperature Trends**')
 
-st.write('***Select Year Range***')
-year_range = st.slider('Year Range', int(co2_temp_data['Year'].min()), int(co2_temp_data['Year'].max()), (1970, 2020))
+    st.write('***Relationship Between Emissions and Temperature for the Previous Century***')
 
-filtered_data = co2_temp_data[(co2_temp_data['Year'] >= year_range[0]) & (co2_temp_data['Year'] <= year_range[1])]
+    st.write('***Select Year Range***')
+    year_range = st.slider('Year Range', int(co2_temp_data['Year'].min()), int(co2_temp_data['Year'].max()), (1970, 2020))
+    resolution = st.radio('Temperature Resolution', ['Annual', 'Monthly'], horizontal=True)
 
-correlation = filtered_data['Annual CO₂ emissions'].corr(filtered_data['Annual Temperature Anomaly'])
+    with profile.phase('co2_temperature', 'transform') as phase:
+        window = section_figures.co2_temperature_window(year_range, resolution)
+        _, filtered_data, _, trend_stats = window
+        correlation = trend_stats['r']
+        phase.add_rows(len(filtered_data))
 
-fig = px.scatter(filtered_data, x='Annual CO₂ emissions', y='Annual Temperature Anomaly', trendline='ols',
-                 labels={'Annual CO₂ emissions': 'Global CO2 Emissions (tonnes)', 'Annual Temperature Anomaly': 'Temperature Anomaly (°C)'},
-                 title='Correlation between Global CO2 Emissions and Temperature Anomaly',
-                 color_continuous_scale=px.colors.diverging.Tealrose, color='Year')
-fig.update_layout(plot_bgcolor='rgba(0,0,0,0)')
+    with profile.phase('co2_temperature', 'figures'):
+        fig, fig_co2, fig_temp = section_figures.co2_temperature(year_range, resolution, window)
 
-st.write('The relationship between global carbon dioxide emissions and yearly temperature anomaly can be shown through the a numerical correlation of the two values over a specified time period. This is the **correlation coefficient** shown below.')
-st.write('As the number more closely approaches 1, the relationship becomes more directly proportional between the temperature anomaly and co2 emissions per year.')
-st.write(f'**Correlation coefficient: {correlation:.2f}**')
+    st.write('The relationship between global carbon dioxide emissions and yearly temperature anomaly can be shown through the a numerical correlation of the two values over a specified time period. This is the **correlation coefficient** shown below.')
+    st.write('As the number more closely approaches 1, the relationship becomes more directly proportional between the temperature anomaly and co2 emissions per year.')
+    st.write(f'**Correlation coefficient: {correlation:.2f}**')
 
-st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(fig, use_container_width=True)
 
-st.write('The plots below show the global carbon dioxide and temperature progressions over time.')
+    st.write('The plots below show the global carbon dioxide and temperature progressions over time.')
 
-fig_co2 = px.line(filtered_data, x='Year', y='Annual CO₂ emissions', title='Global CO2 Emissions Over Time', line_shape='linear', render_mode='svg')
-fig_co2.update_traces(line_color='green')
-fig_temp = px.line(filtered_data, x='Year', y='Annual Temperature Anomaly', title='Global Temperature Anomalies Over Time', line_shape='linear', render_mode='svg')
-fig_temp.update_traces(line_color='red')
-col1, col2 = st.columns(2)
-col1.plotly_chart(fig_co2, use_container_width=True)
-col2.plotly_chart(fig_temp, use_container_width=True)
+    col1, col2 = st.columns(2)
+    col1.plotly_chart(fig_co2, use_container_width=True)
+    col2.plotly_chart(fig_temp, use_container_width=True)
 
 ##########
-st.markdown('---')
-st.write('***Climate Change Projections to the Year 2100***')
 
-st.write('Below there are three scenarios which represent different socio-economic standards for the future and the impact of these standards on the carbon dioxide emissions and global temperature.')
-st.write('> SSP1-26  > A ***sustainable and equitable*** global future with low greenhouse gas emissions.')
-st.write('> SSP2-45  > A ***moderate effort*** at climate mitigation into the future.')
-st.write('> SSP5-Baseline  > A future with high greenhouse gas emissions and ***minimal climate restrictions***.')
+@fragment
+def projections_section():
+    with profile.phase('projections', 'load') as phase:
+        projected_data = load_dataset('projected_impacts')
+        phase.add_rows(len(projected_data))
+
+    st.markdown('---')
+    st.write('***Climate Change Projections to the Year 2100***')
+
+    st.write('Below there are three scenarios which represent different socio-economic standards for the future and the impact of these standards on the carbon dioxide emissions and global temperature.')
+    st.write('> SSP1-26  > A ***sustainable and equitable*** global future with low greenhouse gas emissions.')
+    st.write('> SSP2-45  > A ***moderate effort*** at climate mitigation into the future.')
+    st.write('> SSP5-Baseline  > A future with high greenhouse gas emissions and ***minimal climate restrictions***.')
+
+    with profile.phase('projections', 'figures'):
+        fig_emissions, fig_temperature = section_figures.scenario_overview()
+
+    st.plotly_chart(fig_emissions, use_container_width=True)
+
+    st.plotly_chart(fig_temperature, use_container_width=True)
+
+    selected_scenario = st.selectbox("Select a Scenario for Detailed View", options=section_figures.options('projections'))
+
+    with profile.phase('projections', 'detail figure'):
+        fig_detailed = section_figures.scenario_detail(selected_scenario)
+
+    st.plotly_chart(fig_detailed, use_container_width=True)
+
+    st.write('***Blend Your Own Scenario***')
+    st.write('Move the sliders to weight the scenarios; the chart shows the year-by-year pathway of the weighted mix, interpolated between the decadal projections.')
+
+    scenario_names = section_figures.options('projections')
+    slider_columns = st.columns(len(scenario_names))
+    weights = {name: column.slider(name, 0, 100, 50, step=5, format='%d%%', key=f'blend_{name}')
+               for name, column in zip(scenario_names, slider_columns)}
 
-colors = {
-    "SSP1-26": "rgb(44, 160, 44)",  # Green
-    "SSP2-45": "rgb(31, 119, 180)",  # Blue
-    "SSP5-Baseline": "rgb(255, 127, 200)"  # Orange
+    if sum(weights.values()) == 0:
+        st.info('Give at least one scenario a weight above 0% to see the blend.')
+    else:
+        with profile.phase('projections', 'blend figure'):
+            fig_blend = section_figures.scenario_blend(weights)
+        st.plotly_chart(fig_blend, use_container_width=True)
+
+###############################ECONOMY##########################################################
+
+# tab -> caption above its chart
+bar_views = {
+    'CO2 Emissions': '***Carbon Dioxide Emissions for 2022 of the Top 10 Emitters***',
+    'GDP by Country': '***GDP of the Top 10 Emitters for 2022***',
+    'Population by Country': '***Population of the Top 10 Emitter for 2022***',
 }
 
-fig_emissions = go.Figure()
-fig_temperature = go.Figure()
-
-for scenario in projected_data['Scenario'].unique():
-    scenario_data = projected_data[projected_data['Scenario'] == scenario]
-    
-    fig_emissions.add_trace(go.Scatter(
-        x=scenario_data['Year'], y=scenario_data['CO2 Emissions'],
-        mode='lines+markers',
-        name=scenario,
-        line=dict(color=colors.get(scenario, 'gray'), width=2),  # Use 'gray' as default if not in dictionary
-        marker=dict(size=10, line=dict(width=2, color='DarkSlateGrey'))
-    ))
-    
-    fig_temperature.add_trace(go.Scatter(
-        x=scenario_data['Year'], y=scenario_data['Temperature Change'],
-        mode='lines+markers',
-        name=scenario,
-        line=dict(color=colors.get(scenario, 'gray'), width=2),  # Use 'gray' as default if not in dictionary
-        marker=dict(size=10, line=dict(width=2, color='DarkSlateGrey'))
-    ))
-
-common_layout_args = {
-    'xaxis': {'title': 'Year'},
-    'margin': {'l': 40, 'r': 40, 't': 40, 'b': 40},
-    'legend': {'title': 'Scenarios', 'x': 0.02, 'y': 1, 'xanchor': 'left'},
-    'hovermode': 'x'
+# tab -> (x axis, caption, takeaway)
+scatter_views = {
+    'CO2 Emissions vs. GDP': ('GDP', '***CO2 Emissions vs GDP Scatter Plot***',
+                              ' > Higher emissions come from countries with higher GDP for this subset.'),
+    'CO2 Emissions vs. Population': ('Population', '***CO2 Emissions vs Population Scatter Plot***',
+                                     ' > There is a general trend of higher emissions being seen from countries with larger populations for this subset.'),
 }
 
-fig_emissions.update_layout(
-    **common_layout_args,
-    yaxis={'title': 'CO2 Emissions (metric tons)'},
-    title='CO2 Emissions Over Time for Each Scenario'
-)
-
-fig_temperature.update_layout(
-    **common_layout_args,
-    yaxis={'title': 'Temperature Change (°C)'},
-    title='Temperature Change Over Time for Each Scenario'
-)
-
-st.plotly_chart(fig_emissions, use_container_width=True)
-
-st.plotly_chart(fig_temperature, use_container_width=True)
-
-selected_scenario = st.selectbox("Select a Scenario for Detailed View", options=projected_data['Scenario'].unique())
-
-filtered_data = projected_data[projected_data['Scenario'] == selected_scenario]
-fig_detailed = go.Figure()
-
-fig_detailed.add_trace(go.Scatter(
-    x=filtered_data['Year'], y=filtered_data['CO2 Emissions'],
-    mode='lines+markers',
-    name='CO2 Emissions (metric tons)',
-    line=dict(color='RoyalBlue', width=4),
-    marker=dict(size=10, symbol='circle')
-))
-
-fig_detailed.add_trace(go.Scatter(
-    x=filtered_data['Year'], y=filtered_data['Temperature Change'],
-    mode='lines+markers',
-    name='Temperature Change (°C)',
-    line=dict(color='Crimson', width=4, dash='dash'),
-    marker=dict(size=10, symbol='x'),
-    yaxis='y2'
-))
-
-fig_detailed.update_layout(
-    title=f'CO2 Emissions vs. Temperature Change for the {selected_scenario} Scenario',
-    xaxis_title='Year',
-    yaxis=dict(
-        title='CO2 Emissions (metric tons)',
-        titlefont=dict(color='RoyalBlue'),
-        tickfont=dict(color='RoyalBlue'),
-        showgrid=True,
-        gridcolor='RoyalBlue'
-    ),
-    yaxis2=dict(
-        title='Temperature Change (°C)',
-        titlefont=dict(color='Crimson'),
-        tickfont=dict(color='Crimson'),
-        overlaying='y',
-        side='right',
-        gridcolor='Crimson'
-    ),
-    legend_title="Measurements"
-)
-
-st.plotly_chart(fig_detailed, use_container_width=True)
 
-###############################ECONOMY##########################################################
-st.markdown('---')
-st.subheader('**Economic Outlook on Global Emission Trends**')
-
-st.write('***Analyzing the Relationship Between Emissions, GDP, & Population for the Top 10 Emitters***')
-
-def assign_colors(data_frame, column, color_list):
-    unique_countries = data_frame[column].unique()
-    color_map = {country: color_list[i % len(color_list)] for i, country in enumerate(unique_countries)}
-    return color_map
-
-def create_bar_chart(data, x_column, y_column, title, color_map):
-    fig = px.bar(data, x=x_column, y=y_column, title=title,
-                 color=x_column, color_discrete_map=color_map)
-    st.plotly_chart(fig, use_container_width = True)
-
-
-hex_colors = [
-    '#1f77b4',  
-    '#ff7f0e',  
-    '#2ca02c',  
-    '#d62728',  
-    '#9467bd',  
-    '#8c564b',  
-    '#e377c2',  
-    '#7f7f7f',  
-    '#bcbd22',  
-    '#17becf'   
-]
-
-
-st.write('The following visualizations show the relationships between the top 10 countries in carbon dioxide emissions for the year 2022, their GDP, and population size.')
-st.write('For exact values, hover over the bars/data points to see more information.')
-
-color_map = assign_colors(gdp_emissions_data, 'Entity', hex_colors)
-
-data_gdp_sorted = gdp_emissions_data.sort_values(by='GDP (current US$)', ascending=False)
-data_pop_sorted = gdp_emissions_data.sort_values(by='Population, total', ascending=False)
-
-
-tab1, tab2, tab3 = st.tabs(["CO2 Emissions", "GDP by Country", "Population by Country"])
-
-with tab1:
-    st.write('***Carbon Dioxide Emissions for 2022 of the Top 10 Emitters***')
-    create_bar_chart(gdp_emissions_data, 'Entity', 'Annual CO₂ emissions', 'Annual CO₂ emissions by Country for 2022 in Tonnes', color_map)
-with tab2:
-    st.write('***GDP of the Top 10 Emitters for 2022***')
-    create_bar_chart(data_gdp_sorted, 'Entity', 'GDP (current US$)', 'GDP by Country', color_map)
-
-with tab3:
-    st.write('***Population of the Top 10 Emitter for 2022***')
-    create_bar_chart(data_pop_sorted, 'Entity', 'Population, total', 'Population by Country', color_map)
-
-
-
-    
-
-taba, tabb = st.tabs(['CO2 Emissions vs. GDP', 'CO2 Emissions vs. Population'])
-with taba:
-    st.write('***CO2 Emissions vs GDP Scatter Plot***')
-    st.write('***Dot size represents annual carbon dioxide emissions.***')
-    fig4 = px.scatter(
-        gdp_emissions_data, x='GDP (current US$)', y='Annual CO₂ emissions', text='Entity',
-        title='CO2 Emissions vs GDP (Log Scale)', log_x=True, log_y=True,
-        labels={'GDP (current US$)': 'GDP (current US$)', 'Annual CO₂ emissions': 'CO2 Emissions'},
-        size='Annual CO₂ emissions', size_max=40, color='Entity',  # Adjusted size_max and color
-        hover_data=['GDP (current US$)', 'Annual CO₂ emissions'])
-    fig4.update_traces(textposition='middle left')
-    fig4.update_layout(legend_title_text='Country', yaxis_range=[8.6, 10.4])
-    st.plotly_chart(fig4, use_container_width = True)
-    st.write(' > Higher emissions come from countries with higher GDP for this subset.')
-with tabb:
-    st.write('***CO2 Emissions vs Population Scatter Plot***')
-    st.write('***Dot size represents annual carbon dioxide emissions.***')
-    fig5 = px.scatter(
-        gdp_emissions_data, x='Population, total', y='Annual CO₂ emissions', text='Entity',
-        title='CO2 Emissions vs Population (Log Scale)', log_x=True, log_y=True,
-        labels={'Population, total': 'Population', 'Annual CO₂ emissions': 'CO2 Emissions'},
-        size='Annual CO₂ emissions', size_max=30, color='Entity',  # Adjusted size_max and color
-        hover_data=['Population, total', 'Annual CO₂ emissions'])
-    fig5.update_traces(textposition='middle right')
-    fig5.update_layout(legend_title_text='Country', yaxis_range=[8.6, 10.4])
-    st.plotly_chart(fig5, use_container_width = True)
-    st.write(' > There is a general trend of higher emissions being seen from countries with larger populations for this subset.')
+@fragment
+def economy_section():
+    st.write('***Analyzing the Relationship Between Emissions, GDP, & Population for the Top 10 Emitters***')
 
+    st.write('The following visualizations show the relationships between the top 10 countries in carbon dioxide emissions for the year 2022, their GDP, and population size.')
+    st.write('For exact values, hover over the bars/data points to see more information.')
 
+    with profile.phase('economy', 'load') as phase:
+        gdp_emissions_data = load_dataset('co2gdp')
+        phase.add_rows(len(gdp_emissions_data))
+
+    for panel, bar in views('Bar chart', list(bar_views), key='economy_bar'):
+        with panel:
+            st.write(bar_views[bar])
+            with profile.phase('economy', 'bar figure'):
+                fig = section_figures.economy_bar(bar)
+            st.plotly_chart(fig, use_container_width = True)
+
+    for panel, view in views('Scatter plot', list(scatter_views), key='economy_scatter'):
+        axis, caption, takeaway = scatter_views[view]
+        with panel:
+            st.write(caption)
+            st.write('***Dot size represents annual carbon dioxide emissions.***')
+            with profile.phase('economy', 'scatter figure'):
+                fig = section_figures.economy_scatter(axis)
+            st.plotly_chart(fig, use_container_width = True)
+            st.write(takeaway)
 
-st.markdown('---')
 ###RENEWABLES###########################
 
-st.write('***In the tree map below, the size of the box represents the magnitude of carbon dioxide emissions.***')
-st.write('***Hover over each box to see more information.***')
+@fragment
+def treemap_section():
+    st.markdown('---')
 
-gdp_reload = pd.read_csv('data/co2gdp.csv')
+    st.write('***In the tree map below, the size of the box represents the magnitude of carbon dioxide emissions.***')
+    st.write('***Hover over each box to see more information.***')
 
-gdp_reload['Economic Classification'] = pd.cut(
-    gdp_reload['GDP (current US$)'] / gdp_reload['Population, total'],
-    bins=[0, 1000, 10000, 100000],
-    labels=["Low Income", "Middle Income", "High Income"],
-    right=False)
-filtered_data = gdp_reload[['Entity','Annual CO₂ emissions', 'Economic Classification', 'GDP (current US$)', 'Population, total']]
+    with profile.phase('treemap', 'figures'):
+        fig = load_derived('co2gdp', figures.emissions_treemap)
 
-fig = px.treemap(
-    filtered_data,
-    path=['Entity', 'Economic Classification'],
-    values='Annual CO₂ emissions',
-    color='Annual CO₂ emissions',
-    hover_data=['GDP (current US$)', 'Population, total', 'Annual CO₂ emissions', 'Economic Classification'],
-    color_continuous_scale='reds',
-    title="Treemap of the Top 10 Emitters")
+    st.plotly_chart(fig, use_container_width=True)
 
-fig.update_layout(
-    margin=dict(t=50, l=25, r=25, b=25),
-    font=dict(size=12, color="RebeccaPurple"))
 
-st.plotly_chart(fig, use_container_width=True)
+@fragment
+def renewables_section():
+    st.markdown('---')
 
+    st.write('***Renewable Energy Investement Outlook***')
+    st.write('> The following visualization allows us to see how carbon dioxide emissions for specific countries and the world, compare against the overall worldwide share of renewable energy.')
+    with profile.phase('renewables', 'load') as phase:
+        renewables = load_derived(section_figures.RENEWABLES, renewables_trends)
+        phase.add_rows(len(renewables.entities))
+    country = st.selectbox('Select Global or a Country:', section_figures.options('renewables'))
+    with profile.phase('renewables', 'figures'):
+        trend_fig = section_figures.renewables(country)
+    st.plotly_chart(trend_fig, use_container_width = True)
+    st.write('> When comparing the global CO2 emissions over time vs. the worldwide renewable energy share, it can be seen that both lines trend parallel to each other for the majority of the plot.')
+    st.write('> This could imply that we are at a stage in which we are reacting to the energy crisis as we observe the negative effects rather than being proactive to reduce effects ahead of time.')
 
-st.markdown('---')
+#############################################################################
 
-def plot_dual_axis_trends(data, country=None):
-    if country:
-        data = data[data['Entity'] == country]
-    else:
-        data = data.groupby('Year').agg({
-            'Share of modern renewables in final energy consumption, World': 'mean',
-            'Annual CO₂ emissions': 'sum'
-        }).reset_index()
-    
-    fig = go.Figure()
-    
-    fig.add_trace(
-        go.Scatter(
-            x=data['Year'], y=data['Share of modern renewables in final energy consumption, World'],
-            name='Renewable Energy Share (%)',
-            mode='lines+markers',
-            line=dict(color='green', dash='dash'),  
-            marker=dict(symbol='circle', size=8)
-        )
-    )
-    
-    fig.add_trace(
-        go.Scatter(
-            x=data['Year'], y=data['Annual CO₂ emissions'],
-            name='CO₂ Emissions (tons)',
-            mode='lines+markers',
-            yaxis='y2',
-            line=dict(color='magenta', dash='dot'),  
-            marker=dict(symbol='square', size=8)
-        )
-    )
-    
-    fig.update_layout(
-        xaxis_title="Year",
-        yaxis=dict(
-            title="Global Renewable Energy Share (%)",
-            gridcolor='blue',
-            title_font=dict(size=14),
-            tickfont=dict(size=12)
-        ),
-        yaxis2=dict(
-            title="CO₂ Emissions (tons)",
-            overlaying='y',
-            side='right',
-            gridcolor='red',
-            title_font=dict(size=14),
-            tickfont=dict(size=12)
-        ),
-        title="Worldwide Renewable Energy Share vs Country CO₂ Emissions Over Time",
-        title_font=dict(size=16, family='Helvetica'),
-        legend=dict(x=0.1, y=1.1, orientation='h'),
-        hovermode='closest'
-    )
-    
-    return fig
-
-
-st.write('***Renewable Energy Investement Outlook***')
-st.write('> The following visualization allows us to see how carbon dioxide emissions for specific countries and the world, compare against the overall worldwide share of renewable energy.')
-country = st.selectbox('Select Global or a Country:', ['Global'] + sorted(renewablesdata['Entity'].unique().tolist()))
-trend_fig = plot_dual_axis_trends(renewablesdata, country if country != 'Global' else None)
-st.plotly_chart(trend_fig, use_container_width = True)
-st.write('> When comparing the global CO2 emissions over time vs. the worldwide renewable energy share, it can be seen that both lines trend parallel to each other for the majority of the plot.')
-st.write('> This could imply that we are at a stage in which we are reacting to the energy crisis as we observe the negative effects rather than being proactive to reduce effects ahead of time.')
+@fragment
+def deforestation_section():
+    with profile.phase('deforestation', 'load') as phase:
+        deforestdata = load_dataset('deforestation')
+        phase.add_rows(len(deforestdata))
 
-st.markdown('---')
+    st.write('***Analyzing the Relationship Between Deforestation Rates and Emissions***')
+    st.write('> The visualizations below show the effects of deforestation on carbon dioxide emissions for critical regions such as the Amazon, Congo Basin, and SouthEast Asia.')
+    st.write('***Dot size represents tree cover loss***')
+    selected_region = st.selectbox('Select a Region:', section_figures.options('deforestation'))
 
-#############################################################################
-st.subheader('Exploring Environmental Consequences from Emissions')
-st.write('***Analyzing the Relationship Between Deforestation Rates and Emissions***')
-st.write('> The visualizations below show the effects of deforestation on carbon dioxide emissions for critical regions such as the Amazon, Congo Basin, and SouthEast Asia.')
-st.write('***Dot size represents tree cover loss***')
-selected_region = st.selectbox('Select a Region:', deforestdata['region'].unique())
-
-filtered_data = deforestdata[deforestdata['region'] == selected_region]
-
-scatter_fig = px.scatter(filtered_data, x='tree_cover_loss', y='co2_emissions',
-                         size='tree_cover_loss', color='country',
-                         hover_data=['year', 'country'], title=f"CO2 Emissions vs. Tree Cover Loss in {selected_region}")
-scatter_fig.update_layout(legend_title_text='Country')
-scatter_fig.update_xaxes(title_text='Tree Cover Loss (ha)')
-scatter_fig.update_yaxes(title_text='CO2 Emissions (tonnes)')
-
-st.plotly_chart(scatter_fig, use_container_width=True)
-
-st.write('> From the scatter plots for each region, there is a consistent trend in which countries within the regions with higher tree cover loss emit greater amounts of carbon dioxide as a result')
-
-annual_data = filtered_data.groupby('year').agg({'tree_cover_loss': 'mean', 'co2_emissions': 'mean'}).reset_index()
-
-line_fig = go.Figure()
-
-line_fig.add_trace(go.Scatter(x=annual_data['year'], y=annual_data['tree_cover_loss'],
-                              mode='lines+markers',
-                              name='Tree Cover Loss',
-                              line=dict(color='blue', width=2),
-                              marker=dict(size=10, opacity=0.8)))
-
-line_fig.add_trace(go.Scatter(x=annual_data['year'], y=annual_data['co2_emissions'],
-                              mode='lines+markers',
-                              name='CO2 Emissions',
-                              line=dict(color='red', width=2),
-                              marker=dict(size=10, opacity=0.8),
-                              yaxis='y2'))
-
-line_fig.update_layout(
-    title=f"Progression of Tree Cover Loss and CO2 Emissions Over Time in {selected_region}",
-    xaxis_title="Year",
-    yaxis=dict(
-        title="Tree Cover Loss (ha)",
-        type='log',
-        showgrid=True,
-        gridwidth=1,
-        gridcolor='lightgrey'
-    ),
-    yaxis2=dict(
-        title='CO2 Emissions (tonnes)',
-        overlaying='y',
-        side='right',
-        type='log'
-    ),
-    legend_title="Metric",
-    plot_bgcolor='white',
-    font=dict(family="Helvetica, Arial, sans-serif", size=14, color="black")
-)
-
-st.plotly_chart(line_fig, use_container_width=True)
-st.write('> A consistent trend between CO2 emissions and tree cover loss can be seen for the Congo Basin data, but not for the Amazon or SouthEast Asia Regions.')
+    with profile.phase('deforestation', 'figures'):
+        scatter_fig, line_fig = section_figures.deforestation(selected_region)
+
+    st.plotly_chart(scatter_fig, use_container_width=True)
+
+    st.write('> From the scatter plots for each region, there is a consistent trend in which countries within the regions with higher tree cover loss emit greater amounts of carbon dioxide as a result')
+
+    st.plotly_chart(line_fig, use_container_width=True)
+    st.write('> A consistent trend between CO2 emissions and tree cover loss can be seen for the Congo Basin data, but not for the Amazon or SouthEast Asia Regions.')
 
-st.markdown('---')
 ##############################################################################################
-st.write('***Extreme Weather Event Frequency Correlation with Carbon Dioxide Emissions***')
-
-annual_data = weatherdata.groupby('year').agg({
-    'co2 emissions': 'sum',
-    'natural disaster': 'count'
-}).reset_index()
-
-fig = make_subplots(specs=[[{"secondary_y": True}]])
-fig.add_trace(go.Scatter(x=annual_data['year'], y=annual_data['co2 emissions'], name='Total CO2 Emissions',
-                         line=dict(color='blue', width=2)), secondary_y=False)
-fig.add_trace(go.Scatter(x=annual_data['year'], y=annual_data['natural disaster'], name='Total Disaster Frequency',
-                         line=dict(color='red', width=2, dash='dash')), secondary_y=True)
-
-fig.update_layout(
-    title='Total Disaster Weather Frequency vs CO2 Emissions Over Time',
-    xaxis_title='Year',
-    yaxis_title='CO2 Emissions',
-    yaxis2_title='Disaster Frequency',
-    plot_bgcolor='white',
-    xaxis=dict(showgrid=True, gridcolor='lightgrey'),
-    yaxis=dict(showgrid=True, gridcolor='lightgrey'),
-    legend=dict(x=0.01, y=0.99, bordercolor='Black', borderwidth=1)
-)
-fig.update_xaxes(tickangle=-45)
-st.plotly_chart(fig, use_container_width = True )
-st.write('> There is a very faint generalized trend that can be seen above. The peaks of each dataset seem to be correlating. This will be explored in more depth in the next visualization')
-
-st.write('***Comparing Specific Disaster Weather Types Against Total Carbon Dioxide Emissions***')
-disaster_type = st.selectbox('Select Disaster Type:', weatherdata['natural disaster'].unique())
-
-type_data = weatherdata[weatherdata['natural disaster'] == disaster_type]
-type_annual_data = type_data.groupby('year').agg({
-    'co2 emissions': 'sum',
-    'natural disaster': 'count'
-}).reset_index()
-
-fig2 = make_subplots(specs=[[{"secondary_y": True}]])
-fig2.add_trace(go.Scatter(x=type_annual_data['year'], y=type_annual_data['co2 emissions'], name='CO2 Emissions',
-                          line=dict(color='blue', width=2)), secondary_y=False)
-fig2.add_trace(go.Scatter(x=type_annual_data['year'], y=type_annual_data['natural disaster'], name=f'{disaster_type} Frequency',
-                          line=dict(color='red', width=2, dash='dash')), secondary_y=True)
-
-fig2.update_layout(
-    title=f'Total CO2 Emissions and {disaster_type} Frequency Over Time',
-    xaxis_title='Year',
-    yaxis_title='CO2 Emissions',
-    yaxis2_title='Disaster Frequency',
-    plot_bgcolor='white',
-    xaxis=dict(showgrid=True, gridcolor='lightgrey'),
-    yaxis=dict(showgrid=True, gridcolor='lightgrey'),
-    legend=dict(x=0.01, y=0.99, bordercolor='Black', borderwidth=1)
-)
-fig2.update_xaxes(tickangle=-45)
-st.plotly_chart(fig2,use_container_width = True )
-
-st.write('> ***For all disaster weather types that are affected by atmospheric variables, there is a clear correlation between peaks in CO2 emissions and event frequency. This gives grounds to believe that weather events that are extreme in nature are somewhat affected by CO2 emissions.***')
 
-st.markdown('---')
+def total_disaster_figure(event_counts, emissions):
+    return figures.disaster_figure(disaster_cube(event_counts, emissions))
+
+
+@fragment
+def weather_section():
+    st.markdown('---')
+    st.write('***Extreme Weather Event Frequency Correlation with Carbon Dioxide Emissions***')
+
+    with profile.phase('weather', 'transform') as phase:
+        weather_cube = load_derived(('weather_event_counts', 'weather_emissions'), disaster_cube)
+        phase.add_rows(weather_cube.counts.size)
+    with profile.phase('weather', 'figures'):
+        fig = load_derived(('weather_event_counts', 'weather_emissions'), total_disaster_figure)
+
+    st.plotly_chart(fig, use_container_width = True )
+    st.write('> There is a very faint generalized trend that can be seen above. The peaks of each dataset seem to be correlating. This will be explored in more depth in the next visualization')
+
+    st.write('***Comparing Specific Disaster Weather Types Against Total Carbon Dioxide Emissions***')
+    disaster_type = st.selectbox('Select Disaster Type:', section_figures.options('weather'))
+
+    with profile.phase('weather', 'type figure'):
+        fig2 = section_figures.disaster_type(disaster_type)
+    st.plotly_chart(fig2,use_container_width = True )
+
+    st.write('> ***For all disaster weather types that are affected by atmospheric variables, there is a clear correlation between peaks in CO2 emissions and event frequency. This gives grounds to believe that weather events that are extreme in nature are somewhat affected by CO2 emissions.***')
+
 ###############################################################################
-st.subheader('The Paris Agreement')
-st.write('> Based on the carbon dioxide emissions over time, it can be assessed as to whether the Paris Agreement has made any significant changes to global carbon dioxide emissions since the enactment of the agreement.')
-st.write('> The data will be shown from 2017 onwards as the Paris Agreement was brought into existence in late 2016.')
-def create_emission_plot(df, country):
-    filtered_df = df[df['Entity'] == country]
-    filtered_df['SMA_3'] = filtered_df['Annual CO₂ emissions'].rolling(window=3, min_periods=1).mean()
-
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=filtered_df['Year'], y=filtered_df['Annual CO₂ emissions'], mode='lines+markers',
-                             name='Actual Emissions', line=dict(color='blue', width=3),
-                             marker=dict(color='blue', size=7, line=dict(width=3, color='DarkSlateGrey')),
-                             text=filtered_df['Annual CO₂ emissions'],
-                             hoverinfo='text+x+y'))
-
-    fig.add_trace(go.Scatter(x=filtered_df['Year'], y=filtered_df['SMA_3'], mode='lines',
-                             name='3-Year SMA', line=dict(color='red', dash='dash', width=2.5),
-                             hoverinfo='skip'))
-
-    fig.update_layout(title=f'Annual CO₂ Emissions for {country} since enactment of Paris Agreement',
-                      xaxis_title='Year',
-                      yaxis_title='CO2 Emissions (tonnes)',
-                      font=dict(color='white', size=12),
-                      legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
-
-    try:
-        emissions_2017 = filtered_df[filtered_df['Year'] == 2017]['Annual CO₂ emissions'].values[0]
-        emissions_2022 = filtered_df[filtered_df['Year'] == 2022]['Annual CO₂ emissions'].values[0]
-        net_difference = emissions_2022 - emissions_2017
-    except IndexError:
-        net_difference = "Data not available for full range"
-
-    return fig, net_difference
-
-st.write('> By changing the country in the selection box, the emissions over time and the 3-year rolling average for each country will be visualized.')
-    
-country = st.selectbox('Select a Country', options=df['Entity'].unique())
-plot, net_diff = create_emission_plot(df, country)
-    
-st.plotly_chart(plot, use_container_width=True)
-
-st.write('***Country Emissions Status Since Enactment of Agreement:***')
-
-if int(net_diff) >= 1:
-    st.write(f'> ***Emissions are still trending upwards for {country}.***')
-else:
-    st.write(f'> ***Emissions are decreasing for {country}.***')
-
-if isinstance(net_diff, str):
-    st.write(net_diff)
-else:
-    st.write(f'> ***Net emissions since agreement: {net_diff:,} tonnes***')
 
-st.markdown('---')
+@fragment
+def paris_agreement_section():
+    st.write('> Based on the carbon dioxide emissions over time, it can be assessed as to whether the Paris Agreement has made any significant changes to global carbon dioxide emissions since the enactment of the agreement.')
+    st.write('> The data will be shown from 2017 onwards as the Paris Agreement was brought into existence in late 2016.')
 
-st.subheader('Conclusions')
+    st.write('> By changing the country in the selection box, the emissions over time and the 3-year rolling average for each country will be visualized.')
 
-st.write('Clearly there is a multifaceted impact that carbon dioxide emissions have on the world around us as elucidated by the above data visualizations. The above data highlights room to grow as well as progress that has been made.')
-st.write('This dashboard clearly explains the effects of carbon dioxide emissions on the climate. We should all work towards reducing emissions to mitigate this impact.')
+    with profile.phase('paris_agreement', 'load') as phase:
+        paris_series = load_derived('paris_agreement', paris_agreement_series)
+        phase.add_rows(len(paris_series.values))
+    country = st.selectbox('Select a Country', options=section_figures.options('paris_agreement'))
+    with profile.phase('paris_agreement', 'figures'):
+        plot, net_diff = section_figures.paris_agreement(country)
 
+    st.plotly_chart(plot, use_container_width=True)
 
+    st.write('***Country Emissions Status Since Enactment of Agreement:***')
 
+    if isinstance(net_diff, str):
+        pass
+    elif int(net_diff) >= 1:
+        st.write(f'> ***Emissions are still trending upwards for {country}.***')
+    else:
+        st.write(f'> ***Emissions are decreasing for {country}.***')
+
+    if isinstance(net_diff, str):
+        st.write(net_diff)
+    else:
+        st.write(f'> ***Net emissions since agreement: {net_diff:,} tonnes***')
+
+
+def debug_sidebar():
+    # only shown while profiling; reflects the latest run of every section phase
+    if not instrumentation.ENABLED:
+        return
+    with st.sidebar.expander('Debug: section timings', expanded=False):
+        st.dataframe(profile.records())
+        st.write('Figure cache', figure_cache.stats())
+
+
+def _warmup_status():
+    state = warmup.progress()
+    if state['status'] == 'done':
+        st.sidebar.caption(f"Figure warm-up: {state['done'] - state['failed']} of {state['total']} figures "
+                           f"ready in {state['seconds']:.0f}s")
+    elif state['total']:
+        st.sidebar.progress(state['done'] / state['total'],
+                            text=f"Warming up figures: {state['done']} of {state['total']}")
+    else:
+        st.sidebar.caption('Figure warm-up starting...')
+    for error in state['errors'][:5]:
+        st.sidebar.caption(f'Warm-up error: {error}')
 
 
+# refreshes itself every couple of seconds, only when the warm-up is on
+warmup_status = st.fragment(run_every=2)(_warmup_status) if hasattr(st, 'fragment') else _warmup_status
 
 
+co2_temperature_section()
+projections_section()
+section_group('**Economic Outlook on Global Emission Trends**', 'show_economy',
+              [economy_section, treemap_section, renewables_section])
+section_group('Exploring Environmental Consequences from Emissions', 'show_environment',
+              [deforestation_section, weather_section])
+section_group('The Paris Agreement', 'show_paris_agreement', [paris_agreement_section])
+debug_sidebar()
+if warmup.ENABLED:
+    warmup_status()
 
+st.markdown('---')
+
+st.subheader('Conclusions')
+
+st.write('Clearly there is a multifaceted impact that carbon dioxide emissions have on the world around us as elucidated by the above data visualizations. The above data highlights room to grow as well as progress that has been made.')
+st.write('This dashboard clearly explains the effects of carbon dioxide emissions on the climate. We should all work towards reducing emissions to mitigate this impact.')
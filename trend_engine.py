@@ -0,0 +1,73 @@
+
+####Windowed Correlation / Trendline Engine####
+
+# Cumulative sums over (x, y, x², y², xy) sorted by year, so the Pearson r and the
+# least-squares line for any year window come from two lookups instead of a rescan.
+
+import numpy as np
+
+_RELATIVE_TOLERANCE = 1e-10
+
+
+class PrefixRegression:
+
+    def __init__(self, years, x, y):
+        years = np.asarray(years, dtype=np.int64)
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        order = np.argsort(years, kind='stable')
+        self.years, self.x, self.y = years[order], x[order], y[order]
+
+        # centred on the global means to keep the sums of squares well conditioned
+        self.x_center, self.y_center = self.x.mean(), self.y.mean()
+        xc, yc = self.x - self.x_center, self.y - self.y_center
+        sums = np.zeros((6, len(xc) + 1))
+        np.cumsum(np.ones_like(xc), out=sums[0, 1:])
+        np.cumsum(xc, out=sums[1, 1:])
+        np.cumsum(yc, out=sums[2, 1:])
+        np.cumsum(xc * xc, out=sums[3, 1:])
+        np.cumsum(yc * yc, out=sums[4, 1:])
+        np.cumsum(xc * yc, out=sums[5, 1:])
+        self._sums = sums
+
+        # row offset of the first row of every calendar year, so a window is two array reads
+        self.first_year = int(self.years[0]) if len(self.years) else 0
+        self.last_year = int(self.years[-1]) if len(self.years) else -1
+        self._year_start = np.searchsorted(self.years, np.arange(self.first_year, self.last_year + 2))
+
+    def rows(self, start_year, end_year):
+        start = min(max(start_year, self.first_year), self.last_year + 1) - self.first_year
+        stop = min(max(end_year + 1, self.first_year), self.last_year + 1) - self.first_year
+        return int(self._year_start[start]), int(self._year_start[max(start, stop)])
+
+    def stats(self, start_year, end_year):
+        lo, hi = self.rows(start_year, end_year)
+        n, sx, sy, sxx, syy, sxy = self._sums[:, hi] - self._sums[:, lo]
+        result = {'n': int(n), 'r': np.nan, 'slope': np.nan, 'intercept': np.nan}
+        if n < 2:
+            return result
+
+        # differences below the rounding noise of the sums mean the window is constant
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        cov = sxy - sx * sy / n
+        x_varies = var_x > _RELATIVE_TOLERANCE * sxx
+        if x_varies:
+            result['slope'] = cov / var_x
+            result['intercept'] = (self.y_center + sy / n) - result['slope'] * (self.x_center + sx / n)
+        if x_varies and var_y > _RELATIVE_TOLERANCE * syy:
+            # rounding in the prefix sums can carry |r| just past 1
+            result['r'] = float(np.clip(cov / np.sqrt(var_x * var_y), -1.0, 1.0))
+        return result
+
+
+def build_regression(data, x_column, y_column, year_column='Year'):
+    return PrefixRegression(data[year_column].to_numpy(), data[x_column].to_numpy(), data[y_column].to_numpy())
+
+
+def annual_co2_temperature(data):
+    return build_regression(data, 'Annual CO₂ emissions', 'Annual Temperature Anomaly')
+
+
+def monthly_co2_temperature(data):
+    return build_regression(data, 'Annual CO₂ emissions', 'Monthly Temperature Anomaly')
@@ -0,0 +1,123 @@
+
+####Start-Up Cache Warm-Up####
+
+# Optional (DASHBOARD_WARMUP=1): when the server runs the app for the first time, a few
+# background threads enumerate the options of every selector (section_figures.SELECTORS)
+# and build each option's data slice and figure into the shared figure cache, so no
+# visitor pays for a cold selection. The work stays out of the way of live requests: the
+# threads run at the lowest OS priority where it can be set per thread (Linux), and
+# before every figure they wait until live sessions have left the figure cache alone for
+# IDLE_SECONDS. The cache is grown by the number of variants so warming never evicts
+# live entries. progress() reports how far it has got.
+
+import os
+import queue
+import threading
+import time
+
+import section_figures
+from figure_cache import figure_cache, mark_background
+
+ENABLED = os.environ.get('DASHBOARD_WARMUP', '').strip().lower() not in ('', '0', 'false', 'no', 'off')
+THREADS = int(os.environ.get('DASHBOARD_WARMUP_THREADS') or 2)
+IDLE_SECONDS = 0.5
+
+_lock = threading.Lock()
+_state = {'status': 'not started', 'total': 0, 'done': 0, 'failed': 0, 'seconds': 0.0, 'errors': []}
+_started = None
+
+
+def _lower_priority():
+    mark_background()
+    try:
+        # Linux applies a thread id's niceness to that thread alone
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except (AttributeError, OSError):
+        pass
+
+
+def _record(error=None):
+    with _lock:
+        _state['done'] += 1
+        if error is not None:
+            _state['failed'] += 1
+            _state['errors'].append(error)
+
+
+def _build(selector, option, figure):
+    while figure_cache.idle_seconds() < IDLE_SECONDS:
+        time.sleep(IDLE_SECONDS)
+    try:
+        figure(option)
+        _record()
+    except Exception as error:
+        _record(f'{selector}={option!r}: {type(error).__name__}: {error}')
+
+
+def _worker(tasks):
+    _lower_priority()
+    while True:
+        try:
+            task = tasks.get_nowait()
+        except queue.Empty:
+            return
+        _build(*task)
+
+
+def _run(threads):
+    _lower_priority()
+    first, tasks = [], queue.Queue()
+    for selector, (_, options, figure) in section_figures.SELECTORS.items():
+        try:
+            selector_options = options()
+        except Exception as error:
+            # e.g. a dataset that is missing; the rest is still warmed
+            with _lock:
+                _state['errors'].append(f'{selector}: {type(error).__name__}: {error}')
+            continue
+        for i, option in enumerate(selector_options):
+            (first.append if i == 0 else tasks.put)((selector, option, figure))
+
+    total = len(first) + tasks.qsize()
+    figure_cache.resize(figure_cache.maxsize + total)
+    with _lock:
+        _state.update(status='running', total=total)
+    print(f'warm-up: building {total} selector figures on {threads} background threads')
+
+    # Plotly fills in its shared default template lazily, and two threads doing that for
+    # the same trace type at once corrupt it; one figure of every kind is built first
+    for task in first:
+        _build(*task)
+
+    workers = [threading.Thread(target=_worker, args=(tasks,), name=f'warmup-{i}', daemon=True)
+               for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    with _lock:
+        _state.update(status='done', seconds=time.monotonic() - _started)
+        summary = dict(_state)
+    print(f'warm-up: built {summary["done"] - summary["failed"]} of {summary["total"]} figures '
+          f'in {summary["seconds"]:.1f}s ({summary["failed"]} failed)')
+
+
+def start(threads=None):
+    # idempotent: the first call in the server process starts the warm-up
+    global _started
+    with _lock:
+        if _started is not None:
+            return False
+        _started = time.monotonic()
+        _state['status'] = 'starting'
+    threading.Thread(target=_run, args=(threads or THREADS,), name='warmup', daemon=True).start()
+    return True
+
+
+def progress():
+    with _lock:
+        state = dict(_state, errors=list(_state['errors']))
+    if _started is not None and state['status'] != 'done':
+        state['seconds'] = time.monotonic() - _started
+    return state
@@ -0,0 +1,48 @@
+
+####Disaster Event Cube####
+
+# Dense (country, year, disaster type) event counts next to a (country, year) emissions
+# matrix. The per-year totals the charts need are reduced once when the cube is built,
+# so a chart is a column read rather than a groupby over the event rows.
+
+import numpy as np
+import pandas as pd
+
+
+class DisasterCube:
+
+    def __init__(self, event_counts, emissions):
+        self.countries = sorted(set(event_counts['country']) | set(emissions['country']))
+        self.disaster_types = sorted(event_counts['natural disaster'].unique())
+        first_year = int(min(event_counts['year'].min(), emissions['year'].min()))
+        last_year = int(max(event_counts['year'].max(), emissions['year'].max()))
+        self.years = np.arange(first_year, last_year + 1)
+
+        country_codes = pd.Categorical(event_counts['country'], categories=self.countries).codes
+        type_codes = pd.Categorical(event_counts['natural disaster'], categories=self.disaster_types).codes
+        self.counts = np.zeros((len(self.countries), len(self.years), len(self.disaster_types)), dtype=np.int32)
+        np.add.at(self.counts, (country_codes, event_counts['year'].to_numpy() - first_year, type_codes),
+                  event_counts['events'].to_numpy())
+
+        self.emissions = np.zeros((len(self.countries), len(self.years)))
+        emission_codes = pd.Categorical(emissions['country'], categories=self.countries).codes
+        self.emissions[emission_codes, emissions['year'].to_numpy() - first_year] = np.nan_to_num(emissions['co2 emissions'].to_numpy())
+
+        # a country's emissions count once per event, as in the event-level weather-co2.csv
+        self.events_by_year = self.counts.sum(axis=0)
+        self.emissions_by_year = np.einsum('cyt,cy->yt', self.counts, self.emissions)
+
+    def annual(self, disaster_type=None):
+        if disaster_type is None:
+            events = self.events_by_year.sum(axis=1)
+            emissions = self.emissions_by_year.sum(axis=1)
+        else:
+            column = self.disaster_types.index(disaster_type)
+            events = self.events_by_year[:, column]
+            emissions = self.emissions_by_year[:, column]
+        observed = events > 0
+        return self.years[observed], emissions[observed], events[observed]
+
+
+def disaster_cube(event_counts, emissions):
+    return DisasterCube(event_counts, emissions)